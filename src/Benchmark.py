@@ -0,0 +1,189 @@
+"""\
+Measures how building and verifying grows with the size of a protocol.
+Protocols of every size tier are generated with fixed seeds and taken through each stage of the build, parsing,
+projection, graph analysis, createModel, serialisation to XML and, if verifyta is available, verification of the end
+state and overflow queries. The median time of each stage per tier gives a scaling curve, which is saved as JSON so
+runs before and after a change can be compared. Given the results of an earlier run, every stage of a tier that grew
+past the threshold is reported as a regression. Every run is also recorded in the history.
+
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from GraphAnalyser import GraphAnalyser
+from History import BenchmarkMeasurement, History
+from JSONParser import build_graph, create_JSONTransfer, generate_projection
+from ModelBuilder import createModel
+from ProtocolGenerator import GeneratorSettings, generate_protocol
+from QueryGenerator import QueryGenerator
+from Verifier import run_queries_batch
+
+stage_names = ["parse", "projection", "analyse", "createModel", "to_xml", "verify"]
+default_threshold = 0.25 # Allowed growth relative to the baseline
+# Smaller differences are noise of the machine rather than regressions
+min_regression_seconds = 0.005
+
+@dataclass
+class ScalingTier:
+    name: str
+    roles: int
+    commands: int
+    branch_fanout: int = 2
+    loop_depth: int = 1
+
+default_tiers = [
+    ScalingTier("tiny", 2, 10),
+    ScalingTier("small", 4, 40, 3, 2),
+    ScalingTier("medium", 8, 160, 3, 2),
+    ScalingTier("large", 16, 640, 4, 3),
+]
+
+# Every role once without delay, the log fits every command of the protocol once
+def create_benchmark_settings(role_names: List[str], amount_of_commands: int) -> ModelSettings:
+    return ModelSettings({role: 1 for role in role_names}, {role: DelayType.NOTHING for role in role_names},
+                         log_size=amount_of_commands + 1, delay_amount={role: 0 for role in role_names})
+
+# Times each stage of building and verifying the protocol, stopping at the first stage that fails
+def run_pipeline(protocol: Dict[str, Any], verifyta_path: str = None) -> Dict[str, Any]:
+    timings: Dict[str, float] = {}
+    current = [None]
+
+    @contextmanager
+    def stage(name: str):
+        current[0] = name
+        start_time = time.perf_counter()
+        yield
+        timings[name] = time.perf_counter() - start_time
+
+    try:
+        protocol_text = json.dumps(protocol)
+        with stage("parse"):
+            data = json.loads(protocol_text)
+            graph = build_graph(data["transitions"])
+            graph.initial = data["initial"]
+
+        with stage("projection"):
+            global_json_transfer = create_JSONTransfer(graph, "GlobalProtocol")
+            json_transfers = [create_JSONTransfer(generate_projection(graph, role), role) for role in sorted(graph.get_role_names())]
+
+        with stage("analyse"):
+            GraphAnalyser(global_json_transfer.own_events + global_json_transfer.other_events).analyse_graph(global_json_transfer.initial)
+
+        query_generator = QueryGenerator.from_json_transfers(global_json_transfer, json_transfers)
+        queries = [query_generator.generate_end_state_query(), query_generator.generate_overflow_query()]
+        model_settings = create_benchmark_settings([json_transfer.name for json_transfer in json_transfers], len(data["transitions"]))
+        with stage("createModel"):
+            model = createModel(json_transfers, global_json_transfer, model_settings)
+
+        with stage("to_xml"):
+            xml_data = model.to_xml()
+
+        if verifyta_path != None:
+            with tempfile.TemporaryDirectory(prefix="benchmark_") as work_folder:
+                model_path = os.path.join(work_folder, "uppaal_model.xml")
+                with open(model_path, 'w', encoding='utf-8') as file:
+                    file.write(xml_data)
+                with stage("verify"):
+                    run_queries_batch(model_path, queries, verifyta_path, show_traces=False)
+    except Exception as e:
+        return {"stages": timings, "error": f"{current[0]}: {e}"}
+    return {"stages": timings, "error": None}
+
+def get_medians(runs: List[Dict[str, Any]]) -> Dict[str, float]:
+    medians = {}
+    for name in stage_names:
+        times = [run["stages"][name] for run in runs if name in run["stages"]]
+        if len(times) > 0:
+            medians[name] = statistics.median(times)
+    return medians
+
+def run_scaling(tiers: List[ScalingTier] = None, seeds: int = 3, verifyta_path: str = None) -> Dict[str, Any]:
+    if tiers == None:
+        tiers = default_tiers
+
+    tier_results = []
+    for tier in tiers:
+        runs = []
+        for seed in range(seeds):
+            protocol = generate_protocol(GeneratorSettings(tier.roles, tier.commands, tier.branch_fanout, tier.loop_depth, seed=seed))
+            run = run_pipeline(protocol, verifyta_path)
+            run["seed"] = seed
+            run["transitions"] = len(protocol["transitions"])
+            run["locations"] = len({transition["source"] for transition in protocol["transitions"]} |
+                                   {transition["target"] for transition in protocol["transitions"]})
+            runs.append(run)
+        tier_results.append({**asdict(tier), "runs": runs, "median": get_medians(runs)})
+
+    # Median time of a stage against the commands of the tier
+    curves = {name: [[tier["commands"], tier["median"][name]] for tier in tier_results if name in tier["median"]] for name in stage_names}
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seeds": seeds,
+        "tiers": tier_results,
+        "curves": {name: curve for name, curve in curves.items() if len(curve) > 0}
+    }
+
+def save_results(results: Dict[str, Any], file_path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    with open(file_path, 'w') as file:
+        json.dump(results, file, indent=4)
+
+def get_measurements(results: Dict[str, Any]) -> List[BenchmarkMeasurement]:
+    return [BenchmarkMeasurement(tier["name"], name, seconds) for tier in results["tiers"] for name, seconds in tier["median"].items()]
+
+# Failing to record the run never fails the benchmark itself
+def record_history(results: Dict[str, Any]):
+    try:
+        with History() as history:
+            history.record_benchmark("scaling", get_measurements(results), results["python"], results["platform"], results["time"])
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not record benchmark in history: {e}")
+
+def read_results(file_path: str) -> Dict[str, Any]:
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+def has_grown(value: float, base_value: float, threshold: float, min_difference: float) -> bool:
+    return value > base_value * (1 + threshold) and value - base_value > min_difference
+
+# Every stage of a tier whose median grew past the threshold, tiers generated differently than the baseline are not compared
+def compare_runs(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = default_threshold) -> List[str]:
+    base_tiers = {tier["name"]: tier for tier in baseline["tiers"]}
+    regressions = []
+    for tier in results["tiers"]:
+        base_tier = base_tiers.get(tier["name"])
+        if base_tier == None or baseline["seeds"] != results["seeds"]:
+            continue
+        if (base_tier["roles"], base_tier["commands"]) != (tier["roles"], tier["commands"]):
+            continue
+        for name in stage_names:
+            if name not in tier["median"] or name not in base_tier["median"]:
+                continue
+            if has_grown(tier["median"][name], base_tier["median"][name], threshold, min_regression_seconds):
+                regressions.append(f"{tier['name']} {name} took {tier['median'][name]:.4f}s, baseline is {base_tier['median'][name]:.4f}s")
+    return regressions
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"{'tier':<10}{'commands':>10}" + "".join(f"{name:>13}" for name in stage_names)]
+    for tier in results["tiers"]:
+        line = f"{tier['name']:<10}{tier['commands']:>10}"
+        for name in stage_names:
+            line += f"{tier['median'][name]:>12.4f}s" if name in tier["median"] else f"{'-':>13}"
+        lines.append(line)
+        errors = sorted({run["error"] for run in tier["runs"] if run["error"] != None})
+        for error in errors:
+            lines.append(f"  failed at {error}")
+    return "\n".join(lines)
@@ -0,0 +1,235 @@
+"""\
+Benchmarks every stage of building a model for the protocols of the integration tests.
+Each protocol folder is built several times the way the build command does, identifying the json files, parsing the
+protocol, generating projections, analysing the graphs, constructing the role templates (their layout included) and
+log templates, and writing the model as XML. The median time of every stage is reported along with the most memory
+allocated at once during the stage, measured in a separate run as tracing allocations slows everything down.
+
+The totals of every stage are compared with a baseline kept in the repository and the benchmark fails when a stage
+became slower or allocates more than the threshold allows, so changes to the speed of the build stay measurable:
+
+    python src/BuildBenchmark.py
+    python src/BuildBenchmark.py --update-baseline
+
+Every run is also recorded in the history, where the stages of every protocol can be followed across runs on the same
+machine. The history is not used as the baseline as it is local to a machine and not part of the repository.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+from Benchmark import default_threshold, has_grown, min_regression_seconds
+from CLI import identify_json_files
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from History import BenchmarkMeasurement, History
+from JSONParser import parse_protocol_JSON_file, parse_time_JSON
+from ModelBuilder import createModel
+from Timing import StageTimer
+
+repository_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_protocol_folder = os.path.join(repository_path, "tests", "integration")
+default_baseline_path = os.path.join(repository_path, "tests", "benchmarks", "build_baseline.json")
+
+stage_names = ["identify_json_files", "parse_protocol_JSON_file", "generate_projection", "analyse_graph", "role", "layout", "log", "to_xml"]
+default_repeats = 5
+min_regression_kb = 64 # Smaller growth of the peak memory is noise rather than a regression
+
+# Every folder below the base folder holding a swarm protocol
+def find_protocol_folders(base_folder: str) -> List[str]:
+    folders = []
+    for folder_path, _, file_names in sorted(os.walk(base_folder)):
+        if any(file_name.endswith(".json") for file_name in file_names) and identify_json_files(folder_path)[1] != None:
+            folders.append(folder_path)
+    return folders
+
+# One instance of every role delayed by one event, so the logs are built with propagation delay
+def create_benchmark_settings(role_names: List[str]) -> ModelSettings:
+    return ModelSettings({role: 1 for role in role_names}, {role: DelayType.EVENTS_EMITTED for role in role_names},
+                         delay_amount={role: 1 for role in role_names})
+
+def build_protocol(folder_path: str, timer: StageTimer):
+    with timer.stage("identify_json_files"):
+        _, protocol_json_file, time_json_file = identify_json_files(folder_path)
+    with timer.stage("parse_protocol_JSON_file"):
+        global_json_transfer, json_transfers = parse_protocol_JSON_file(protocol_json_file, timer)
+
+    model_settings = create_benchmark_settings([json_transfer.name for json_transfer in json_transfers])
+    if time_json_file != None:
+        model_settings.time_json_transfer = parse_time_JSON(time_json_file)
+    model = createModel(json_transfers, global_json_transfer, model_settings, timer)
+
+    with timer.stage("to_xml"):
+        model.to_xml()
+
+# Builds the protocol with the timer, returning why it failed if it did
+def run_build(folder_path: str, timer: StageTimer) -> str:
+    try:
+        build_protocol(folder_path, timer)
+    except Exception as e:
+        return str(e)
+    return None
+
+# Median time of every stage over the repeats and the memory of an extra run with tracemalloc.
+# When the build fails the stages finished before the failure are still reported
+def measure_protocol(folder_path: str, repeats: int = default_repeats) -> Dict[str, Any]:
+    timers = [StageTimer() for _ in range(repeats)]
+    errors = [run_build(folder_path, timer) for timer in timers]
+
+    memory_timer = StageTimer()
+    tracemalloc.start()
+    try:
+        run_build(folder_path, memory_timer)
+    finally:
+        tracemalloc.stop()
+
+    stages = {}
+    for name in stage_names:
+        if all(name in timer.seconds and name not in timer.failed for timer in timers + [memory_timer]):
+            stages[name] = {
+                "seconds": statistics.median(timer.seconds[name] for timer in timers),
+                "peak_memory_kb": memory_timer.peak_memory.get(name, 0) / 1024
+            }
+    return {"error": next((error for error in errors if error != None), None), "stages": stages}
+
+# Stage totals only count protocols that got through the stage
+def get_stage_totals(protocols: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    totals = {}
+    for name in stage_names:
+        measured = [protocol["stages"][name] for protocol in protocols.values() if name in protocol["stages"]]
+        if len(measured) > 0:
+            totals[name] = {
+                "seconds": sum(stage["seconds"] for stage in measured),
+                "peak_memory_kb": max(stage["peak_memory_kb"] for stage in measured),
+                "protocols": len(measured)
+            }
+    return totals
+
+def run_suite(base_folder: str = default_protocol_folder, repeats: int = default_repeats) -> Dict[str, Any]:
+    protocols = {}
+    for folder_path in find_protocol_folders(base_folder):
+        protocols[os.path.relpath(folder_path, base_folder).replace(os.sep, "/")] = measure_protocol(folder_path, repeats)
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "stages": get_stage_totals(protocols),
+        "protocols": protocols
+    }
+
+def get_build_errors(results: Dict[str, Any]) -> List[str]:
+    return [f"{name} failed to build: {protocol['error']}" for name, protocol in results["protocols"].items() if protocol["error"] != None]
+
+# Protocols that failed to build and stages not measured for every protocol, which a baseline may not leave out
+def get_incomplete(results: Dict[str, Any]) -> List[str]:
+    problems = get_build_errors(results)
+    for name in stage_names:
+        measured = results["stages"][name]["protocols"] if name in results["stages"] else 0
+        if measured != len(results["protocols"]):
+            problems.append(f"{name} was measured for {measured} of {len(results['protocols'])} protocols")
+    return problems
+
+# Every stage that grew past the threshold or is missing from the baseline and every protocol that failed to build.
+# Stages measured over other protocols than the baseline are not compared
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = default_threshold) -> List[str]:
+    regressions = get_build_errors(results)
+    for name, stage in results["stages"].items():
+        base_stage = baseline["stages"].get(name)
+        if base_stage == None:
+            regressions.append(f"{name} has no baseline, update the baseline on a setup where every protocol builds")
+            continue
+        if base_stage["protocols"] != stage["protocols"]:
+            continue
+        if has_grown(stage["seconds"], base_stage["seconds"], threshold, min_regression_seconds):
+            regressions.append(f"{name} took {stage['seconds']:.4f}s, baseline is {base_stage['seconds']:.4f}s")
+        if has_grown(stage["peak_memory_kb"], base_stage["peak_memory_kb"], threshold, min_regression_kb):
+            regressions.append(f"{name} allocated {stage['peak_memory_kb']:.0f} KB, baseline is {base_stage['peak_memory_kb']:.0f} KB")
+    return regressions
+
+def get_measurements(results: Dict[str, Any]) -> List[BenchmarkMeasurement]:
+    return [BenchmarkMeasurement(protocol_name, name, stage["seconds"], stage["peak_memory_kb"])
+            for protocol_name, protocol in results["protocols"].items() for name, stage in protocol["stages"].items()]
+
+# Failing to record the run never fails the benchmark itself
+def record_history(results: Dict[str, Any]):
+    try:
+        with History() as history:
+            history.record_benchmark("build", get_measurements(results), results["python"], results["platform"], results["time"])
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not record benchmark in history: {e}")
+
+def read_baseline(file_path: str) -> Dict[str, Any]:
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+def save_results(results: Dict[str, Any], file_path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    with open(file_path, 'w') as file:
+        json.dump(results, file, indent=4)
+
+def format_suite(results: Dict[str, Any], baseline: Dict[str, Any] = None) -> str:
+    lines = [f"{'stage':<26}{'protocols':>10}{'median':>12}{'peak memory':>14}{'baseline':>12}{'change':>9}"]
+    for name, stage in results["stages"].items():
+        line = f"{name:<26}{stage['protocols']:>10}{stage['seconds']:>11.4f}s{stage['peak_memory_kb']:>11.0f} KB"
+        base_stage = baseline["stages"].get(name) if baseline != None else None
+        if base_stage != None and base_stage["protocols"] == stage["protocols"] and base_stage["seconds"] > 0:
+            line += f"{base_stage['seconds']:>11.4f}s{(stage['seconds'] / base_stage['seconds'] - 1) * 100:>8.0f}%"
+        lines.append(line)
+    for protocol_name, protocol in results["protocols"].items():
+        if protocol["error"] != None:
+            lines.append(f"{protocol_name} failed to build: {protocol['error']}")
+    return "\n".join(lines)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the stages of building the models of the integration tests")
+    parser.add_argument("--folder", type=str, default=default_protocol_folder, help="Folder searched for protocols. Default is tests/integration")
+    parser.add_argument("--baseline", type=str, default=default_baseline_path, help="Baseline json file. Default is tests/benchmarks/build_baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=default_threshold, help="Allowed growth of a stage, 0.25 is 25%%. Default is 0.25")
+    parser.add_argument("--repeats", type=int, default=default_repeats, help="Builds per protocol. Default is 5")
+    parser.add_argument("--json", type=str, help="Also write the results to this json file")
+    args = parser.parse_args()
+
+    results = run_suite(args.folder, args.repeats)
+    record_history(results)
+    if args.json != None:
+        save_results(results, args.json)
+
+    if args.update_baseline:
+        problems = get_incomplete(results)
+        if len(problems) > 0:
+            print(format_suite(results))
+            for problem in problems:
+                print(f"Incomplete: {problem}")
+            print("Baseline not written, every stage of every protocol has to be measured")
+            return 1
+        save_results(results, args.baseline)
+        print(format_suite(results))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = None
+    if os.path.isfile(args.baseline):
+        baseline = read_baseline(args.baseline)
+    else:
+        print(f"No baseline found at {args.baseline}, run with --update-baseline to create it")
+    print(format_suite(results, baseline))
+    if baseline == None:
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,20 +7,44 @@ such as formatting the output of fault traces to only contain relevant informati
 """
 
 import argparse
+import copy
+import io
 import json
 import os
+import sqlite3
 import subprocess
-from typing import Any, List
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
 import re
 
+from Benchmark import compare_runs, default_threshold, default_tiers, format_results, read_results, record_history, run_scaling, save_results
+from DataObjects.JSONTransfer import JSONTransfer
 from DataObjects.ModelSettings import DelayType, ModelSettings
+from DataObjects.VerificationResult import VERDICT_ERROR, VerificationResult
+from DelaySearch import STATUS_ERROR, Budget, DelaySearch, SearchPoint, format_point, get_most_realistic, run_within_budget, save_search
+from History import BuildRecord, History, format_benchmarks, format_builds, format_queries, format_trends
+from Incremental import reverify, write_dependencies
 from JSONParser import parse_time_JSON, parse_projection_JSON_file, parse_protocol_JSON_file
+from LogBatch import LogBatchStats, create_rejected_result, default_batch_size, read_logs, verify_logs_batch
+from LogConformance import LogConformanceChecker, read_model_event_names, read_model_settings
 from ModelBuilder import createModel
 from QueryGenerator import QueryGenerator, generate_log_query
+from Reachability import ReachabilityChecker, format_stats
+from Simulator import format_report, simulate
+from Timing import StageTimer, format_timings, timed
+from Sweep import SweepVariant, apply_overrides, format_variant, read_sweep, write_table
+from WellFormedness import WellFormednessAnalyser
+from ProtocolGenerator import GeneratorSettings, generate_protocol, write_protocol
+from Portfolio import get_strategies, portfolio_strategies, run_query_portfolio
+from Spool import Spool, default_spool_timeout, default_stale_after, start_local_workers
+from Tuner import count_queries, format_result, get_best_result, get_option_combinations, save_profile, tune
+from ResultCache import ResultCache, default_max_size_mb
+from Verifier import BatchJob, capture_output, get_worker_amount, run_queries_batch, run_query, verify_batches_parallel, verify_queries_parallel, work_folder_path
 
 base_path = os.path.dirname(os.path.abspath(__file__))
 state_path = os.path.join("PermanentState", "state.json") # Hardcoded relative path to local state file
-autoQuery_path = os.path.join("PermanentState", "autoQueries.txt") # Hardcoded relative path to local state file.
 
 str_validity = "validity"
 str_sizebound = "sizebound"
@@ -82,6 +106,21 @@ def get_verifyta_path(verifyta_path: str) -> str:
         verifyta_path = " ".join(verifyta_path)
     return verifyta_path
 
+# Set by long running processes such as the daemon so results are shared between commands
+shared_result_cache: ResultCache = None
+
+# Cache is used unless explicitly turned off, the size limit is optionally set in the state
+def get_result_cache(no_cache: bool) -> ResultCache:
+    if no_cache:
+        return None
+    if shared_result_cache != None:
+        return shared_result_cache
+    state_data = get_state_data("")
+    max_size_mb = default_max_size_mb
+    if state_data != None and "cache_max_size" in state_data:
+        max_size_mb = state_data["cache_max_size"]
+    return ResultCache(max_size_mb=max_size_mb)
+
 def get_state_data(key: Any, file_path: str = "") -> Any:
     try:
         if file_path == "":
@@ -185,74 +224,424 @@ def load_state_into_model_settings(state_data):
 
     return model_settings
 
-def build_model(args):
-    try:
-        state_data = None
-        if args.path_to_state == None:
-            state_data = get_state_data("")
-        else:
-            full_path_state = " ".join(args.path_to_state)
-            state_data = get_state_data("", full_path_state)
+# Parses the protocol, projections and time file found in a folder
+def load_json_transfers(path_to_files: str, timer: StageTimer = None):
+    print(f"Attempt to identify relevant json files at local location {path_to_files}")
+    
+    with timed(timer, "identify_json_files"):
+        projection_json_files, protocol_json_file, time_json_file = identify_json_files(path_to_files)
 
-        state_data = check_state_data(state_data)
-        if state_data == None:
-            return
+    if protocol_json_file == None:
+        print("Cannot find protocol JSON aborting attempt")
+        print("Please review the folder path with \"setArgs -pf\"")
+        return None
 
-        model_settings = load_state_into_model_settings(state_data)
+    json_transfers = []
+    global_json_transfer = None
+    if len(projection_json_files) == 0:
+        print("No projection files found so auto-generating projections")
+        with timed(timer, "parse_protocol_JSON_file"):
+            global_json_transfer, json_transfers = parse_protocol_JSON_file(protocol_json_file, timer)
+    else:
+        with timed(timer, "parse_protocol_JSON_file"):
+            global_json_transfer, auto_json_transfers = parse_protocol_JSON_file(protocol_json_file, timer)
 
-        path_to_files = None
-        if args.path_to_folder == None:
-            path_to_files = state_data["base_path"]
-        else:
-            path_to_files = " ".join(args.path_to_folder)
+        name_list = []
+        for auto_json_transfer in auto_json_transfers:
+            name_list.append(auto_json_transfer.name)
 
-        print(f"Attempt to identify relevant json files at local location {path_to_files}")
-        
-        projection_json_files, protocol_json_file, time_json_file = identify_json_files(path_to_files)
+        for projection_json_file in projection_json_files:
+            with timed(timer, "parse_projection_JSON_file"):
+                current_json_transfer = parse_projection_JSON_file(projection_json_file)
+            if current_json_transfer.name in name_list:
+                name_list.remove(current_json_transfer.name)
+                json_transfers.append(current_json_transfer)
 
-        if protocol_json_file == None:
-            print("Cannot find protocol JSON aborting attempt")
-            print("Please review the folder path with \"setArgs -pf\"")
-            return
+        if len(name_list) != 0:
+            print(f"Missing the following projections {name_list} so auto generating them")
+            for auto_json_transfer in auto_json_transfers:
+                if auto_json_transfer.name in name_list:
+                    json_transfers.append(auto_json_transfer)
 
-        json_transfers = []
-        global_json_transfer = None
-        if len(projection_json_files) == 0:
-            print("No projection files found so auto-generating projections")
-            global_json_transfer, json_transfers = parse_protocol_JSON_file(protocol_json_file)
-        else:
-            global_json_transfer, auto_json_transfers = parse_protocol_JSON_file(protocol_json_file)
+    time_transfer = None
 
-            name_list = []
-            for auto_json_transfer in auto_json_transfers:
-                name_list.append(auto_json_transfer.name)
+    if time_json_file != None:
+        print("Found a time json file!")
+        with timed(timer, "parse_time_JSON"):
+            time_transfer = parse_time_JSON(time_json_file)
+    else:
+        print("No time file found")
 
-            for projection_json_file in projection_json_files:
-                current_json_transfer = parse_projection_JSON_file(projection_json_file)
-                if current_json_transfer.name in name_list:
-                    name_list.remove(current_json_transfer.name)
-                    json_transfers.append(current_json_transfer)
+    return global_json_transfer, json_transfers, time_transfer
 
-            if len(name_list) != 0:
-                print(f"Missing the following projections {name_list} so auto generating them")
-                for auto_json_transfer in auto_json_transfers:
-                    if auto_json_transfer.name in name_list:
-                        json_transfers.append(auto_json_transfer)
+# Reads the settings and protocol a model is built from, None if they could not be loaded
+def load_build_inputs(args, timer: StageTimer = None):
+    state_data = None
+    if args.path_to_state == None:
+        state_data = get_state_data("")
+    else:
+        full_path_state = " ".join(args.path_to_state)
+        state_data = get_state_data("", full_path_state)
 
-        time_transfer = None
+    state_data = check_state_data(state_data)
+    if state_data == None:
+        return None
 
-        if time_json_file != None:
-            print("Found a time json file!")
-            time_transfer = parse_time_JSON(time_json_file)
-            model_settings.time_json_transfer = time_transfer
-        else:
-            print("No time file found")
+    model_settings = load_state_into_model_settings(state_data)
+
+    path_to_files = None
+    if args.path_to_folder == None:
+        path_to_files = state_data["base_path"]
+    else:
+        path_to_files = " ".join(args.path_to_folder)
+
+    json_data = load_json_transfers(path_to_files, timer)
+    if json_data == None:
+        return None
+    global_json_transfer, json_transfers, time_transfer = json_data
+    if time_transfer != None:
+        model_settings.time_json_transfer = time_transfer
+    return model_settings, path_to_files, global_json_transfer, json_transfers
+
+# Prints every violation, protocols that are not well-formed are not built or verified
+def check_well_formedness(global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer]) -> bool:
+    violations = WellFormednessAnalyser(global_json_transfer, json_transfers).analyse()
+    if len(violations) == 0:
+        return True
 
-        currentModel = createModel(json_transfers, global_json_transfer, model_settings)
-        save_xml_to_file(currentModel.to_xml(), "uppaal_model", path_to_files)
+    print(f"Protocol is not well-formed, found {len(violations)} violations:")
+    for violation in violations:
+        print(f"  {violation}")
+    print("Fix the protocol or projections, or give \"--skip-well-formedness\" to continue anyway")
+    return False
+
+def build_model(args, timer: StageTimer = None):
+    start_time = time.perf_counter()
+    try:
+        build_inputs = load_build_inputs(args, timer)
+        if build_inputs == None:
+            return
+        model_settings, path_to_files, global_json_transfer, json_transfers = build_inputs
+        if not args.skip_well_formedness:
+            with timed(timer, "well_formedness"):
+                well_formed = check_well_formedness(global_json_transfer, json_transfers)
+            if not well_formed:
+                return
+
+        with timed(timer, "createModel"):
+            currentModel = createModel(json_transfers, global_json_transfer, model_settings, timer, args.headless)
+        with timed(timer, "to_xml"):
+            xml_data = currentModel.to_xml()
+        with timed(timer, "save_xml"):
+            save_xml_to_file(xml_data, "uppaal_model", path_to_files)
+        record_build_history(path_to_files, model_settings, currentModel, xml_data, time.perf_counter() - start_time, timer)
     except Exception as e:
         print(f"Failed to build with exception {e}")
 
+def simulate_model(args):
+    try:
+        build_inputs = load_build_inputs(args)
+        if build_inputs == None:
+            return
+        model_settings, _, global_json_transfer, json_transfers = build_inputs
+        if model_settings.time_json_transfer != None:
+            print("Clocks are not simulated, timing constraints are ignored")
+
+        report = simulate(global_json_transfer, json_transfers, model_settings, args.runs, args.seed, args.max_steps)
+        print(format_report(report, args.top))
+    except Exception as e:
+        print(f"Failed to simulate with exception {e}")
+
+# Answers the end state, overflow, size bound and log queries in Python for untimed models, timed models are built and verified by verifyta
+def explore_model(args) -> List[VerificationResult]:
+    try:
+        build_inputs = load_build_inputs(args)
+        if build_inputs == None:
+            return []
+        model_settings, path_to_files, global_json_transfer, json_transfers = build_inputs
+        logs = read_logs(" ".join(args.log_file_path)) if args.log_file_path != None else []
+        valid_only = args.valid_only == True
+
+        if model_settings.time_json_transfer != None:
+            print("Model is timed, verifying with verifyta")
+            query_generator = QueryGenerator.from_json_transfers(global_json_transfer, json_transfers)
+            queries = [query_generator.generate_end_state_query(), query_generator.generate_overflow_query(),
+                       query_generator.generate_sizebound_query()] + [generate_log_query(log, valid_only) for log in logs]
+            save_xml_to_file(createModel(json_transfers, global_json_transfer, model_settings).to_xml(), "uppaal_model", path_to_files)
+            model_path = f"{path_to_files}/uppaal_model.xml"
+            records = run_queries_batch(model_path, queries, get_verifyta_path(args.verifyta_path), get_result_cache(args.no_cache), show_traces=False)
+        else:
+            checker = ReachabilityChecker(global_json_transfer, json_transfers, model_settings)
+            records = checker.check(logs, valid_only, args.dfs, args.max_states)
+            print(format_stats(checker.stats))
+    except Exception as e:
+        print(f"Failed to explore with exception {e}")
+        return []
+
+    for i, record in enumerate(records):
+        print(f"Verifying query {i}: {record.query}")
+        if record.result_value != None:
+            print(f"Query was satisfied with value {record.result_value}")
+        else:
+            print(record.output)
+    write_records(records, args.json)
+    return records
+
+# Builds the changed protocol and only verifies the queries depending on a part of the model that changed,
+# the other results are taken from the cached results of the previous model
+def reverify_model(args) -> List[VerificationResult]:
+    before_model_path = f"{" ".join(args.before_folder)}/uppaal_model.xml"
+    if not os.path.isfile(before_model_path):
+        print(f"No previous model found at {before_model_path}, build and verify it first")
+        return []
+    queries = get_lines_in_file(" ".join(args.query_path))
+    if queries == None:
+        return []
+
+    try:
+        args.path_to_folder = args.after_folder
+        build_inputs = load_build_inputs(args)
+        if build_inputs == None:
+            return []
+        model_settings, path_to_files, global_json_transfer, json_transfers = build_inputs
+        if not args.skip_well_formedness and not check_well_formedness(global_json_transfer, json_transfers):
+            return []
+        save_xml_to_file(createModel(json_transfers, global_json_transfer, model_settings).to_xml(), "uppaal_model", path_to_files)
+        after_model_path = f"{path_to_files}/uppaal_model.xml"
+
+        plan, records = reverify(before_model_path, after_model_path, queries, get_verifyta_path(args.verifyta_path), get_result_cache(False))
+        write_dependencies(plan, f"{path_to_files}/query_dependencies.json")
+    except Exception as e:
+        print(f"Failed to re-verify with exception {e}")
+        return []
+
+    affected = [dependencies for dependencies in plan if dependencies.affected]
+    print(f"{len(affected)} of {len(plan)} queries are affected by the change, reusing {len(plan) - len(affected)} results")
+    for i, (dependencies, record) in enumerate(zip(plan, records)):
+        print(f"Verifying query {i}: {record.query}")
+        if not dependencies.affected:
+            print("Reused result of previous model")
+        print(record.output)
+    write_records(records, args.json)
+    record_run_history("reverify", after_model_path, records)
+    return records
+
+# Builds the model of the state changed by the overrides into the folder and returns its path.
+# Building changes the transfers and settings, so every variant starts from a copy
+def build_variant(state_data, overrides, base_settings: ModelSettings, global_json_transfer: JSONTransfer,
+                  json_transfers: List[JSONTransfer], folder_path: str, headless: bool = False) -> str:
+    model_settings = load_state_into_model_settings(apply_overrides(state_data, overrides))
+    model_settings.time_json_transfer = copy.deepcopy(base_settings.time_json_transfer)
+    model = createModel(copy.deepcopy(json_transfers), copy.deepcopy(global_json_transfer), model_settings, headless=headless)
+    os.makedirs(folder_path, exist_ok=True)
+    save_xml_to_file(model.to_xml(), "uppaal_model", folder_path)
+    return os.path.join(folder_path, "uppaal_model.xml")
+
+# Builds a model for every combination of settings in the sweep file and verifies the queries against each,
+# the variants are verified in parallel and every result is written to one table
+def sweep_model(args) -> List[SweepVariant]:
+    queries = get_lines_in_file(" ".join(args.query_path))
+    if queries == None:
+        return []
+    queries = [query.strip() for query in queries if query.strip()]
+
+    try:
+        combinations = read_sweep(" ".join(args.sweep_path))
+        build_inputs = load_build_inputs(args)
+        if build_inputs == None:
+            return []
+        base_settings, path_to_files, global_json_transfer, json_transfers = build_inputs
+        if not args.skip_well_formedness and not check_well_formedness(global_json_transfer, json_transfers):
+            return []
+        state_data = get_state_data("", " ".join(args.path_to_state)) if args.path_to_state != None else get_state_data("")
+    except Exception as e:
+        print(f"Failed to read sweep with exception {e}")
+        return []
+
+    output_folder = " ".join(args.output) if args.output != None else os.path.join(path_to_files, "sweep")
+    os.makedirs(output_folder, exist_ok=True)
+    verifyta_path = get_verifyta_path(args.verifyta_path)
+    cache = get_result_cache(args.no_cache)
+
+    variants = []
+    jobs = []
+    for i, overrides in enumerate(combinations):
+        variant = SweepVariant(i, overrides)
+        variants.append(variant)
+        try:
+            variant.model_path = build_variant(state_data, overrides, base_settings, global_json_transfer, json_transfers,
+                                               os.path.join(output_folder, f"variant_{i}"), args.headless)
+            jobs.append(BatchJob(variant.model_path, queries, verifyta_path, cache, show_traces=False))
+        except Exception as e:
+            variant.error = str(e)
+
+    built = [variant for variant in variants if variant.error == None]
+    print(f"Verifying {len(queries)} queries on {len(built)} variants using {min(get_worker_amount(args.workers), max(len(built), 1))} workers")
+    for variant, (_, results) in zip(built, verify_batches_parallel(jobs, get_worker_amount(args.workers))):
+        variant.results = results
+
+    for variant in variants:
+        print(format_variant(variant))
+    table_path = os.path.join(output_folder, "results.csv")
+    try:
+        write_table(variants, queries, table_path)
+        print(f"Results written to {table_path}")
+    except OSError as e:
+        print(f"Could not write results to {table_path}: {e}")
+    return variants
+
+# Searches from no delay towards more delay and replicas for the most realistic settings verified within the budget
+def search_delays(args) -> Optional[SearchPoint]:
+    query_path = " ".join(args.query_path)
+    try:
+        amount_of_queries = count_queries(query_path)
+        build_inputs = load_build_inputs(args)
+        if build_inputs == None:
+            return None
+        base_settings, path_to_files, global_json_transfer, json_transfers = build_inputs
+        if not args.skip_well_formedness and not check_well_formedness(global_json_transfer, json_transfers):
+            return None
+        state_data = get_state_data("", " ".join(args.path_to_state)) if args.path_to_state != None else get_state_data("")
+    except Exception as e:
+        print(f"Failed to start search with exception {e}")
+        return None
+
+    output_folder = " ".join(args.output) if args.output != None else os.path.join(path_to_files, "delay_search")
+    verifyta_path = get_verifyta_path(args.verifyta_path)
+    budget = Budget(args.time_budget, args.memory_budget * 1024 if args.memory_budget != None else None)
+
+    def evaluate(overrides) -> SearchPoint:
+        try:
+            folder_path = os.path.join(output_folder, f"run_{len(search.points)}")
+            model_path = build_variant(state_data, overrides, base_settings, global_json_transfer, json_transfers, folder_path, args.headless)
+            point = run_within_budget(model_path, query_path, verifyta_path, amount_of_queries, budget)
+        except Exception as e:
+            print(f"Failed to build or verify with exception {e}")
+            point = SearchPoint(overrides, status=STATUS_ERROR)
+        point.overrides = overrides
+        print(format_point(point))
+        return point
+
+    search = DelaySearch(evaluate, args.delay_types, args.max_delay, list(range(1, args.max_replicas + 1)))
+    best = get_most_realistic(search.search())
+    if best == None:
+        print("No configuration could be verified within the budget, not even without delay")
+    else:
+        print(f"Most realistic configuration within budget: {best.describe()}")
+    try:
+        save_search(list(search.points.values()), best, os.path.join(output_folder, "search.json"))
+    except OSError as e:
+        print(f"Could not save search results: {e}")
+    return best
+
+# Writes a random well-formed protocol into the folder so it can be built like any other
+def generate_protocol_file(args) -> Optional[str]:
+    settings = GeneratorSettings(args.roles, args.commands, args.fanout, args.loop_depth, seed=args.seed)
+    try:
+        file_path = write_protocol(generate_protocol(settings), settings, " ".join(args.output))
+    except (ValueError, OSError) as e:
+        print(f"Failed to generate protocol: {e}")
+        return None
+    print(f"Protocol written to {file_path}")
+    return file_path
+
+# Verification is only part of the benchmark when verifyta can be found
+def run_benchmark(args):
+    verifyta_path = get_verifyta_path(args.verifyta_path)
+    if verifyta_path == None or not os.path.isfile(verifyta_path):
+        print("verifyta not found, verification is left out of the benchmark")
+        verifyta_path = None
+
+    tiers = [tier for tier in default_tiers if args.tiers == None or tier.name in args.tiers]
+    results = run_scaling(tiers, args.seeds, verifyta_path)
+    print(format_results(results))
+    record_history(results)
+    if args.output != None:
+        try:
+            save_results(results, " ".join(args.output))
+        except OSError as e:
+            print(f"Could not save benchmark results: {e}")
+
+    if args.baseline != None:
+        try:
+            baseline = read_results(" ".join(args.baseline))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not read the benchmark baseline: {e}")
+            return results
+        regressions = compare_runs(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if len(regressions) == 0:
+            print("No stage grew past the threshold")
+    return results
+
+# Every build and verification is kept in the history, failing to record it never fails the command itself
+def record_build_history(path_to_files: str, model_settings: ModelSettings, model, xml_data: str, seconds: float, timer: StageTimer = None):
+    projection_json_files, protocol_json_file, time_json_file = identify_json_files(path_to_files)
+    input_files = [file_path for file_path in [protocol_json_file, time_json_file] + list(projection_json_files) if file_path != None]
+    templates = model.roles + model.logs
+    record = BuildRecord(path_to_files, input_files, model_settings,
+                         templates=len(templates),
+                         locations=sum(len(template.locations) for template in templates),
+                         transitions=sum(len(template.transitions) for template in templates),
+                         model_bytes=len(xml_data.encode('utf-8')),
+                         seconds=seconds,
+                         timings=timer.to_dict()["stages"] if timer != None else None)
+    try:
+        record.model_hash = ResultCache().get_model_hash(f"{path_to_files}/uppaal_model.xml")
+    except OSError:
+        pass
+    try:
+        with History() as history:
+            history.record_build(record)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not record build in history: {e}")
+
+def record_run_history(command: str, model_path: str, records: List[VerificationResult], seconds: float = None, timer: StageTimer = None):
+    if len(records) == 0:
+        return
+    model_hash = None
+    try:
+        model_hash = ResultCache().get_model_hash(model_path)
+    except OSError:
+        pass
+    try:
+        with History() as history:
+            history.record_run(command, model_path, records, model_hash, seconds, timer.to_dict()["stages"] if timer != None else None)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not record verification in history: {e}")
+
+# Dates are given as YYYY-MM-DD or a number of days ago
+def parse_since(since: str) -> str:
+    if since.isdigit():
+        return (datetime.now() - timedelta(days=int(since))).isoformat(timespec="seconds")
+    return datetime.fromisoformat(since).isoformat(timespec="seconds")
+
+def show_history(args):
+    protocol = " ".join(args.protocol) if args.protocol != None else None
+    query = " ".join(args.query) if args.query != None else None
+    try:
+        since = parse_since(args.since) if args.since != None else None
+    except ValueError:
+        print(f"Invalid date {args.since}, give YYYY-MM-DD or a number of days")
+        return
+
+    try:
+        with History() as history:
+            if args.view == "builds":
+                print(format_builds(history.get_builds(protocol, since, args.limit)))
+            elif args.view == "queries":
+                print(format_queries(history.get_results(protocol, query, since, args.limit)))
+            elif args.view == "benchmarks":
+                print(format_benchmarks(history.get_benchmarks(None, protocol, since, args.limit)))
+            elif args.view == "trends":
+                # Runs of the last week are compared with those before unless told otherwise
+                since = since if since != None else parse_since("7")
+                print(f"Comparing runs since {since} with runs before")
+                print(format_trends(history.get_trends(since, protocol, query), args.factor))
+    except sqlite3.Error as e:
+        print(f"Could not read history: {e}")
+
 def set_verifyta_path(newPath: str):
     # First we format the given path a little
     if newPath.endswith("verifyta"):
@@ -287,113 +676,110 @@ def get_lines_in_file(file_path: str) -> List[str]:
     except Exception as e:
         print(f"An error occurred when reading file at {file_path}: {e}")
 
-def filter_output(file_path_input: str) -> str:
-    # Define regular expressions for the patterns
-    state_pattern = re.compile(r"State:")
-    transition_pattern = re.compile(r"Transition:")
-    role_transition_pattern = re.compile(r"setLogEntryForUpdate\(\w+_ID,")
-    propagation_pattern = re.compile(r"log\(\d+\).l_prop[1-9]->")
-    property_satisfied_pattern = re.compile(r"-- Formula is satisfied.")
-    delay_pattern = re.compile(r"Delay: \d+")
-    global_time_pattern = re.compile(r"globalTime=\d+")
-
-    sup_result_pattern = re.compile(r"-- Result: \d+")
-
-    result = ""
-
-    with open(file_path_input, "r") as infile:
-        next_is_state = False
-        next_is_transition = False
-        current_state = None
-        current_global_time = None
-
-        content = infile.read()
-
-        if "Error " in content or "syntax error:" in content or " [error] " in content:
-            print("Error during verification")
-            print(content)
-            return result
-        
-        if (property_satisfied_pattern.search(content) != None):
-            result += "Query was satisfied \n"
-        else:
-            result += "Query not satisfied \n"
-        
-        for line in content.splitlines():
-            state_match = state_pattern.search(line)
-
-            sup_result_match = sup_result_pattern.search(line)
-            if sup_result_match != None:
-                grouped = sup_result_match.group()
-                result += grouped
-                return result
-            
-            if "globalTime: " in line:
-                result += "Giving the resulting bound: " + line[12:]
-                return result
-
-            if state_match != None:
-                next_is_state = True
-                continue
-
-            if next_is_state:
-                lines_to_save = [role for role in line.split() if "log" not in role and role != "(" and role != ")"]
-                if lines_to_save != current_state:
-                    result += (f"State: {lines_to_save}" + "\n")
-                    current_state = lines_to_save
-                next_is_state = False
-            
-            transition_match = transition_pattern.search(line)
-            if transition_match != None:
-                next_is_transition = True
-                continue
-            
-            if next_is_transition:
-                propagation_match = propagation_pattern.search(line)
-                role_transition_match = role_transition_pattern.search(line)
-                transition = line.partition("{")[0]
-                if propagation_match != None:
-                    role = line.partition("_log")
-                    result += (f"Role {role[0]}({role[2][1]}) propagated to all other roles\n")
-                if role_transition_match != None:
-                    grouped = role_transition_match.group()
-                    result += (f"Transition: {transition} {(grouped.partition("(")[2])[:-4]}\n")
-                next_is_transition = False
-
-            delay_match = delay_pattern.search(line)
-            if delay_match != None:
-                result += (delay_match.group() + "  ")
-
-            global_time_match = global_time_pattern.search(line)
-            if global_time_match != None and current_global_time != global_time_match.group():
-                current_global_time = global_time_match.group()
-                result += current_global_time + "\n"
-    
-    return result
-
-def verify_model(model_path: str, query_path: str, verifyta_path: str):
+def verify_model(model_path: str, query_path: str, verifyta_path: str, workers: int = 1, no_cache: bool = False, portfolio: List[str] = None,
+                 spool_folder: str = None, local_workers: int = 0, json_path: str = None, timer: StageTimer = None,
+                 spool_timeout: float = default_spool_timeout) -> List[VerificationResult]:
+    start_time = time.perf_counter()
     verifyta_path = get_verifyta_path(verifyta_path)
-    
-    queries = get_lines_in_file(query_path)
-    if queries == None:
-        return
+    cache = get_result_cache(no_cache)
 
-    for i in range(len(queries)):
-        print(f"Verifying query {i}: {queries[i]}")
-        filtered_output = verify_query(model_path, query_path, verifyta_path, i)
-        print(filtered_output)
+    with timed(timer, "read_queries"):
+        queries = get_lines_in_file(query_path)
+    if queries == None:
+        return []
+
+    with timed(timer, "verify"):
+        records = verify_queries(model_path, query_path, queries, verifyta_path, workers, cache, no_cache, portfolio, spool_folder, local_workers,
+                                 spool_timeout)
+
+    write_records(records, json_path)
+    record_run_history("verify", model_path, records, time.perf_counter() - start_time, timer)
+    return records
+
+def verify_queries(model_path: str, query_path: str, queries: List[str], verifyta_path: str, workers: int, cache: ResultCache, no_cache: bool,
+                   portfolio: List[str], spool_folder: str, local_workers: int, spool_timeout: float = default_spool_timeout) -> List[VerificationResult]:
+    records = []
+    workers = get_worker_amount(workers)
+    if spool_folder != None:
+        records = verify_model_spool(model_path, queries, verifyta_path, spool_folder, local_workers, no_cache, spool_timeout)
+    elif portfolio != None:
+        # Each query races all chosen strategies, so the queries themselves are verified one at a time
+        strategies = get_strategies(portfolio)
+        print(f"Racing strategies: {", ".join(strategies.keys())}")
+        for i in range(len(queries)):
+            print(f"Verifying query {i}: {queries[i]}")
+            result = run_query_portfolio(model_path, query_path, verifyta_path, i, cache, strategies)
+            print(result.output)
+            records.append(result)
+    elif workers == 1:
+        for i in range(len(queries)):
+            print(f"Verifying query {i}: {queries[i]}")
+            result = run_query(model_path, query_path, verifyta_path, i, cache=cache)
+            print(result.output)
+            records.append(result)
+    else:
+        # Results are yielded in query order so output is identical to the sequential run
+        print(f"Verifying {len(queries)} queries using {workers} workers")
+        results = verify_queries_parallel(model_path, query_path, verifyta_path, list(range(len(queries))), workers, cache)
+        for i, (captured, result) in enumerate(results):
+            print(f"Verifying query {i}: {queries[i]}")
+            print(captured, end="")
+            print(result.output)
+            records.append(result)
+    return records
+
+# Jobs are written to a shared spool folder and verified by workers on any machine with access to it
+def verify_model_spool(model_path: str, queries: List[str], verifyta_path: str, spool_folder: str, local_workers: int, no_cache: bool,
+                       timeout: float = default_spool_timeout) -> List[VerificationResult]:
+    queries = [query for query in queries if query.strip()]
+    try:
+        spool = Spool(spool_folder)
+        # Claims left by workers that died are queued again, otherwise submit would skip them and they never finish
+        spool.requeue_stale(default_stale_after)
+        job_ids = spool.submit(model_path, queries)
+    except OSError as e:
+        print(f"Could not submit jobs to spool at {spool_folder}: {e}")
+        return []
+
+    processes = []
+    if local_workers > 0:
+        processes = start_local_workers(spool_folder, verifyta_path, local_workers, no_cache)
+        print(f"Verifying {len(queries)} queries using {local_workers} local workers")
+    else:
+        print(f"Submitted {len(queries)} queries to {spool_folder}, waiting for workers")
 
-def verify_query(model_path, query_path, verifyta_path, index):
-    command = [verifyta_path, model_path, query_path, "--query-index", f"{index}","--diagnostic", "0"]
-    file_path = os.path.join(base_path, state_path[:-11], "trace.txt")
+    # Local workers stop once the queue is empty, so results still missing then are left to other workers
+    for process in processes:
+        process.wait()
+    results = spool.wait(job_ids, timeout=timeout, stale_after=default_stale_after)
 
-        # Run the command and write the output directly to the file
-    with open(file_path, "w") as file:
-        subprocess.run(command, stdout=file, stderr=subprocess.STDOUT, text=True)
-        
-        # We must filter the output file into a format that the user can understand
-    filtered_output = filter_output(file_path)
-    return filtered_output
+    records = []
+    for i, result in enumerate(results):
+        print(f"Verifying query {i}: {queries[i]}")
+        if result == None:
+            print(f"No result within {timeout} seconds, the query is left in the spool")
+            records.append(VerificationResult(queries[i].strip(), VERDICT_ERROR))
+            continue
+        print(result["output"], end="")
+        print(result["result"])
+        records.append(VerificationResult.from_dict(result["record"]))
+    return records
+
+# Records are written as one JSON object per line, "-" prints them instead of writing a file
+def write_records(records: List[VerificationResult], json_path: str):
+    if json_path == None:
+        return
+    lines = [json.dumps(record.to_dict()) for record in records]
+    if json_path == "-":
+        for line in lines:
+            print(line)
+        return
+    try:
+        with open(json_path, 'w') as file:
+            for line in lines:
+                file.write(line + "\n")
+    except OSError as e:
+        print(f"Could not write records to {json_path}: {e}")
 
 # Checks correct format of given information.
 def parse_json_dict(key, json_input: str):
@@ -423,101 +809,231 @@ def parse_json_dict(key, json_input: str):
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON input. {e}")
 
-def auto_verify_model(model_path: str, base_folder_path: str, type: str, verifyta_path: str):
+def auto_verify_model(model_path: str, base_folder_path: str, type: str, verifyta_path: str, workers: int = 1, no_cache: bool = False,
+                      json_path: str = None, skip_well_formedness: bool = False, timer: StageTimer = None) -> List[VerificationResult]:
+    start_time = time.perf_counter()
     verifyta_path = get_verifyta_path(verifyta_path)
+    cache = get_result_cache(no_cache)
 
     try:
-        projection_json_files, protocol_json_file, _ = identify_json_files(base_folder_path)
-        query_generator = QueryGenerator(protocol_json_file, projection_json_files)
+        with timed(timer, "identify_json_files"):
+            projection_json_files, protocol_json_file, _ = identify_json_files(base_folder_path)
+        with timed(timer, "generate_queries"):
+            query_generator = QueryGenerator(protocol_json_file, projection_json_files)
     except Exception as e:
         print(f"Failed with exception: {e}")
-        return
-    
-    query_path = os.path.join(base_path, autoQuery_path)
+        return []
+
+    if not skip_well_formedness:
+        with timed(timer, "well_formedness"):
+            well_formed = check_well_formedness(query_generator.protocol_data, query_generator.projection_data)
+        if not well_formed:
+            return []
+
+    with timed(timer, "verify"):
+        records = auto_verify_queries(model_path, query_generator, type, verifyta_path, workers, cache)
+
+    write_records(records, json_path)
+    record_run_history(f"autoVerify {type}", model_path, records, time.perf_counter() - start_time, timer)
+    return records
+
+# Time bounds of every location of a role, locations ruled out before verifying and those verifyta could not reach are unreachable
+def get_location_bounds(queries: List[str], results: List[VerificationResult], unreachable_locations: Set[str]) -> Dict[str, str]:
+    location_bounds_dict = {location: "Unreachable" for location in unreachable_locations}
+    for query, result in zip(queries, results):
+        match_query = re.search(r"\.(l\d+)", query)
+        if match_query:
+            if not result.satisfied or result.time_bounds == None:
+                location_bounds_dict[match_query.group(1)] = "Unreachable"
+            else:
+                location_bounds_dict[match_query.group(1)] = result.time_bounds
+    return location_bounds_dict
 
+def auto_verify_queries(model_path: str, query_generator: QueryGenerator, type: str, verifyta_path: str, workers: int,
+                        cache: ResultCache) -> List[VerificationResult]:
+    records = []
     if (type == str_validity):
         validity_query = query_generator.generate_end_state_query()
 
-        # Write to local query file
-        with open(query_path, 'w') as file:
-            file.write(validity_query)
-
-        queries = get_lines_in_file(query_path)
-        print(f"Verifying query {0}: {queries[0]}")
-        print(verify_query(model_path, query_path, verifyta_path, 0))
+        print(f"Verifying query {0}: {validity_query}")
+        records = run_queries_batch(model_path, [validity_query], verifyta_path, cache)
+        print(records[0].output)
     elif (type == str_sizebound):
+        # Both are verified in one run, the size bound is only used if the model did not overflow
         overflow_query = query_generator.generate_overflow_query()
-        # Write to local query file
-        with open(query_path, 'w') as file:
-            file.write(overflow_query)
+        size_bound_query = query_generator.generate_sizebound_query()
 
-        result = verify_query(model_path, query_path, verifyta_path, 0)
-        if "Query was satisfied" in result:
+        records = run_queries_batch(model_path, [overflow_query, size_bound_query], verifyta_path, cache, show_traces=False)
+        if records[0].satisfied:
             print("Model did not overflow finding smallest possible log size")
-            size_bound_query = query_generator.generate_sizebound_query()
-
-            with open(query_path, 'w') as file:
-                file.write(size_bound_query)
-
-            result = verify_query(model_path, query_path, verifyta_path, 0)
-            match = re.search(r"Result:\s*(\d+)", result)
-            if match:
-                print(f"Recommended log size: {int(match.group(1)) + 1}")
+            if records[1].result_value != None:
+                print(f"Recommended log size: {records[1].result_value + 1}")
         else:
             print("Model overflow!! Cannot find optimal logsize")
             print("Set a larger logsize before trying again.")
 
     elif (type == str_eventualfidelity):
+        # All roles are verified in one run and the results are split by query index
         role_queries_dict = query_generator.generate_eventual_fidelity_queries()
+        roles = list(role_queries_dict.keys())
 
-        for role in role_queries_dict:
-            with open(query_path, 'w') as file:
-                file.write(role_queries_dict[role])
+        records = run_queries_batch(model_path, [role_queries_dict[role] for role in roles], verifyta_path, cache)
+        for role, result in zip(roles, records):
             print(f"Verifying query for {role}: {role_queries_dict[role]}")
-            print(verify_query(model_path, query_path, verifyta_path, 0)) 
-    
+            print(result.output)
+
     elif (type == str_timebound):
-        role_queries_dict = query_generator.generate_timebound_queries()
-        for role in role_queries_dict:
+        # Locations unreachable in the untimed projection are also unreachable in the timed model
+        role_unreachable_dict = query_generator.find_unreachable_locations()
+        role_queries_dict = query_generator.generate_timebound_queries(role_unreachable_dict)
+        roles = list(role_queries_dict.keys())
+
+        # One verifyta run per role, the roles are verified in parallel
+        jobs = [BatchJob(model_path, role_queries_dict[role], verifyta_path, cache, show_traces=False) for role in roles]
+        role_bounds_dict = {}
+        for role, (captured, results) in zip(roles, verify_batches_parallel(jobs, get_worker_amount(workers))):
+            print(captured, end="")
+            records.extend(results)
+            if any(result.verdict == VERDICT_ERROR for result in results):
+                return records
+
+            role_bounds_dict[role] = get_location_bounds(role_queries_dict[role], results, role_unreachable_dict[role])
+
+        for role in roles:
             print(f"{role} has the following time bounds")
-            for query in role_queries_dict[role]:
-                with open(query_path, 'w') as file:
-                    file.write(query)
-
-                result = verify_query(model_path, query_path, verifyta_path, 0)
-                if len(result) == 0: # Error encountered
-                    return
+            for location in sorted(role_bounds_dict[role]):
+                print (f"Location {location}: {role_bounds_dict[role][location]}")
 
-                match_query = re.search(r"\.(l\d+)", query)
-                if match_query:
-                    if "Query not satisfied" in result:
-                        print (f"Location {match_query.group(1)}: Unreachable")
-                    else:
-                        result = result.replace("âˆž)", "INF]")
-                        print (f"Location {match_query.group(1)}: {result.split(": ")[1]}")
-        
         print ("---------------------------")
+    return records
+
+# The protocol is read from the folder the model was built from, its settings from the model itself
+def get_log_checker(model_path: str, path_to_folder: List[str]) -> LogConformanceChecker:
+    if path_to_folder == None:
+        state_data = get_state_data("")
+        if state_data == None or "base_path" not in state_data:
+            return None
+        path_to_files = state_data["base_path"]
+    else:
+        path_to_files = " ".join(path_to_folder)
+
+    try:
+        with capture_output(io.StringIO()):
+            json_data = load_json_transfers(path_to_files)
+        if json_data == None:
+            print(f"No protocol found at {path_to_files} so logs are not pre-filtered")
+            return None
+        global_json_transfer, json_transfers, _ = json_data
+        checker = LogConformanceChecker(global_json_transfer, json_transfers, read_model_settings(model_path))
+        # A protocol of another model would reject valid logs, verifyta decides instead
+        missing_events = checker.event_names - read_model_event_names(model_path)
+        if len(missing_events) > 0:
+            print(f"The protocol at {path_to_files} does not belong to the model, {', '.join(sorted(missing_events))} missing, so logs are not pre-filtered")
+            return None
+        return checker
+    except Exception as e:
+        print(f"Logs are not pre-filtered as the protocol could not be read: {e}")
+        return None
 
-def verify_log(model_path: str, log_path: str, verifyta_path: str, valid_only: bool):
+def verify_log(model_path: str, log_path: str, verifyta_path: str, valid_only: bool, no_cache: bool = False, json_path: str = None,
+               batch: bool = False, workers: int = 1, batch_size: int = default_batch_size, path_to_folder: List[str] = None,
+               no_prefilter: bool = False, timer: StageTimer = None) -> List[VerificationResult]:
     if valid_only == None:
         valid_only = False
 
+    start_time = time.perf_counter()
     verifyta_path = get_verifyta_path(verifyta_path)
-    
+    cache = get_result_cache(no_cache)
+    with timed(timer, "load_prefilter"):
+        checker = None if no_prefilter else get_log_checker(model_path, path_to_folder)
+
+    if batch:
+        records = verify_logs(model_path, log_path, verifyta_path, valid_only, cache, json_path, workers, batch_size, checker, timer)
+        record_run_history("verifyLog", model_path, records, time.perf_counter() - start_time, timer)
+        return records
+
     log_line = get_lines_in_file(log_path)
     log_list = [event.strip() for event in log_line[0].split(",") if event.strip()]
 
-    query_path = os.path.join(base_path, autoQuery_path)
     query_to_verify = generate_log_query(log_list, valid_only)
 
     print(f"Verifying query: {query_to_verify}")
 
-    with open(query_path, 'w') as file:
-        file.write(query_to_verify)
+    # Logs that certainly cannot occur are answered without running verifyta
+    with timed(timer, "prefilter"):
+        reason = checker.check(log_list, valid_only) if checker != None else None
+    if reason != None:
+        result = create_rejected_result(log_list, valid_only, reason)
+        print(result.output)
+        write_records([result], json_path)
+        record_run_history("verifyLog", model_path, [result], time.perf_counter() - start_time, timer)
+        return [result]
+
+    # Every call has its own query file as the daemon verifies several logs at the same time
+    with tempfile.TemporaryDirectory(prefix="log_", dir=work_folder_path) as work_folder:
+        query_path = os.path.join(work_folder, "query.txt")
+        with open(query_path, 'w') as file:
+            file.write(query_to_verify)
+
+        with timed(timer, "verify"):
+            result = run_query(model_path, query_path, verifyta_path, 0, cache=cache)
+    print(result.output)
+
+    write_records([result], json_path)
+    record_run_history("verifyLog", model_path, [result], time.perf_counter() - start_time, timer)
+    return [result]
+
+# Every line of the log file is a log, one verdict is printed per line
+def verify_logs(model_path: str, log_path: str, verifyta_path: str, valid_only: bool, cache: ResultCache, json_path: str, workers: int, batch_size: int,
+                checker: LogConformanceChecker = None, timer: StageTimer = None) -> List[VerificationResult]:
+    try:
+        with timed(timer, "read_logs"):
+            logs = read_logs(log_path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not read logs from {log_path}: {e}")
+        return []
+
+    stats = LogBatchStats()
+    with timed(timer, "verify"):
+        results = verify_logs_batch(model_path, logs, verifyta_path, valid_only, cache, get_worker_amount(workers), batch_size, stats, checker)
+
+    records = []
+    for i, result in enumerate(results):
+        if result == None:
+            print(f"Log {i}: empty")
+            continue
+        print(f"Log {i}: {result.verdict}")
+        records.append(result)
+    print(f"Verified {stats.logs} logs ({stats.unique_logs} unique) using {stats.queries} queries in {stats.rounds} rounds, "
+          f"{stats.rejected} rejected by the pre-filter and {stats.pruned} settled by an unreachable prefix")
+
+    write_records(records, json_path)
+    return records
+
+def tune_model(model_path: str, query_path: str, verifyta_path: str, timeout: float = None):
+    verifyta_path = get_verifyta_path(verifyta_path)
+
+    if get_lines_in_file(query_path) == None:
+        return
+
+    print(f"Trying {len(get_option_combinations())} combinations of verifyta options")
+    try:
+        results = tune(model_path, query_path, verifyta_path, timeout=timeout)
+    except OSError as e:
+        print(f"Failed to run verifyta: {e}")
+        return
+
+    for result in results:
+        print(format_result(result))
 
-    filtered_output = verify_query(model_path, query_path, verifyta_path, 0)
-    print(filtered_output)
+    best = get_best_result(results)
+    if best == None:
+        print("No combination of options verified all queries, profile not saved")
+        return
 
+    save_profile(model_path, query_path, verifyta_path, best, results)
+    print(f"Best options: {" ".join(best.options)}")
+    print("Profile saved and will be used by verify, autoVerify and verifyLog for this model")
 
 # For parsing booleans from strings
 def str2bool(value: str) -> bool:
@@ -559,6 +1075,54 @@ def set_arguments(args):
         args.role_amount = " ".join(args.role_amount)
         parse_json_dict("role_amount", args.role_amount)
 
+    if args.cache_max_size != None:
+        update_local_state("cache_max_size", args.cache_max_size)
+
+# Timings and profiles are available for the commands that build or verify a model
+def add_timing_arguments(subparser):
+    subparser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long every stage took",
+        required=False
+    )
+
+    subparser.add_argument(
+        "--profile",
+        type=str,
+        nargs='+',
+        help="Folder a cProfile dump of every stage is written to, readable with pstats",
+        required=False
+    )
+
+    subparser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="With --profile, also write a tracemalloc snapshot at the end of every stage",
+        required=False
+    )
+
+# A timer if timings or profiles were asked for
+def start_timer(args) -> Optional[StageTimer]:
+    if not args.timings and args.profile == None:
+        return None
+    timer = StageTimer(" ".join(args.profile) if args.profile != None else None, args.snapshots)
+    timer.start()
+    return timer
+
+def finish_timer(args, timer: StageTimer):
+    if timer == None:
+        return
+    timer.stop()
+    if args.timings:
+        print(format_timings(timer))
+    if timer.profile_folder != None:
+        try:
+            file_paths = timer.write_profiles()
+            print(f"Wrote {len(file_paths)} profiles and {len(timer.snapshot_paths)} snapshots to {timer.profile_folder}")
+        except OSError as e:
+            print(f"Could not write profiles: {e}")
+
 def create_parser():
     parser = argparse.ArgumentParser(description="Model cheking swarm protocols CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -580,7 +1144,23 @@ def create_parser():
         required=False
     )
 
+    build_parser.add_argument(
+        "--skip-well-formedness",
+        action="store_true",
+        help="Build the model even if the protocol is not well-formed",
+        required=False
+    )
+
+    build_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Build without laying out the templates for the UPPAAL GUI, locations are placed on a grid instead",
+        required=False
+    )
+
     # For setting arguments for the model
+    add_timing_arguments(build_parser)
+
     argument_parser = subparsers.add_parser("setArgs", help="Set the arguments for the build")
     argument_parser.add_argument(
         "-vp", "--verifyta-path",
@@ -646,6 +1226,13 @@ def create_parser():
         required=False
     )
 
+    argument_parser.add_argument(
+        "-cms", "--cache-max-size",
+        type=int,
+        help=f"Maximum size in MB of the verification result cache. Default is {default_max_size_mb}",
+        required=False
+    )
+
     subparsers.add_parser("showArgs", help="Displays the current settings for the model")
 
     load_state_parser = subparsers.add_parser("loadState", help="Load state from path, overwriting internal state file")
@@ -687,6 +1274,63 @@ def create_parser():
         required=False
     )
 
+    verify_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Amount of queries verified in parallel. 0 uses all CPU cores. Default is 1",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--portfolio",
+        type=str,
+        nargs='*',
+        choices=list(portfolio_strategies.keys()),
+        help="Race several search strategies per query and keep the first conclusive answer. All strategies are used if none are given",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--spool",
+        type=str,
+        nargs='+',
+        help="Path to a shared folder, the queries are verified by workers started with \"python Spool.py worker\"",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help="Amount of workers started on this machine when using --spool. Default is 0",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--spool-timeout",
+        type=float,
+        default=default_spool_timeout,
+        help=f"Seconds to wait for the results of the spool, queries without a result are reported as errors. Default is {default_spool_timeout}",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--json",
+        type=str,
+        help="Path to write a JSON record per verified query to, one per line. \"-\" prints them instead",
+        required=False
+    )
+
+    verify_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run verifyta instead of reusing cached results",
+        required=False
+    )
+
+    add_timing_arguments(verify_parser)
+
     auto_verify_parser = subparsers.add_parser("autoVerify", help="Verifies a given model using automatically generated queries")
     auto_verify_parser.add_argument(
         "model_path",
@@ -711,7 +1355,7 @@ def create_parser():
     - {str_validity}: (Defualt). Ensures all roles reach an endstate eventually. 
     - {str_sizebound}: Returns the smalles log size that does not cause overflow.
     - {str_eventualfidelity}: Returns wether or not eventual fidelity holds for all roles of the gives model.
-    - {str_timebound}: Returns the global time reachable for all locations of all roles (Warning SLOW) (ONLY WORKS WITH UPPAAL 5.1.0-beta)"""
+    - {str_timebound}: Returns the global time reachable for all locations of all roles, roles are verified in parallel with -w (Warning SLOW) (ONLY WORKS WITH UPPAAL 5.1.0-beta)"""
     )
 
     auto_verify_parser.add_argument(
@@ -722,6 +1366,37 @@ def create_parser():
         required=False
     )
 
+    auto_verify_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Amount of roles verified in parallel for timebound. 0 uses all CPU cores. Default is 1",
+        required=False
+    )
+
+    auto_verify_parser.add_argument(
+        "--json",
+        type=str,
+        help="Path to write a JSON record per verified query to, one per line. \"-\" prints them instead",
+        required=False
+    )
+
+    auto_verify_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run verifyta instead of reusing cached results",
+        required=False
+    )
+
+    auto_verify_parser.add_argument(
+        "--skip-well-formedness",
+        action="store_true",
+        help="Verify the model even if the protocol is not well-formed",
+        required=False
+    )
+
+    add_timing_arguments(auto_verify_parser)
+
     verify_log_parser = subparsers.add_parser("verifyLog", help="Verifies if a given global can exists in the model")
     verify_log_parser.add_argument(
         "model_path",
@@ -752,26 +1427,594 @@ def create_parser():
         required=False
     )
 
-    subparsers.add_parser("q", help="Quit the CLI.") 
-
-    return parser
+    verify_log_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Treat every line of the log file as a log, either comma(,) seperated or a JSON list, and verify them all",
+        required=False
+    )
 
-def main():
-    parser = create_parser()
+    verify_log_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Amount of verifyta runs in parallel when using --batch. 0 uses all CPU cores. Default is 1",
+        required=False
+    )
 
-    print("Welcome to the File Organizer CLI!")
-    print("Type '-h' for a list of commands or 'q' to quit.")
+    verify_log_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=default_batch_size,
+        help=f"Maximum amount of queries per verifyta run when using --batch. Default is {default_batch_size}",
+        required=False
+    )
 
-    while True:
-        user_input = input("\n> ").strip()
-        if not user_input:
-            continue
+    verify_log_parser.add_argument(
+        "-pf", "--path-to-folder",
+        type=str,
+        nargs='+',
+        help="Path to the folder with the protocol the model was built from, used to reject impossible logs before verification. Default is the folder in the local settings",
+        required=False
+    )
+
+    verify_log_parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Give every log to verifyta without checking it against the protocol first",
+        required=False
+    )
+
+    verify_log_parser.add_argument(
+        "--json",
+        type=str,
+        help="Path to write a JSON record per verified query to, one per line. \"-\" prints them instead",
+        required=False
+    )
+
+    verify_log_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run verifyta instead of reusing cached results",
+        required=False
+    )
+
+    add_timing_arguments(verify_log_parser)
+
+    tune_parser = subparsers.add_parser("tune", help="Finds the fastest verifyta options for a model and saves them as a profile")
+    tune_parser.add_argument(
+        "model_path",
+        type=str,
+        nargs='+',
+        help="Path to the UPPAAL xml file"
+    )
+
+    tune_parser.add_argument(
+        "query_path",
+        type=str,
+        nargs='+',
+        help="Path to a txt file of representative newline seperated queries"
+    )
+
+    tune_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution if not specified local will be used ",
+        required=False
+    )
+
+    tune_parser.add_argument(
+        "-t", "--timeout",
+        type=float,
+        help="Seconds after which a single combination of options is stopped",
+        required=False
+    )
+
+    simulate_parser = subparsers.add_parser("simulate", help="Runs random executions of the swarm without building the model")
+    simulate_parser.add_argument(
+        "-pf", "--path-to-folder",
+        type=str,
+        nargs='+',
+        help="Path to folder containing the relevant json files. Default is currently saved",
+        required=False
+    )
+
+    simulate_parser.add_argument(
+        "-ps", "--path-to-state",
+        type=str,
+        nargs='+',
+        help="Path to json file containing state information. Default is currently saved",
+        required=False
+    )
+
+    simulate_parser.add_argument(
+        "-n", "--runs",
+        type=int,
+        default=1000,
+        help="Amount of executions to simulate, default is 1000",
+        required=False
+    )
+
+    simulate_parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed for the random choices so a simulation can be repeated",
+        required=False
+    )
+
+    simulate_parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=1000,
+        help="Steps after which an execution is stopped, default is 1000",
+        required=False
+    )
+
+    simulate_parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Amount of most common end states and logs to show, default is 5",
+        required=False
+    )
+
+    explore_parser = subparsers.add_parser("explore", help="Checks the end states, overflow, size bound and logs of an untimed model in Python")
+    explore_parser.add_argument(
+        "-pf", "--path-to-folder",
+        type=str,
+        nargs='+',
+        help="Path to folder containing the relevant json files. Default is currently saved",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "-ps", "--path-to-state",
+        type=str,
+        nargs='+',
+        help="Path to json file containing state information. Default is currently saved",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "-l", "--log-file-path",
+        type=str,
+        nargs='+',
+        help="Path to a file of logs to check, one per line",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "-vo", "--valid-only",
+        type=str2bool,
+        help="Wether or not to check the global log or only the parts that are valid events. Default is false",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "--dfs",
+        action="store_true",
+        help="Explore depth first instead of breadth first",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "--max-states",
+        type=int,
+        help="Stop exploring after this many states, queries that could not be answered are reported as errors",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution used for timed models if not specified local will be used ",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run verifyta instead of reusing cached results",
+        required=False
+    )
+
+    explore_parser.add_argument(
+        "--json",
+        type=str,
+        help="Path to write a JSON record per query to, one per line. \"-\" prints them instead",
+        required=False
+    )
+
+    reverify_parser = subparsers.add_parser("reverify", help="Builds a changed protocol and only verifies the queries affected by the change")
+    reverify_parser.add_argument(
+        "before_folder",
+        type=str,
+        nargs=1,
+        help="Path to folder containing the previously built and verified model"
+    )
+
+    reverify_parser.add_argument(
+        "after_folder",
+        type=str,
+        nargs=1,
+        help="Path to folder containing the changed json files, the new model is saved here"
+    )
+
+    reverify_parser.add_argument(
+        "query_path",
+        type=str,
+        nargs='+',
+        help="Path to the queries, one per line"
+    )
+
+    reverify_parser.add_argument(
+        "-ps", "--path-to-state",
+        type=str,
+        nargs='+',
+        help="Path to json file containing state information. Default is currently saved",
+        required=False
+    )
+
+    reverify_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution if not specified local will be used ",
+        required=False
+    )
+
+    reverify_parser.add_argument(
+        "--skip-well-formedness",
+        action="store_true",
+        help="Build the model even if the protocol is not well-formed",
+        required=False
+    )
+
+    reverify_parser.add_argument(
+        "--json",
+        type=str,
+        help="Path to write a JSON record per query to, one per line. \"-\" prints them instead",
+        required=False
+    )
+
+    sweep_parser = subparsers.add_parser("sweep", help="Builds and verifies a model for every combination of settings in a sweep file")
+    sweep_parser.add_argument(
+        "sweep_path",
+        type=str,
+        nargs=1,
+        help="Path to a json file with the settings to sweep over"
+    )
+
+    sweep_parser.add_argument(
+        "query_path",
+        type=str,
+        nargs='+',
+        help="Path to the queries verified for every variant, one per line"
+    )
+
+    sweep_parser.add_argument(
+        "-pf", "--path-to-folder",
+        type=str,
+        nargs='+',
+        help="Path to folder containing the relevant json files. Default is currently saved",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "-ps", "--path-to-state",
+        type=str,
+        nargs='+',
+        help="Path to json file containing state information the variants start from. Default is currently saved",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        nargs='+',
+        help="Folder the variants and results table are written to. Default is a sweep folder next to the json files",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution if not specified local will be used ",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=0,
+        help="Number of variants verified in parallel, 0 uses all CPU cores. Default is 0",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run verifyta instead of reusing cached results",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "--skip-well-formedness",
+        action="store_true",
+        help="Build the variants even if the protocol is not well-formed",
+        required=False
+    )
+
+    sweep_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Build the variants without laying out their templates",
+        required=False
+    )
+
+    search_delays_parser = subparsers.add_parser("searchDelays", help="Finds the most realistic delay and replica settings verified within a budget")
+    search_delays_parser.add_argument(
+        "query_path",
+        type=str,
+        nargs='+',
+        help="Path to the queries every configuration has to verify, one per line"
+    )
+
+    search_delays_parser.add_argument(
+        "-t", "--time-budget",
+        type=float,
+        help="Seconds each query may take",
+        required=True
+    )
+
+    search_delays_parser.add_argument(
+        "-m", "--memory-budget",
+        type=int,
+        help="Megabytes verifyta may use, not limited if not given",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "--delay-types",
+        type=str,
+        nargs='+',
+        choices=["E", "S"],
+        default=["E"],
+        help="Delay types to search, E counts all emitted events and S only those emitted by the role itself. Default is E",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "--max-delay",
+        type=int,
+        default=3,
+        help="Largest delay amount to try. Default is 3",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "--max-replicas",
+        type=int,
+        default=1,
+        help="Largest amount of instances of every role to try. Default is 1",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "-pf", "--path-to-folder",
+        type=str,
+        nargs='+',
+        help="Path to folder containing the relevant json files. Default is currently saved",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "-ps", "--path-to-state",
+        type=str,
+        nargs='+',
+        help="Path to json file containing state information the search starts from. Default is currently saved",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        nargs='+',
+        help="Folder the models and search results are written to. Default is a delay_search folder next to the json files",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution if not specified local will be used ",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "--skip-well-formedness",
+        action="store_true",
+        help="Search even if the protocol is not well-formed",
+        required=False
+    )
+
+    search_delays_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Build the models without laying out their templates",
+        required=False
+    )
+
+    generate_parser = subparsers.add_parser("generate", help="Generates a random well-formed protocol")
+    generate_parser.add_argument(
+        "output",
+        type=str,
+        nargs='+',
+        help="Folder the protocol is written to"
+    )
+
+    generate_parser.add_argument(
+        "-r", "--roles",
+        type=int,
+        default=3,
+        help="Amount of roles. Default is 3",
+        required=False
+    )
+
+    generate_parser.add_argument(
+        "-c", "--commands",
+        type=int,
+        default=10,
+        help="Amount of commands. Default is 10",
+        required=False
+    )
+
+    generate_parser.add_argument(
+        "--fanout",
+        type=int,
+        default=2,
+        help="Most alternatives of a branch, 1 means no branches. Default is 2",
+        required=False
+    )
+
+    generate_parser.add_argument(
+        "--loop-depth",
+        type=int,
+        default=1,
+        help="Most loops nested inside each other, 0 means no loops. Default is 1",
+        required=False
+    )
+
+    generate_parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed of the random numbers, the same seed gives the same protocol",
+        required=False
+    )
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Measures the build and verification stages on generated protocols of growing size")
+    benchmark_parser.add_argument(
+        "--tiers",
+        type=str,
+        nargs='+',
+        choices=[tier.name for tier in default_tiers],
+        help="Size tiers to run. Default is all",
+        required=False
+    )
+
+    benchmark_parser.add_argument(
+        "--seeds",
+        type=int,
+        default=3,
+        help="Protocols generated per tier, the median of each stage is reported. Default is 3",
+        required=False
+    )
+
+    benchmark_parser.add_argument(
+        "-o", "--output",
+        type=str,
+        nargs='+',
+        help="Path to json file the timings of every run are written to",
+        required=False
+    )
+
+    benchmark_parser.add_argument(
+        "--baseline",
+        type=str,
+        nargs='+',
+        help="Path to json file of an earlier run, stages of a tier that grew past the threshold are reported",
+        required=False
+    )
+
+    benchmark_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=default_threshold,
+        help="Allowed growth of a stage compared to the baseline, 0.25 is 25%%. Default is 0.25",
+        required=False
+    )
+
+    benchmark_parser.add_argument(
+        "-vp", "--verifyta-path",
+        type=str,
+        nargs='+',
+        help="Path to the verifyta distribution if not specified local will be used ",
+        required=False
+    )
+
+    history_parser = subparsers.add_parser("history", help="Shows earlier builds and verifications and how their times changed")
+    history_parser.add_argument(
+        "view",
+        type=str,
+        choices=["builds", "queries", "benchmarks", "trends"],
+        help="Builds, verified queries, stage times of benchmark runs, or queries that got slower, faster or changed verdict since a date"
+    )
+
+    history_parser.add_argument(
+        "-p", "--protocol",
+        type=str,
+        nargs='+',
+        help="Only runs of this protocol, the name of the folder the model was built in, or of this size tier for benchmarks",
+        required=False
+    )
+
+    history_parser.add_argument(
+        "-q", "--query",
+        type=str,
+        nargs='+',
+        help="Only queries containing this text",
+        required=False
+    )
+
+    history_parser.add_argument(
+        "--since",
+        type=str,
+        help="Date as YYYY-MM-DD or a number of days ago. For trends runs since are compared with runs before, default is 7 days",
+        required=False
+    )
+
+    history_parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Most builds, queries or benchmark stages shown. Default is 20",
+        required=False
+    )
+
+    history_parser.add_argument(
+        "--factor",
+        type=float,
+        default=2.0,
+        help="Smallest change of the wall time shown as a trend. Default is 2",
+        required=False
+    )
+
+    subparsers.add_parser("q", help="Quit the CLI.") 
+
+    return parser
+
+def main():
+    parser = create_parser()
+
+    print("Welcome to the File Organizer CLI!")
+    print("Type '-h' for a list of commands or 'q' to quit.")
+
+    while True:
+        user_input = input("\n> ").strip()
+        if not user_input:
+            continue
 
         try:
             # Parse the command line arguments
             args = parser.parse_args(user_input.split())
             if args.command == "build":
-                build_model(args)
+                timer = start_timer(args)
+                build_model(args, timer)
+                finish_timer(args, timer)
             elif args.command == "setArgs":
                 set_arguments(args)
             elif args.command == "showArgs":
@@ -786,15 +2029,45 @@ def main():
             elif args.command == "verify":
                 model_path = " ".join(args.model_path)
                 query_path = " ".join(args.query_path)
-                verify_model(model_path, query_path, args.verifyta_path)
+                spool_folder = " ".join(args.spool) if args.spool != None else None
+                timer = start_timer(args)
+                verify_model(model_path, query_path, args.verifyta_path, args.workers, args.no_cache, args.portfolio, spool_folder, args.local_workers, args.json,
+                             timer, args.spool_timeout)
+                finish_timer(args, timer)
             elif args.command == "autoVerify":
                 model_path = " ".join(args.model_path)
                 base_path = " ".join(args.base_path)
-                auto_verify_model(model_path, base_path, args.type, args.verifyta_path)
+                timer = start_timer(args)
+                auto_verify_model(model_path, base_path, args.type, args.verifyta_path, args.workers, args.no_cache, args.json,
+                                  args.skip_well_formedness, timer)
+                finish_timer(args, timer)
             elif args.command == "verifyLog":
                 model_path = " ".join(args.model_path)
                 log_path = " ".join(args.log_file_path)
-                verify_log(model_path, log_path, args.verifyta_path, args.valid_only)
+                timer = start_timer(args)
+                verify_log(model_path, log_path, args.verifyta_path, args.valid_only, args.no_cache, args.json, args.batch, args.workers, args.batch_size,
+                           args.path_to_folder, args.no_prefilter, timer)
+                finish_timer(args, timer)
+            elif args.command == "tune":
+                model_path = " ".join(args.model_path)
+                query_path = " ".join(args.query_path)
+                tune_model(model_path, query_path, args.verifyta_path, args.timeout)
+            elif args.command == "simulate":
+                simulate_model(args)
+            elif args.command == "explore":
+                explore_model(args)
+            elif args.command == "reverify":
+                reverify_model(args)
+            elif args.command == "sweep":
+                sweep_model(args)
+            elif args.command == "searchDelays":
+                search_delays(args)
+            elif args.command == "generate":
+                generate_protocol_file(args)
+            elif args.command == "benchmark":
+                run_benchmark(args)
+            elif args.command == "history":
+                show_history(args)
             elif args.command == "q":
                 print("Goodbye!")
                 break
@@ -0,0 +1,459 @@
+"""\
+Long running verification daemon with a local HTTP job API.
+Parsed protocols, built models and verification results are kept in memory between jobs,
+so a pipeline submitting many small jobs only pays for starting Python once.
+Jobs are run by a bounded pool of worker threads, highest priority first, and can be cancelled
+while queued or running, in which case the verifyta process of the job is killed.
+
+Start with "python Daemon.py --port 8765" and submit jobs as JSON with the token the daemon writes to
+PermanentState/daemon_token in an "Authorization: Bearer <token>" header:
+    POST   /jobs            {"type": "verify", "model_path": ..., "queries": [...], "priority": 1}
+    GET    /jobs            summary of all jobs
+    GET    /jobs/<id>       a job with its results and output, "?wait=<seconds>" blocks until it is done
+    DELETE /jobs/<id>       cancels a job
+    GET    /stats           queue and cache statistics
+
+Paths given in jobs have to be inside the folders the daemon serves ("--root", the working directory by default) and
+verifyta is always the one given to the daemon or set in its state, never one named by a job. Finished jobs are
+forgotten after an hour and only the most recently used protocols and models are kept.
+
+"""
+
+import argparse
+import copy
+import hmac
+import io
+import itertools
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import CLI
+from ModelBuilder import createModel
+from WellFormedness import WellFormednessAnalyser
+from ResultCache import MemoryResultCache, cache_folder_path, default_max_size_mb
+from Verifier import CancelToken, ThreadLocalOutput, VerificationCancelled, get_worker_amount, run_queries_batch, set_cancel_token
+
+job_types = ["build", "verify", "autoVerify", "verifyLog"]
+path_params = ["folder", "state_path", "model_path", "query_path", "log_path"] # Checked against the roots of the daemon
+default_token_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PermanentState", "daemon_token")
+default_max_stored = 64 # Protocols and models kept in memory
+default_job_ttl = 3600 # Seconds a finished job is kept
+default_max_finished = 1000 # Finished jobs kept
+
+@dataclass
+class Job:
+    id: int
+    type: str
+    params: Dict[str, Any]
+    priority: int = 0
+    status: str = "queued" # queued, running, done, failed or cancelled
+    results: Optional[List[Dict[str, Any]]] = None
+    output: str = ""
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    token: CancelToken = field(default_factory=CancelToken)
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self, include_output: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "type": self.type,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error
+        }
+        if include_output:
+            data["params"] = self.params
+            data["results"] = self.results
+            data["output"] = self.output
+        return data
+
+def get_folder_signature(folder_path: str) -> Tuple:
+    signature = []
+    for file_name in sorted(os.listdir(folder_path)):
+        if file_name.endswith(".json"):
+            stat = os.stat(os.path.join(folder_path, file_name))
+            signature.append((file_name, stat.st_mtime_ns, stat.st_size))
+    return (os.path.abspath(folder_path), tuple(signature))
+
+class VerificationService:
+    def __init__(self, max_size_mb: int = default_max_size_mb, verifyta_path: str = None, roots: List[str] = None,
+                 cache_folder: str = cache_folder_path, max_stored: int = default_max_stored):
+        self.result_cache = MemoryResultCache(cache_folder, max_size_mb)
+        self.verifyta_path = verifyta_path # None uses the one in the state
+        self.roots = [os.path.realpath(root) for root in (roots if roots != None else [os.getcwd()])]
+        self.max_stored = max_stored
+        self.protocols: Dict[Tuple, Any] = {} # Folder signature to parsed json transfers
+        self.models: Dict[Tuple, str] = {} # Folder signature, settings and layout to the xml of the model
+        self.lock = threading.Lock()
+        CLI.shared_result_cache = self.result_cache
+
+    # Jobs may only read and write inside the roots, whatever path they are given
+    def check_path(self, path: str):
+        real_path = os.path.realpath(path)
+        if not any(os.path.commonpath([real_path, root]) == root for root in self.roots):
+            raise PermissionError(f"{path} is outside the folders served by the daemon")
+
+    def check_params(self, params: Dict[str, Any]):
+        for name in path_params:
+            if params.get(name) not in [None, ""]:
+                self.check_path(str(params[name]))
+
+    def get_stored(self, store: Dict, key: Tuple) -> Any:
+        with self.lock:
+            value = store.pop(key, None)
+            if value != None:
+                store[key] = value # Marks it as recently used
+        return value
+
+    def remember(self, store: Dict, key: Tuple, value: Any):
+        with self.lock:
+            store.pop(key, None)
+            store[key] = value
+            while len(store) > self.max_stored:
+                del store[next(iter(store))] # Dictionaries keep insertion order so this is the oldest
+
+    def get_verifyta_path(self) -> Optional[List[str]]:
+        return get_path_list(self.verifyta_path)
+
+    def get_json_transfers(self, folder_path: str):
+        signature = get_folder_signature(folder_path)
+        json_data = self.get_stored(self.protocols, signature)
+        if json_data == None:
+            json_data = CLI.load_json_transfers(folder_path)
+            if json_data == None:
+                return None
+            self.remember(self.protocols, signature, json_data)
+        # Building the model changes the transfers so every build gets its own copy
+        return copy.deepcopy(json_data)
+
+    def build(self, job: Job):
+        self.check_params(job.params)
+        state_data = CLI.get_state_data("", job.params.get("state_path", ""))
+        state_data = CLI.check_state_data(state_data)
+        if state_data == None:
+            raise ValueError("Invalid state")
+
+        folder_path = job.params.get("folder", state_data["base_path"])
+        self.check_path(folder_path)
+        headless = job.params.get("headless", False)
+        model_key = (get_folder_signature(folder_path), json.dumps(state_data, sort_keys=True), headless)
+        xml_data = self.get_stored(self.models, model_key)
+
+        if xml_data == None:
+            json_data = self.get_json_transfers(folder_path)
+            if json_data == None:
+                raise ValueError(f"No protocol found in {folder_path}")
+            global_json_transfer, json_transfers, time_transfer = json_data
+            if not job.params.get("skip_well_formedness", False):
+                violations = WellFormednessAnalyser(global_json_transfer, json_transfers).analyse()
+                if len(violations) != 0:
+                    raise ValueError(f"Protocol is not well-formed: {'; '.join(violations)}")
+
+            model_settings = CLI.load_state_into_model_settings(state_data)
+            if time_transfer != None:
+                model_settings.time_json_transfer = time_transfer
+            xml_data = createModel(json_transfers, global_json_transfer, model_settings, headless=headless).to_xml()
+            self.remember(self.models, model_key, xml_data)
+        else:
+            print("Model unchanged since last build")
+
+        CLI.save_xml_to_file(xml_data, "uppaal_model", folder_path)
+        job.results = [{"model_path": f"{folder_path}/uppaal_model.xml"}]
+
+    def verify(self, job: Job):
+        self.check_params(job.params)
+        queries = job.params.get("queries")
+        if queries == None:
+            queries = CLI.get_lines_in_file(job.params["query_path"])
+            if queries == None:
+                raise ValueError("Query file could not be read")
+        queries = [query for query in queries if query.strip()]
+
+        verifyta_path = CLI.get_verifyta_path(self.get_verifyta_path())
+        cache = CLI.get_result_cache(job.params.get("no_cache", False))
+        results = run_queries_batch(job.params["model_path"], queries, verifyta_path, cache)
+        job.results = [result.to_dict() for result in results]
+
+    def auto_verify(self, job: Job):
+        self.check_params(job.params)
+        results = CLI.auto_verify_model(job.params["model_path"], job.params["folder"], job.params.get("auto_type", CLI.str_validity),
+                                        self.get_verifyta_path(), 1, job.params.get("no_cache", False),
+                                        skip_well_formedness=job.params.get("skip_well_formedness", False))
+        job.results = [result.to_dict() for result in results]
+
+    def verify_log(self, job: Job):
+        self.check_params(job.params)
+        results = CLI.verify_log(job.params["model_path"], job.params["log_path"], self.get_verifyta_path(),
+                                 job.params.get("valid_only", False), job.params.get("no_cache", False),
+                                 path_to_folder=get_path_list(job.params.get("folder")))
+        job.results = [result.to_dict() for result in results]
+
+    def get_handler(self, job_type: str) -> Callable[[Job], None]:
+        return {
+            "build": self.build,
+            "verify": self.verify,
+            "autoVerify": self.auto_verify,
+            "verifyLog": self.verify_log
+        }[job_type]
+
+def get_path_list(path: Optional[str]) -> Optional[List[str]]:
+    # The CLI receives paths split on spaces
+    if path == None:
+        return None
+    return [path]
+
+class JobScheduler:
+    def __init__(self, service: VerificationService, workers: int = 1, max_queued: int = 1000, output: ThreadLocalOutput = None,
+                 job_ttl: float = default_job_ttl, max_finished: int = default_max_finished):
+        self.service = service
+        self.max_queued = max_queued
+        self.output = output
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self.jobs: Dict[int, Job] = {}
+        self.queue = queue.PriorityQueue()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(get_worker_amount(workers))]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, job_type: str, params: Dict[str, Any], priority: int = 0) -> Job:
+        if job_type not in job_types:
+            raise ValueError(f"Unknown job type {job_type}, expected one of {job_types}")
+        if self.queue.qsize() >= self.max_queued:
+            raise OverflowError("Too many queued jobs")
+
+        with self.lock:
+            self.expire_jobs()
+            job = Job(next(self.ids), job_type, params, priority)
+            self.jobs[job.id] = job
+        # Highest priority first, jobs of the same priority in the order they were submitted
+        self.queue.put((-priority, job.id))
+        return job
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job == None:
+            return None
+        with self.lock:
+            if job.status == "queued":
+                self.finish(job, "cancelled")
+            elif job.status == "running":
+                job.token.cancel()
+        return job
+
+    # Forgets jobs finished longer than job_ttl ago and the oldest finished jobs past max_finished, called with the lock held
+    def expire_jobs(self):
+        finished = sorted((job for job in self.jobs.values() if job.finished != None), key=lambda job: job.finished)
+        keep_from = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < keep_from or time.time() - job.finished > self.job_ttl:
+                del self.jobs[job.id]
+
+    def finish(self, job: Job, status: str):
+        job.status = status
+        job.finished = time.time()
+        job.done.set()
+
+    def work(self):
+        while True:
+            _, job_id = self.queue.get()
+            if job_id == 0: # Job ids start at 1 so this is the signal to stop
+                break
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job == None or job.status != "queued": # Cancelled and possibly already forgotten
+                    continue
+                job.status = "running"
+                job.started = time.time()
+
+            buffer = io.StringIO()
+            if self.output != None:
+                self.output.set_buffer(buffer)
+            set_cancel_token(job.token)
+            status = "done"
+            try:
+                self.service.get_handler(job.type)(job)
+            except VerificationCancelled:
+                pass
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                status = "failed"
+            finally:
+                set_cancel_token(None)
+                if self.output != None:
+                    self.output.set_buffer(None)
+
+            job.output = buffer.getvalue()
+            with self.lock:
+                self.finish(job, "cancelled" if job.token.cancelled else status)
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.queue.put((sys.maxsize, 0))
+        for worker in self.workers:
+            worker.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses = {}
+        for job in list(self.jobs.values()):
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": len(self.workers),
+            "jobs": statuses,
+            "cached_protocols": len(self.service.protocols),
+            "cached_models": len(self.service.models),
+            "cached_results": len(self.service.result_cache.entries),
+            "result_cache_hits": self.service.result_cache.hits,
+            "result_cache_misses": self.service.result_cache.misses
+        }
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    scheduler: JobScheduler = None
+    token: str = None
+
+    def send_json(self, status: int, data: Any):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_job_id(self, path: str) -> Optional[int]:
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    # Every request needs the token, being on localhost does not keep out other users or pages open in a browser
+    def is_authorized(self) -> bool:
+        if self.token != None and hmac.compare_digest(self.headers.get("Authorization", "").encode("utf-8"), f"Bearer {self.token}".encode("utf-8")):
+            return True
+        self.send_json(401, {"error": "Missing or wrong token"})
+        return False
+
+    def do_GET(self):
+        if not self.is_authorized():
+            return
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_json(200, self.scheduler.get_stats())
+            return
+        if url.path.rstrip("/") == "/jobs":
+            self.send_json(200, [job.to_dict(False) for job in list(self.scheduler.jobs.values())])
+            return
+
+        job_id = self.get_job_id(url.path)
+        job = self.scheduler.jobs.get(job_id)
+        if job == None:
+            self.send_json(404, {"error": "Unknown job"})
+            return
+        wait = parse_qs(url.query).get("wait")
+        if wait != None:
+            try:
+                seconds = float(wait[0])
+            except ValueError:
+                self.send_json(400, {"error": f"wait must be a number of seconds, got {wait[0]}"})
+                return
+            job.done.wait(seconds)
+        self.send_json(200, job.to_dict())
+
+    def do_POST(self):
+        if not self.is_authorized():
+            return
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self.send_json(404, {"error": "Unknown path"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self.send_json(415, {"error": "Jobs have to be sent as application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            params.pop("verifyta_path", None) # verifyta is chosen by whoever started the daemon
+            self.scheduler.service.check_params(params)
+            job = self.scheduler.submit(params.pop("type", None), params, int(params.pop("priority", 0)))
+        except PermissionError as e:
+            self.send_json(403, {"error": str(e)})
+            return
+        except OverflowError as e:
+            self.send_json(503, {"error": str(e)})
+            return
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(202, job.to_dict(False))
+
+    def do_DELETE(self):
+        if not self.is_authorized():
+            return
+        job = self.scheduler.cancel(self.get_job_id(urlparse(self.path).path))
+        if job == None:
+            self.send_json(404, {"error": "Unknown job"})
+            return
+        self.send_json(200, job.to_dict(False))
+
+    def log_message(self, format, *args):
+        pass # Requests are not logged to keep the terminal readable
+
+def create_server(port: int, workers: int, max_queued: int, token: str, service: VerificationService = None,
+                  host: str = "127.0.0.1") -> Tuple[ThreadingHTTPServer, JobScheduler]:
+    output = sys.stdout if isinstance(sys.stdout, ThreadLocalOutput) else ThreadLocalOutput(sys.stdout)
+    sys.stdout = output
+    scheduler = JobScheduler(service if service != None else VerificationService(), workers, max_queued, output)
+    handler = type("Handler", (DaemonRequestHandler,), {"scheduler": scheduler, "token": token})
+    return ThreadingHTTPServer((host, port), handler), scheduler
+
+# A new token for every start, readable only by the user running the daemon
+def write_token(token_path: str) -> str:
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(os.path.abspath(token_path)), exist_ok=True)
+    if os.path.exists(token_path):
+        os.remove(token_path)
+    with os.fdopen(os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as file:
+        file.write(token)
+    return token
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs build and verification jobs submitted over a local HTTP API")
+    parser.add_argument("-p", "--port", type=int, default=8765, help="Port on localhost to listen on. Default is 8765")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Amount of jobs run at the same time. 0 uses all CPU cores. Default is 0")
+    parser.add_argument("--max-queued", type=int, default=1000, help="Amount of queued jobs before new jobs are rejected. Default is 1000")
+    parser.add_argument("-vp", "--verifyta-path", type=str, nargs='+', help="Path to the verifyta distribution used for every job. Default is the one in the state")
+    parser.add_argument("-r", "--root", type=str, nargs='+', action="append", help="Folder jobs may read and write in, can be given several times. Default is the working directory")
+    parser.add_argument("--token-file", type=str, nargs='+', help="File the token is written to. Default is PermanentState/daemon_token")
+    args = parser.parse_args()
+
+    roots = [" ".join(root) for root in args.root] if args.root != None else None
+    token_path = " ".join(args.token_file) if args.token_file != None else default_token_path
+    token = write_token(token_path)
+    service = VerificationService(verifyta_path=" ".join(args.verifyta_path) if args.verifyta_path != None else None, roots=roots)
+    server, scheduler = create_server(args.port, args.workers, args.max_queued, token, service)
+    print(f"Listening on http://127.0.0.1:{server.server_address[1]} with {len(scheduler.workers)} workers")
+    print(f"Serving {', '.join(service.roots)}, the token is in {token_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""\
+Python dataclass for the outcome of verifying a single query.
+Holds everything tools need without parsing the text shown to the user,
+and is what is written when results are emitted as JSON.
+
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Optional
+
+VERDICT_SATISFIED = "satisfied"
+VERDICT_NOT_SATISFIED = "not satisfied"
+VERDICT_ERROR = "error"
+
+@dataclass
+class VerificationResult:
+    query: str
+    verdict: str = VERDICT_ERROR
+    result_value: Optional[int] = None # Result of a sup query
+    time_bounds: Optional[str] = None # Result of a bounds query such as [0,2],[5,INF]
+    wall_time: Optional[float] = None # Seconds
+    cpu_time: Optional[float] = None # Seconds used by verifyta, for batches the CPU time verifyta reports for the query
+    peak_rss_kb: Optional[int] = None # Peak resident memory of verifyta, None for batches
+    user_time: Optional[float] = None # Seconds of cpu_time spent in verifyta itself, None for batches
+    system_time: Optional[float] = None # Seconds of cpu_time spent in the operating system for verifyta, None for batches
+    verifyta_cpu_time: Optional[float] = None # Statistics reported by verifyta itself
+    verifyta_memory_kb: Optional[int] = None # Resident memory
+    verifyta_virtual_memory_kb: Optional[int] = None
+    states_explored: Optional[int] = None
+    states_stored: Optional[int] = None
+    trace_path: Optional[str] = None
+    batch_size: int = 1 # Above one the query was verified in a verifyta run together with other queries
+    batch_cpu_time: Optional[float] = None # Seconds used by the whole verifyta run of the batch
+    batch_peak_rss_kb: Optional[int] = None # Peak resident memory of the whole verifyta run of the batch
+    cached: bool = False
+    output: str = "" # Filtered output as shown to the user, empty if verification failed
+
+    @property
+    def satisfied(self) -> bool:
+        return self.verdict == VERDICT_SATISFIED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "VerificationResult":
+        names = {field.name for field in fields(VerificationResult)}
+        return VerificationResult(**{key: value for key, value in data.items() if key in names})
@@ -0,0 +1,185 @@
+"""\
+Searches for the most realistic delay settings that can still be verified within a budget.
+Delays and more replicas make a model more realistic but its state space grows quickly, so a budget of wall time
+per query and peak memory is given and configurations are tried from no delay towards larger delay amounts and
+more replicas. A run is stopped as soon as a query exceeds the time budget or verifyta exceeds the memory budget.
+
+Allowing more delay or more replicas only adds behaviour, so a configuration is assumed to be at least as expensive as
+any configuration with less of both. For every amount of replicas only the largest delay fitting the budget is searched
+for, starting from the largest delay that fitted with fewer replicas, which takes a number of runs linear in the
+amount of delays and replicas rather than trying every combination.
+
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Verifier import BatchOutputParser, get_profile_options, start_verifyta, statistics_options, stop_process, wait_for_usage
+
+STATUS_OK = "ok"
+STATUS_TIME = "over time budget"
+STATUS_MEMORY = "over memory budget"
+STATUS_ERROR = "error"
+
+poll_interval = 0.1 # Seconds between checks of the budget while verifyta runs
+
+@dataclass
+class Budget:
+    wall_time: float # Seconds per query
+    memory_kb: Optional[int] = None
+
+@dataclass
+class SearchPoint:
+    overrides: Dict
+    status: str = STATUS_OK
+    wall_time: Optional[float] = None
+    peak_memory_kb: Optional[int] = None
+    verdicts: Optional[List[bool]] = None
+    model_path: Optional[str] = None
+
+    @property
+    def within_budget(self) -> bool:
+        return self.status == STATUS_OK
+
+    def describe(self) -> str:
+        return ", ".join(f"{key}={value}" for key, value in self.overrides.items())
+
+# Levels of delay from least to most realistic, the first is no delay at all
+def get_delay_levels(delay_type: str, max_delay: int) -> List[Dict]:
+    return [{"delay_type": "N"}] + [{"delay_type": delay_type, "delay_amount": amount} for amount in range(1, max_delay + 1)]
+
+# Resident memory of a running process, None where the platform does not expose it
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status", 'r') as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+# Verifies all queries in one verifyta run, stopped as soon as the budget is exceeded
+def run_within_budget(model_path: str, query_path: str, verifyta_path: str, amount_of_queries: int, budget: Budget) -> SearchPoint:
+    point = SearchPoint({}, model_path=model_path)
+    # Like other runs of several queries no trace is generated, printing traces would count against the budget
+    command = [verifyta_path, model_path, query_path] + statistics_options + get_profile_options(model_path)
+    parser = BatchOutputParser(amount_of_queries)
+    exceeded = []
+    finished = threading.Event()
+
+    start_time = time.perf_counter()
+    process = start_verifyta(command)
+
+    # Time is measured from the start of the current query so every query gets the whole budget.
+    # The process is not polled as that would reap it before its resource usage is read
+    def watch():
+        while not finished.is_set():
+            current_index = parser.current_index
+            query_start = parser.start_times[current_index] if current_index != None else start_time
+            if time.perf_counter() - query_start > budget.wall_time:
+                exceeded.append(STATUS_TIME)
+            elif budget.memory_kb != None and (read_rss_kb(process.pid) or 0) > budget.memory_kb:
+                exceeded.append(STATUS_MEMORY)
+            if exceeded:
+                stop_process(process)
+                return
+            finished.wait(poll_interval)
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        for line in process.stdout:
+            parser.feed(line)
+        parser.finish_current()
+    finally:
+        finished.set()
+        watcher.join()
+        point.peak_memory_kb = wait_for_usage(process).peak_rss_kb
+        point.wall_time = time.perf_counter() - start_time
+        process.stdout.close()
+
+    if exceeded:
+        point.status = exceeded[0]
+    elif budget.memory_kb != None and point.peak_memory_kb != None and point.peak_memory_kb > budget.memory_kb:
+        point.status = STATUS_MEMORY
+    elif process.returncode != 0 or parser.has_error():
+        point.status = STATUS_ERROR
+    else:
+        point.verdicts = [query_parser.satisfied for query_parser in parser.parsers]
+    return point
+
+# For every amount of replicas the index of the largest delay level within budget, stopping at the first amount of
+# replicas where no delay fits. Relies on a larger level or more replicas never being cheaper
+def find_frontier(within_budget: Callable[[int, int], bool], amount_of_levels: int, replica_amounts: List[int]) -> List[Tuple[int, int]]:
+    frontier = []
+    level = 0
+    while level < amount_of_levels and within_budget(level, replica_amounts[0]):
+        level += 1
+    level -= 1
+    if level < 0:
+        return frontier
+    frontier.append((level, replica_amounts[0]))
+
+    for replicas in replica_amounts[1:]:
+        while level >= 0 and not within_budget(level, replicas):
+            level -= 1
+        if level < 0:
+            break
+        frontier.append((level, replicas))
+    return frontier
+
+@dataclass
+class DelaySearch:
+    evaluate: Callable[[Dict], SearchPoint] # Builds and verifies the configuration given as overrides of the state
+    delay_types: List[str] = field(default_factory=lambda: ["E"])
+    max_delay: int = 3
+    replica_amounts: List[int] = field(default_factory=lambda: [1])
+    points: Dict[str, SearchPoint] = field(default_factory=dict) # Every configuration run so far
+
+    def get_point(self, overrides: Dict) -> SearchPoint:
+        key = json.dumps(overrides, sort_keys=True)
+        if key not in self.points:
+            point = self.evaluate(overrides)
+            point.overrides = overrides
+            self.points[key] = point
+        return self.points[key]
+
+    # Frontier points of every delay type, each with its level so the most realistic can be chosen
+    def search(self) -> List[Tuple[int, SearchPoint]]:
+        frontier = []
+        for delay_type in self.delay_types:
+            levels = get_delay_levels(delay_type, self.max_delay)
+            def within_budget(level: int, replicas: int) -> bool:
+                return self.get_point({**levels[level], "role_amount": replicas}).within_budget
+            for level, replicas in find_frontier(within_budget, len(levels), self.replica_amounts):
+                frontier.append((level, self.get_point({**levels[level], "role_amount": replicas})))
+        return frontier
+
+# The most realistic configuration is the one with the most delay, ties are broken by the most replicas
+def get_most_realistic(frontier: List[Tuple[int, SearchPoint]]) -> Optional[SearchPoint]:
+    if len(frontier) == 0:
+        return None
+    return max(frontier, key=lambda entry: (entry[0], entry[1].overrides["role_amount"]))[1]
+
+def format_point(point: SearchPoint) -> str:
+    line = f"{point.describe():<48} {point.status}"
+    if point.wall_time != None:
+        line += f", {point.wall_time:.2f}s"
+    if point.peak_memory_kb != None:
+        line += f", {point.peak_memory_kb / 1024:.0f} MB"
+    return line
+
+def save_search(points: List[SearchPoint], best: Optional[SearchPoint], file_path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    data = {
+        "best": best.overrides if best != None else None,
+        "runs": [{"overrides": point.overrides, "status": point.status, "wall_time": point.wall_time,
+                  "peak_memory_kb": point.peak_memory_kb, "verdicts": point.verdicts} for point in points]
+    }
+    with open(file_path, 'w') as file:
+        json.dump(data, file, indent=4)
@@ -0,0 +1,332 @@
+"""\
+Local SQLite history of every build and verification run.
+A build records the hashes of its input files, the settings it was built with, the size of the model and how long
+each stage took. A verification run records the model it verified, identified by the same layout independent hash the
+result cache uses, and the verdict, times, memory and state counts of every query.
+
+Runs are grouped by protocol, the name of the folder the model was built in, so the history of a query can be followed
+across rebuilds and compared before and after a change. The stage times of the build and scaling benchmarks are kept
+as well, so they can be followed across runs on the same machine.
+
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import statistics
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from DataObjects.ModelSettings import ModelSettings
+from DataObjects.VerificationResult import VerificationResult
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+history_path = os.path.join(base_path, "PermanentState", "history.db") # Database of all runs, replaced by the tests
+
+schema = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    model_hash TEXT,
+    templates INTEGER,
+    locations INTEGER,
+    transitions INTEGER,
+    model_bytes INTEGER,
+    seconds REAL,
+    timings TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    command TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    model_path TEXT NOT NULL,
+    model_hash TEXT,
+    seconds REAL,
+    timings TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    query_index INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    result_value INTEGER,
+    wall_time REAL,
+    cpu_time REAL,
+    user_time REAL,
+    system_time REAL,
+    peak_rss_kb INTEGER,
+    verifyta_memory_kb INTEGER,
+    states_explored INTEGER,
+    states_stored INTEGER,
+    batch_size INTEGER,
+    cached INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    suite TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL,
+    peak_memory_kb REAL,
+    python TEXT,
+    platform TEXT
+);
+CREATE INDEX IF NOT EXISTS results_query ON results(query);
+CREATE INDEX IF NOT EXISTS runs_protocol ON runs(protocol, time);
+CREATE INDEX IF NOT EXISTS builds_protocol ON builds(protocol, time);
+CREATE INDEX IF NOT EXISTS benchmarks_stage ON benchmarks(suite, name, stage, time);
+"""
+
+result_columns = ["query_index", "query", "verdict", "result_value", "wall_time", "cpu_time", "user_time", "system_time", "peak_rss_kb",
+                  "verifyta_memory_kb", "states_explored", "states_stored", "batch_size", "cached"]
+
+def get_file_hash(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+# Hash of every input file by name and one hash over all of them, so any change to the inputs gives another hash
+def get_input_hashes(file_paths: List[str]) -> Dict[str, Any]:
+    files = {os.path.basename(file_path): get_file_hash(file_path) for file_path in sorted(file_paths)}
+    combined = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()
+    return {"hash": combined, "files": files}
+
+def settings_to_dict(model_settings: ModelSettings) -> Dict[str, Any]:
+    return {
+        "role_amount": model_settings.role_amount,
+        "delay_type": {role: delay_type.name for role, delay_type in model_settings.delay_type.items()},
+        "delay_amount": model_settings.delay_amount,
+        "log_size": model_settings.log_size,
+        "path_bound": model_settings.path_bound,
+        "branch_tracking": model_settings.branch_tracking,
+        "timed": model_settings.time_json_transfer != None
+    }
+
+# Protocols are named after the folder the model is built in
+def get_protocol_name(path: str) -> str:
+    path = os.path.abspath(path)
+    if os.path.splitext(path)[1] != "":
+        path = os.path.dirname(path)
+    return os.path.basename(path)
+
+@dataclass
+class BuildRecord:
+    folder: str
+    input_files: List[str]
+    model_settings: ModelSettings
+    model_hash: Optional[str] = None
+    templates: Optional[int] = None
+    locations: Optional[int] = None
+    transitions: Optional[int] = None
+    model_bytes: Optional[int] = None
+    seconds: Optional[float] = None
+    timings: Optional[Dict[str, Any]] = None
+
+# A change of a query between the runs before and after a point in time
+@dataclass
+class Trend:
+    protocol: str
+    query: str
+    runs_before: int
+    runs_after: int
+    wall_time_before: Optional[float]
+    wall_time_after: Optional[float]
+    states_before: Optional[float]
+    states_after: Optional[float]
+    verdicts_before: List[str]
+    verdicts_after: List[str]
+
+    def get_factor(self) -> Optional[float]:
+        if self.wall_time_before == None or self.wall_time_after == None or self.wall_time_before <= 0:
+            return None
+        return self.wall_time_after / self.wall_time_before
+
+    def verdict_changed(self) -> bool:
+        return len(self.verdicts_before) > 0 and len(self.verdicts_after) > 0 and self.verdicts_before[-1] != self.verdicts_after[-1]
+
+# Time of a stage for one protocol or size tier of a benchmark run, peak memory is only measured by the build benchmark
+@dataclass
+class BenchmarkMeasurement:
+    name: str
+    stage: str
+    seconds: float
+    peak_memory_kb: Optional[float] = None
+
+class History:
+    def __init__(self, file_path: str = None):
+        if file_path == None:
+            file_path = history_path
+        self.file_path = file_path
+        if file_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        self.connection = sqlite3.connect(file_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(schema)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def record_build(self, record: BuildRecord, time: str = None) -> int:
+        inputs = get_input_hashes(record.input_files)
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO builds (time, protocol, folder, input_hash, inputs, settings, model_hash, templates, locations, transitions, "
+                "model_bytes, seconds, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time or datetime.now().isoformat(timespec="seconds"), get_protocol_name(record.folder), os.path.abspath(record.folder),
+                 inputs["hash"], json.dumps(inputs["files"]), json.dumps(settings_to_dict(record.model_settings)), record.model_hash,
+                 record.templates, record.locations, record.transitions, record.model_bytes, record.seconds,
+                 json.dumps(record.timings) if record.timings != None else None))
+        return cursor.lastrowid
+
+    def record_run(self, command: str, model_path: str, results: List[VerificationResult], model_hash: str = None, seconds: float = None,
+                   timings: Dict[str, Any] = None, time: str = None) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (time, command, protocol, model_path, model_hash, seconds, timings) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time or datetime.now().isoformat(timespec="seconds"), command, get_protocol_name(model_path), os.path.abspath(model_path),
+                 model_hash, seconds, json.dumps(timings) if timings != None else None))
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                f"INSERT INTO results (run_id, {', '.join(result_columns)}) VALUES (?, {', '.join('?' for _ in result_columns)})",
+                [(run_id, index, result.query, result.verdict, result.result_value, result.wall_time, result.cpu_time, result.user_time,
+                  result.system_time, result.peak_rss_kb, result.verifyta_memory_kb, result.states_explored, result.states_stored,
+                  result.batch_size, int(result.cached)) for index, result in enumerate(results)])
+        return run_id
+
+    # Suite is "build" for the integration test protocols or "scaling" for the generated size tiers
+    def record_benchmark(self, suite: str, measurements: List[BenchmarkMeasurement], python: str = None, platform: str = None,
+                         time: str = None):
+        time = time or datetime.now().isoformat(timespec="seconds")
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO benchmarks (time, suite, name, stage, seconds, peak_memory_kb, python, platform) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(time, suite, measurement.name, measurement.stage, measurement.seconds, measurement.peak_memory_kb, python, platform)
+                 for measurement in measurements])
+
+    def get_benchmarks(self, suite: str = None, name: str = None, since: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        conditions = []
+        parameters: List[Any] = []
+        for column, value in [("suite = ?", suite), ("name = ?", name), ("time >= ?", since)]:
+            if value != None:
+                conditions.append(column)
+                parameters.append(value)
+        where = "WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""
+        rows = self.connection.execute(f"SELECT * FROM benchmarks {where} ORDER BY time DESC, id LIMIT ?", parameters + [limit])
+        return [dict(row) for row in rows]
+
+    def get_builds(self, protocol: str = None, since: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        conditions, parameters = self.get_conditions(protocol, since)
+        rows = self.connection.execute(f"SELECT * FROM builds {conditions} ORDER BY time DESC, id DESC LIMIT ?", parameters + [limit])
+        return [dict(row) for row in rows]
+
+    def get_results(self, protocol: str = None, query: str = None, since: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        conditions, parameters = self.get_conditions(protocol, since, query, prefix="runs.")
+        rows = self.connection.execute(
+            f"SELECT runs.time, runs.command, runs.protocol, runs.model_hash, results.* FROM results JOIN runs ON results.run_id = runs.id "
+            f"{conditions} ORDER BY runs.time DESC, results.id DESC LIMIT ?", parameters + [limit])
+        return [dict(row) for row in rows]
+
+    # Compares every query verified both before and after the given time, cached results did not run verifyta so are left out
+    def get_trends(self, since: str, protocol: str = None, query: str = None) -> List[Trend]:
+        conditions, parameters = self.get_conditions(protocol, None, query, prefix="runs.")
+        conditions = (conditions + " AND" if conditions != "" else "WHERE") + " results.cached = 0"
+        rows = self.connection.execute(
+            f"SELECT runs.time, runs.protocol, results.query, results.verdict, results.wall_time, results.states_explored FROM results "
+            f"JOIN runs ON results.run_id = runs.id {conditions} ORDER BY runs.time, results.id", parameters)
+
+        groups: Dict[tuple, Dict[str, List[Any]]] = {}
+        for row in rows:
+            group = groups.setdefault((row["protocol"], row["query"]), {"before": [], "after": []})
+            group["after" if row["time"] >= since else "before"].append(row)
+
+        trends = []
+        for (protocol_name, query_text), group in groups.items():
+            if len(group["before"]) == 0 or len(group["after"]) == 0:
+                continue
+            trends.append(Trend(
+                protocol_name, query_text, len(group["before"]), len(group["after"]),
+                get_median([row["wall_time"] for row in group["before"]]), get_median([row["wall_time"] for row in group["after"]]),
+                get_median([row["states_explored"] for row in group["before"]]), get_median([row["states_explored"] for row in group["after"]]),
+                [row["verdict"] for row in group["before"]], [row["verdict"] for row in group["after"]]))
+        return trends
+
+    def get_conditions(self, protocol: str = None, since: str = None, query: str = None, prefix: str = "") -> tuple[str, List[Any]]:
+        conditions = []
+        parameters = []
+        if protocol != None:
+            conditions.append(f"{prefix}protocol = ?")
+            parameters.append(protocol)
+        if since != None:
+            conditions.append(f"{prefix}time >= ?")
+            parameters.append(since)
+        if query != None:
+            conditions.append("results.query LIKE ?")
+            parameters.append(f"%{query}%")
+        return ("WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""), parameters
+
+def get_median(values: List[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value != None]
+    return statistics.median(values) if len(values) > 0 else None
+
+def format_seconds(seconds: Optional[float]) -> str:
+    return f"{seconds:.3f}s" if seconds != None else "-"
+
+def format_builds(builds: List[Dict[str, Any]]) -> str:
+    lines = [f"{'time':<21}{'protocol':<24}{'inputs':<14}{'locations':>10}{'transitions':>12}{'bytes':>10}{'seconds':>10}"]
+    for build in builds:
+        lines.append(f"{build['time']:<21}{build['protocol'][:23]:<24}{build['input_hash'][:12]:<14}{build['locations'] or '-':>10}"
+                     f"{build['transitions'] or '-':>12}{build['model_bytes'] or '-':>10}{format_seconds(build['seconds']):>10}")
+    return "\n".join(lines)
+
+def format_queries(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'time':<21}{'protocol':<24}{'verdict':<15}{'wall time':>10}{'states':>12}{'memory':>12}  query"]
+    for result in results:
+        memory = result["peak_rss_kb"] or result["verifyta_memory_kb"]
+        lines.append(f"{result['time']:<21}{result['protocol'][:23]:<24}{result['verdict'] + (' (cached)' if result['cached'] else ''):<15}"
+                     f"{format_seconds(result['wall_time']):>10}{result['states_explored'] or '-':>12}"
+                     f"{(str(memory) + ' KB') if memory != None else '-':>12}  {result['query'][:80]}")
+    return "\n".join(lines)
+
+# Only trends changing the time by at least the factor either way or changing the verdict are shown
+def format_trends(trends: List[Trend], factor: float = 2.0) -> str:
+    lines = []
+    for trend in trends:
+        trend_factor = trend.get_factor()
+        slower = trend_factor != None and trend_factor >= factor
+        faster = trend_factor != None and trend_factor <= 1 / factor
+        if not (slower or faster or trend.verdict_changed()):
+            continue
+        change = f"{trend_factor:.1f}x {'slower' if slower else 'faster'}" if slower or faster else "same speed"
+        line = (f"{trend.protocol}: {trend.query[:80]} got {change} ({format_seconds(trend.wall_time_before)} over {trend.runs_before} runs "
+                f"to {format_seconds(trend.wall_time_after)} over {trend.runs_after} runs)")
+        if trend.states_before != None and trend.states_after != None:
+            line += f", states explored {trend.states_before:.0f} to {trend.states_after:.0f}"
+        if trend.verdict_changed():
+            line += f", verdict changed from {trend.verdicts_before[-1]} to {trend.verdicts_after[-1]}"
+        lines.append(line)
+    if len(lines) == 0:
+        return f"No query changed by {factor}x or changed verdict among {len(trends)} queries verified before and after"
+    return "\n".join(lines)
+
+def format_benchmarks(benchmarks: List[Dict[str, Any]]) -> str:
+    lines = [f"{'time':<21}{'suite':<9}{'name':<24}{'stage':<26}{'seconds':>10}{'peak memory':>14}"]
+    for benchmark in benchmarks:
+        memory = f"{benchmark['peak_memory_kb']:.0f} KB" if benchmark["peak_memory_kb"] != None else "-"
+        lines.append(f"{benchmark['time']:<21}{benchmark['suite']:<9}{benchmark['name'][:23]:<24}{benchmark['stage']:<26}"
+                     f"{benchmark['seconds']:>9.4f}s{memory:>14}")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+"""\
+Incremental re-verification of a changed protocol.
+A built model is split into components, the top level statements of the global declaration, the templates
+and the system, and each component is reduced to a signature that leaves out ids and layout so rebuilding
+an unchanged protocol gives the same signatures.
+
+A query depends on the components it names and, through shared variables, channels and functions, on every
+component that can change them. Constants and typedefs are read but do not couple the components reading them.
+When a protocol or its settings change only queries depending on a changed component are verified again,
+the results of the other queries are reused from the result cache of the previous model.
+
+"""
+
+from dataclasses import dataclass, field
+import json
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Set, Tuple
+
+from DataObjects.VerificationResult import VerificationResult
+from ResultCache import ResultCache
+from Verifier import get_cached_result, get_verifyta_options, put_cached_result, run_queries_batch
+
+identifier_pattern = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+comment_pattern = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+array_pattern = re.compile(r"\[[^\]]*\]")
+whitespace_pattern = re.compile(r"\s+")
+
+# Global names standing for model settings, the setting of a role is given as setting.role
+setting_patterns = [
+    (re.compile(r"logSize"), "log_size"),
+    (re.compile(r"branchTrackingEnabled"), "branch_tracking"),
+    (re.compile(r"nonExitCounterMap"), "path_bound"),
+    (re.compile(r"NUMBER_OF_(\w+)"), "role_amount"),
+    (re.compile(r"maxUpdatesSincePropagation_(\w+)"), "delay_amount"),
+    (re.compile(r"forcedToPropagate|forcedPropagationCounter"), "delay_type"),
+]
+
+system_component = "system"
+
+def normalise(code: str) -> str:
+    return whitespace_pattern.sub(" ", comment_pattern.sub("", code or "")).strip()
+
+def get_identifiers(code: str) -> Set[str]:
+    return set(identifier_pattern.findall(code))
+
+# Splits a declaration into its top level statements, a function ends with its body
+def split_statements(code: str) -> List[str]:
+    statements = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(code):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            statement = code[start:i + 1]
+            if depth == 0 and "(" in statement.split("{")[0] and "=" not in statement.split("{")[0]:
+                statements.append(statement.strip())
+                start = i + 1
+        elif char == ";" and depth == 0:
+            statements.append(code[start:i + 1].strip())
+            start = i + 1
+    if code[start:].strip():
+        statements.append(code[start:].strip())
+    return [statement for statement in statements if statement]
+
+def get_declared_name(statement: str) -> Optional[str]:
+    head = statement.split("{")[0]
+    if "(" in head and "=" not in head and not statement.endswith(";"):
+        names = identifier_pattern.findall(head.split("(")[0])
+    elif statement.startswith("typedef"):
+        names = identifier_pattern.findall(array_pattern.sub("", statement.rsplit("}", 1)[-1]))
+    else:
+        names = identifier_pattern.findall(array_pattern.sub("", statement.split("=")[0]))
+    return names[-1] if names else None
+
+def is_constant(statement: str) -> bool:
+    return statement.startswith("const ") or statement.startswith("typedef ")
+
+@dataclass
+class ModelComponents:
+    signatures: Dict[str, str] = field(default_factory=dict)
+    references: Dict[str, Set[str]] = field(default_factory=dict) # Global names each component reads or writes
+    constants: Set[str] = field(default_factory=set)
+    templates: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_file(cls, model_path: str) -> "ModelComponents":
+        return cls.from_element(ET.parse(model_path).getroot())
+
+    @classmethod
+    def from_xml(cls, xml_data: str) -> "ModelComponents":
+        return cls.from_element(ET.fromstring(xml_data))
+
+    @classmethod
+    def from_element(cls, root: ET.Element) -> "ModelComponents":
+        components = cls()
+        for statement in split_statements(comment_pattern.sub("", root.findtext("declaration", ""))):
+            name = get_declared_name(statement)
+            if name == None:
+                continue
+            if name in components.signatures:
+                name = f"{name}:{len(components.signatures)}" # Overloaded functions are kept apart
+            components.signatures[name] = normalise(statement)
+            components.references[name] = get_identifiers(statement)
+            if is_constant(statement):
+                components.constants.add(name)
+
+        for template in root.findall("template"):
+            name = template.findtext("name", "").strip()
+            signature = get_template_signature(template)
+            components.templates.append(name)
+            components.signatures[name] = signature
+            components.references[name] = get_identifiers(signature)
+
+        # The system only lists the templates, it is part of every cone without pulling them in
+        components.signatures[system_component] = normalise(root.findtext("system", ""))
+        components.references[system_component] = set()
+
+        global_names = set(components.signatures)
+        for name in components.references:
+            components.references[name] &= global_names
+            components.references[name].discard(name)
+        return components
+
+    def is_global(self, name: str) -> bool:
+        return name in self.signatures and name not in self.templates and name != system_component
+
+    # The components that can influence the given components, shared variables, channels and functions
+    # couple every component using them while constants only add themselves
+    def get_cone(self, names: Set[str]) -> Set[str]:
+        users: Dict[str, Set[str]] = {}
+        for name, references in self.references.items():
+            for reference in references:
+                users.setdefault(reference, set()).add(name)
+
+        cone = set()
+        stack = [name for name in names if name in self.signatures] + [system_component]
+        while stack:
+            name = stack.pop()
+            if name in cone:
+                continue
+            cone.add(name)
+            stack.extend(self.references.get(name, set()) - cone)
+            if self.is_global(name) and name not in self.constants:
+                stack.extend(users.get(name, set()) - cone)
+        return cone
+
+# The template without ids and layout, locations are referred to by name
+def get_template_signature(template: ET.Element) -> str:
+    location_names = {}
+    locations = []
+    for location in template.findall("location"):
+        name = normalise(location.findtext("name", "")) or location.get("id")
+        location_names[location.get("id")] = name
+        invariant = normalise("".join(label.text or "" for label in location.findall("label") if label.get("kind") == "invariant"))
+        kind = "urgent" if location.find("urgent") != None else "committed" if location.find("committed") != None else ""
+        locations.append(f"{name}|{kind}|{invariant}")
+
+    transitions = []
+    for transition in template.findall("transition"):
+        labels = sorted(f"{label.get('kind')}={normalise(label.text)}" for label in transition.findall("label"))
+        source = location_names.get(transition.find("source").get("ref"))
+        target = location_names.get(transition.find("target").get("ref"))
+        transitions.append(f"{source}->{target}|{'|'.join(labels)}")
+
+    init = template.find("init")
+    parts = [normalise(template.findtext("name", "")), normalise(template.findtext("parameter", "")), normalise(template.findtext("declaration", "")),
+             location_names.get(init.get("ref")) if init != None else ""]
+    return "\n".join(parts + sorted(locations) + sorted(transitions))
+
+@dataclass
+class QueryDependencies:
+    query: str
+    components: Set[str] = field(default_factory=set)
+    roles: Set[str] = field(default_factory=set)
+    events: Set[str] = field(default_factory=set)
+    settings: Set[str] = field(default_factory=set)
+    affected: bool = True
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "roles": sorted(self.roles),
+            "events": sorted(self.events),
+            "settings": sorted(self.settings),
+            "affected": self.affected
+        }
+
+def get_role_name(template: str) -> str:
+    return template[:-len("_log")] if template.endswith("_log") else template
+
+def find_dependencies(components: ModelComponents, query: str) -> QueryDependencies:
+    query = query.strip()
+    dependencies = QueryDependencies(query)
+
+    # Names after a dot are local to a template, bound variables of the query are not part of the model
+    names = get_identifiers(re.sub(r"\.\s*[A-Za-z_]\w*", "", query))
+    if "deadlock" in names:
+        names |= set(components.templates)
+    for name in list(names):
+        if name.endswith("_t") and name[:-2] in components.templates:
+            names.add(name[:-2])
+
+    dependencies.components = components.get_cone(names)
+    for name in dependencies.components:
+        if name in components.templates:
+            dependencies.roles.add(get_role_name(name))
+            if "clock " in components.signatures[name]:
+                dependencies.settings.add(f"time.{get_role_name(name)}")
+        elif name.endswith("_ID") and components.is_global(name):
+            dependencies.events.add(name[:-len("_ID")])
+        for pattern, setting in setting_patterns:
+            match = pattern.fullmatch(name)
+            if match != None:
+                dependencies.settings.add(f"{setting}.{match.group(1)}" if match.groups() else setting)
+    return dependencies
+
+def find_changed_components(before: ModelComponents, after: ModelComponents) -> Set[str]:
+    names = set(before.signatures) | set(after.signatures)
+    return {name for name in names if before.signatures.get(name) != after.signatures.get(name)}
+
+# Dependencies of each query in the changed model, a query is affected if a component it depends on changed
+def plan_reverification(before: ModelComponents, after: ModelComponents, queries: List[str]) -> List[QueryDependencies]:
+    changed = find_changed_components(before, after)
+    plan = []
+    for query in queries:
+        dependencies = find_dependencies(after, query)
+        before_dependencies = find_dependencies(before, query)
+        dependencies.affected = len((dependencies.components | before_dependencies.components) & changed) > 0
+        plan.append(dependencies)
+    return plan
+
+def write_dependencies(plan: List[QueryDependencies], file_path: str):
+    with open(file_path, 'w') as file:
+        json.dump([dependencies.to_dict() for dependencies in plan], file, indent=4)
+
+# Reuses the cached results of the previous model for unaffected queries and verifies the rest on the changed model.
+# Results are returned in the same order as the queries
+def reverify(before_model_path: str, after_model_path: str, queries: List[str], verifyta_path: str, cache: ResultCache,
+             show_traces: bool = True) -> Tuple[List[QueryDependencies], List[VerificationResult]]:
+    queries = [query.strip() for query in queries if query.strip()]
+    plan = plan_reverification(ModelComponents.from_file(before_model_path), ModelComponents.from_file(after_model_path), queries)
+    # Each model is verified with the options tuned for it
+    before_options = get_verifyta_options(before_model_path)
+    after_options = get_verifyta_options(after_model_path)
+    results: List[Optional[VerificationResult]] = [None] * len(queries)
+
+    for i, dependencies in enumerate(plan):
+        if dependencies.affected:
+            continue
+        result = get_cached_result(cache, cache.get_key(before_model_path, queries[i], verifyta_path, before_options), queries[i])
+        if result == None:
+            dependencies.affected = True # Nothing stored to reuse
+            continue
+        put_cached_result(cache, cache.get_key(after_model_path, queries[i], verifyta_path, after_options), result)
+        results[i] = result
+
+    affected = [i for i, dependencies in enumerate(plan) if dependencies.affected]
+    if len(affected) > 0:
+        verified = run_queries_batch(after_model_path, [queries[i] for i in affected], verifyta_path, cache, show_traces)
+        for i, result in zip(affected, verified):
+            results[i] = result
+    return plan, results
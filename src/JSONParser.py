@@ -17,6 +17,7 @@ from collections import defaultdict
 
 from DataObjects.JSONTransfer import JSONTransfer, EventData
 from DataObjects.TimeJSONTransfer import LogTimeData, EventTimeData, TimeJSONTransfer
+from Timing import StageTimer, timed
 
 @dataclass
 class Edge:
@@ -196,7 +197,7 @@ def create_JSONTransfer(graph: Graph, role: str) -> JSONTransfer:
         other_events=other_events
     )
 
-def parse_protocol_JSON_file(json_file: str) -> tuple[JSONTransfer, List[JSONTransfer]]:
+def parse_protocol_JSON_file(json_file: str, timer: StageTimer = None) -> tuple[JSONTransfer, List[JSONTransfer]]:
     with open(json_file, 'r') as f:
         data = json.load(f)
     
@@ -207,8 +208,9 @@ def parse_protocol_JSON_file(json_file: str) -> tuple[JSONTransfer, List[JSONTra
     globalJsonTransfer = (create_JSONTransfer(graph,"GlobalProtocol"))
 
     for role in graph.get_role_names():
-        newGraph = generate_projection(graph,role)
-        jsonTransfers.append(create_JSONTransfer(newGraph,role))
+        with timed(timer, "generate_projection"):
+            newGraph = generate_projection(graph,role)
+            jsonTransfers.append(create_JSONTransfer(newGraph,role))
         
     return globalJsonTransfer, jsonTransfers
 
@@ -0,0 +1,180 @@
+"""\
+Layered layout of the role templates for the UPPAAL GUI in the style of Sugiyama, computed in Python.
+Every transition between two different locations becomes a node of its own which is where its nail and label go, so
+labels sit between the locations they connect. Cycles are broken by reversing the edges a depth first search finds
+going back, every node is put in the layer of its longest path from a source and edges crossing several layers get a
+dummy node in every layer between. The order within the layers is improved by sweeps of the barycenter heuristic after
+which the nodes of every layer are spaced evenly around the middle of the template.
+
+Layouts only depend on the shape of a template, the locations numbered in the order the transitions reach them, not
+on ids or names. A shape is laid out once and its coordinates reused for every role and rebuild with the same shape.
+
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from DataObjects.Location import Location
+from DataObjects.Transition import Transition
+
+node_spacing = 150 # Horizontal distance between nodes of a layer
+layer_spacing = 100 # Vertical distance between layers
+self_loop_size = 40 # Distance of the nails of a transition from a location to itself
+barycenter_sweeps = 4 # Sweeps down and up the layers ordering nodes by the mean position of their neighbours
+layout_cache_size = 1024 # Shapes kept
+
+Edge = Tuple[int, int]
+Point = Tuple[int, int]
+
+# Numbers the locations in the order the transitions reach them, starting from the initial location
+def get_shape(locations: List[Location], transitions: List[Transition], initial: Location = None) -> Tuple[List[Location], Tuple[Edge, ...]]:
+    ordered_locations: Dict[int, Location] = {}
+    indices: Dict[int, int] = {}
+
+    def get_index(location: Location) -> int:
+        if location.id not in indices:
+            indices[location.id] = len(indices)
+            ordered_locations[location.id] = location
+        return indices[location.id]
+
+    if initial != None:
+        get_index(initial)
+    edges = tuple((get_index(transition.source), get_index(transition.target)) for transition in transitions)
+    # Locations no transition reaches are placed last, by name so the shape does not depend on the order of the list
+    for location in sorted(locations, key=lambda location: location.name):
+        get_index(location)
+    return list(ordered_locations.values()), edges
+
+# Sets the coordinates of the locations and the nails of the transitions
+def layered_layout(locations: List[Location], transitions: List[Transition], initial: Location = None):
+    ordered_locations, edges = get_shape(locations, transitions, initial)
+    positions, nails = get_layered_layout(len(ordered_locations), edges)
+    for location, (x, y) in zip(ordered_locations, positions):
+        location.x = x
+        location.y = y
+    for transition, transition_nails in zip(transitions, nails):
+        transition.nails = list(transition_nails)
+
+# Edges found going back to a node on the stack of a depth first search are reversed, the rest form a DAG
+def remove_cycles(node_amount: int, edges: List[Edge]) -> List[Edge]:
+    outgoing: List[List[int]] = [[] for _ in range(node_amount)]
+    for i, (source, target) in enumerate(edges):
+        outgoing[source].append(i)
+
+    reversed_edges = set()
+    state = [0] * node_amount # 0 unvisited, 1 on the stack, 2 done
+    for root in range(node_amount):
+        if state[root] != 0:
+            continue
+        state[root] = 1
+        stack = [(root, 0)]
+        while len(stack) > 0:
+            node, next_edge = stack[-1]
+            if next_edge == len(outgoing[node]):
+                state[node] = 2
+                stack.pop()
+                continue
+            stack[-1] = (node, next_edge + 1)
+            i = outgoing[node][next_edge]
+            target = edges[i][1]
+            if state[target] == 1:
+                reversed_edges.add(i)
+            elif state[target] == 0:
+                state[target] = 1
+                stack.append((target, 0))
+    return [(target, source) if i in reversed_edges else (source, target) for i, (source, target) in enumerate(edges)]
+
+# Every node is put one layer below the lowest node with an edge to it, taking the nodes in topological order
+def assign_layers(node_amount: int, edges: List[Edge]) -> List[int]:
+    outgoing: List[List[int]] = [[] for _ in range(node_amount)]
+    incoming = [0] * node_amount
+    for source, target in edges:
+        outgoing[source].append(target)
+        incoming[target] += 1
+
+    layers = [0] * node_amount
+    ready = [node for node in range(node_amount) if incoming[node] == 0]
+    while len(ready) > 0:
+        node = ready.pop()
+        for target in outgoing[node]:
+            layers[target] = max(layers[target], layers[node] + 1)
+            incoming[target] -= 1
+            if incoming[target] == 0:
+                ready.append(target)
+    return layers
+
+def get_barycenter(neighbours: List[int], position: List[int], default: float) -> float:
+    if len(neighbours) == 0:
+        return default
+    return sum(position[neighbour] for neighbour in neighbours) / len(neighbours)
+
+# Orders every layer by the mean position of the neighbours in the layer before it, sweeping down and then up
+def order_layers(layers: List[List[int]], above: List[List[int]], below: List[List[int]], position: List[int]):
+    for _ in range(barycenter_sweeps):
+        for sweep, neighbours in [(range(1, len(layers)), above), (range(len(layers) - 2, -1, -1), below)]:
+            for layer_index in sweep:
+                layer = layers[layer_index]
+                layer.sort(key=lambda node: get_barycenter(neighbours[node], position, position[node]))
+                for i, node in enumerate(layer):
+                    position[node] = i
+
+@lru_cache(maxsize=layout_cache_size)
+def get_layered_layout(location_amount: int, edges: Tuple[Edge, ...]) -> Tuple[Tuple[Point, ...], Tuple[Tuple[Point, ...], ...]]:
+    # Locations are the first nodes, followed by a node for every transition between two different locations
+    graph_edges = []
+    transition_nodes: List[Optional[int]] = []
+    node_amount = location_amount
+    for source, target in edges:
+        if source == target:
+            transition_nodes.append(None)
+            continue
+        transition_nodes.append(node_amount)
+        graph_edges.append((source, node_amount))
+        graph_edges.append((node_amount, target))
+        node_amount += 1
+
+    graph_edges = remove_cycles(node_amount, graph_edges)
+    layer_of = assign_layers(node_amount, graph_edges)
+
+    # Dummy nodes in every layer an edge crosses, so every edge connects neighbouring layers
+    above: List[List[int]] = [[] for _ in range(node_amount)]
+    below: List[List[int]] = [[] for _ in range(node_amount)]
+    for source, target in graph_edges:
+        previous = source
+        for layer in range(layer_of[source] + 1, layer_of[target]):
+            layer_of.append(layer)
+            above.append([previous])
+            below.append([])
+            below[previous].append(len(layer_of) - 1)
+            previous = len(layer_of) - 1
+        below[previous].append(target)
+        above[target].append(previous)
+
+    layers: List[List[int]] = [[] for _ in range(max(layer_of, default=-1) + 1)]
+    for node, layer in enumerate(layer_of):
+        layers[layer].append(node)
+    position = [0] * len(layer_of)
+    for layer in layers:
+        for i, node in enumerate(layer):
+            position[node] = i
+    order_layers(layers, above, below, position)
+
+    widest = max((len(layer) for layer in layers), default=0)
+    points: List[Point] = [(0, 0)] * len(layer_of)
+    for layer_index, layer in enumerate(layers):
+        offset = (widest - len(layer)) / 2
+        for node in layer:
+            points[node] = (round((position[node] + offset) * node_spacing), layer_index * layer_spacing)
+
+    nails = []
+    self_loops: Dict[int, int] = {}
+    for (source, target), node in zip(edges, transition_nodes):
+        if node != None:
+            nails.append((points[node],))
+            continue
+        # Loops on the same location are nested so they do not overlap
+        size = self_loop_size * (self_loops.get(source, 0) + 1)
+        self_loops[source] = self_loops.get(source, 0) + 1
+        x, y = points[source]
+        nails.append(((x + size, y - size), (x + size, y + size)))
+    return tuple(points[:location_amount]), tuple(nails)
@@ -0,0 +1,165 @@
+"""\
+Verifies many observed logs against one model in as few verifyta runs as possible.
+Duplicate logs are verified once and logs the conformance checker rejects are settled without verifyta.
+The remaining logs are stored in a trie so logs sharing a prefix share its node. Prefixes shared by
+several logs are verified before their extensions, as the global log only grows a log can not be
+reached if one of its prefixes can not, so an unreachable prefix settles every log below it without running verifyta.
+
+The remaining queries of each round are split into batches verified in parallel by separate verifyta runs.
+
+"""
+
+import json
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+
+from DataObjects.VerificationResult import VerificationResult, VERDICT_ERROR, VERDICT_NOT_SATISFIED, VERDICT_SATISFIED
+from LogConformance import LogConformanceChecker
+from QueryGenerator import generate_log_query
+from ResultCache import ResultCache
+from Verifier import BatchJob, get_worker_amount, verify_batches_parallel
+
+default_batch_size = 50
+
+@dataclass
+class LogTrieNode:
+    depth: int = 0
+    children: Dict[str, "LogTrieNode"] = field(default_factory=dict)
+    is_log: bool = False # An input log ends at this node
+
+    # Prefixes are only worth verifying on their own if they end a log or are shared by several logs
+    def is_checkpoint(self) -> bool:
+        return self.is_log or len(self.children) > 1
+
+class LogTrie:
+    def __init__(self):
+        self.root = LogTrieNode()
+        self.node_amount = 0
+
+    def insert(self, log: List[str]):
+        node = self.root
+        for event in log:
+            if event not in node.children:
+                node.children[event] = LogTrieNode(node.depth + 1)
+                self.node_amount += 1
+            node = node.children[event]
+        node.is_log = True
+
+    # Nearest checkpoints below the node together with their log
+    def get_next_checkpoints(self, node: LogTrieNode, prefix: List[str]) -> List[tuple[LogTrieNode, List[str]]]:
+        checkpoints = []
+        stack = [(child, prefix + [event]) for event, child in node.children.items()]
+        while stack:
+            child, log = stack.pop()
+            if child.is_checkpoint():
+                checkpoints.append((child, log))
+            else:
+                stack.extend((grand_child, log + [event]) for event, grand_child in child.children.items())
+        return checkpoints
+
+    # Every log ending at or below the node
+    def get_logs_below(self, node: LogTrieNode, prefix: List[str]) -> List[List[str]]:
+        logs = []
+        stack = [(node, prefix)]
+        while stack:
+            current, log = stack.pop()
+            if current.is_log:
+                logs.append(log)
+            stack.extend((child, log + [event]) for event, child in current.children.items())
+        return logs
+
+@dataclass
+class LogBatchStats:
+    logs: int = 0
+    unique_logs: int = 0
+    queries: int = 0 # Queries given to verifyta, including shared prefixes
+    pruned: int = 0 # Unique logs settled by an unreachable prefix
+    rejected: int = 0 # Unique logs settled by the conformance checker
+    rounds: int = 0
+
+# Reads one log per line, either comma seperated events or a JSON list of events
+def read_logs(log_path: str) -> List[List[str]]:
+    logs = []
+    with open(log_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if line == "":
+                continue
+            if line.startswith("["):
+                events = json.loads(line)
+            elif line.startswith("{"):
+                events = json.loads(line)["log"]
+            else:
+                events = line.split(",")
+            logs.append([str(event).strip() for event in events if str(event).strip()])
+    return logs
+
+def create_rejected_result(log: List[str], valid_only: bool, reason: str) -> VerificationResult:
+    return VerificationResult(generate_log_query(log, valid_only), VERDICT_NOT_SATISFIED, output=f"Query not satisfied, {reason} \n")
+
+def create_pruned_result(log: List[str], valid_only: bool, prefix_length: int, verdict: str) -> VerificationResult:
+    if verdict == VERDICT_ERROR:
+        output = f"Prefix of length {prefix_length} could not be verified \n"
+    else:
+        output = f"Query not satisfied, prefix of length {prefix_length} cannot occur \n"
+    return VerificationResult(generate_log_query(log, valid_only), verdict, output=output)
+
+def split_batches(queries: List[str], batch_size: int, workers: int) -> List[List[str]]:
+    # Small rounds are still spread over every worker
+    size = max(1, min(batch_size, -(-len(queries) // workers)))
+    return [queries[i:i + size] for i in range(0, len(queries), size)]
+
+# Returns a result per input log in the order of the logs
+def verify_logs_batch(model_path: str, logs: List[List[str]], verifyta_path: str, valid_only: bool = False, cache: ResultCache = None,
+                      workers: int = 1, batch_size: int = default_batch_size, stats: LogBatchStats = None,
+                      checker: LogConformanceChecker = None) -> List[Optional[VerificationResult]]:
+    if stats == None:
+        stats = LogBatchStats()
+    workers = get_worker_amount(workers)
+
+    trie = LogTrie()
+    unique_logs = set()
+    log_results: Dict[tuple, VerificationResult] = {}
+    for log in logs:
+        if len(log) == 0 or tuple(log) in unique_logs:
+            continue
+        unique_logs.add(tuple(log))
+        reason = checker.check(log, valid_only) if checker != None else None
+        if reason != None:
+            log_results[tuple(log)] = create_rejected_result(log, valid_only, reason)
+            stats.rejected += 1
+        else:
+            trie.insert(log)
+    stats.logs = len(logs)
+    stats.unique_logs = len(unique_logs)
+
+    frontier = trie.get_next_checkpoints(trie.root, [])
+    while frontier:
+        stats.rounds += 1
+        queries = [generate_log_query(log, valid_only) for _, log in frontier]
+        stats.queries += len(queries)
+
+        jobs = [BatchJob(model_path, batch, verifyta_path, cache, show_traces=False) for batch in split_batches(queries, batch_size, workers)]
+        results = []
+        for captured, batch_results in verify_batches_parallel(jobs, workers):
+            print(captured, end="")
+            results.extend(batch_results)
+
+        next_frontier = []
+        for (node, log), result in zip(frontier, results):
+            if node.is_log:
+                log_results[tuple(log)] = result
+            if result.verdict == VERDICT_SATISFIED:
+                next_frontier.extend(trie.get_next_checkpoints(node, log))
+                continue
+
+            # Extensions of an unreachable prefix are unreachable, extensions of a failed prefix are not verified
+            verdict = VERDICT_ERROR if result.verdict == VERDICT_ERROR else VERDICT_NOT_SATISFIED
+            for pruned_log in trie.get_logs_below(node, log):
+                if tuple(pruned_log) not in log_results:
+                    log_results[tuple(pruned_log)] = create_pruned_result(pruned_log, valid_only, node.depth, verdict)
+                    stats.pruned += 1
+        frontier = next_frontier
+
+    # Duplicates get their own copy so changing one record does not change the others
+    return [replace(log_results[tuple(log)]) if tuple(log) in log_results else None for log in logs]
@@ -0,0 +1,170 @@
+"""\
+Checks logs against the protocol and the projections of its roles in Python before any are given to verifyta.
+Only logs that certainly cannot occur in the model are rejected, everything else is left for verifyta.
+
+A log is rejected if
+    it holds an event that is not part of the protocol or is longer than the log size of the model,
+    a role emits an event that is not on an exit path more often than the path bound allows,
+    a role emits an event from a location its projection cannot be in at that point (global log), or
+    the events do not follow a path through the global protocol (valid only log).
+
+As events propagate with a delay and branches compete, a role may not have seen every earlier event
+and may move back in its projection when it loses a competition. So before emitting an event a role
+may be in any location reached from its earlier locations over events that have already been emitted,
+in either direction. Roles with several instances keep the locations of all instances.
+
+Transitions are memoized on the set of possible locations, which keeps checking long logs fast.
+
+"""
+
+from collections import defaultdict
+import re
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from DataObjects.JSONTransfer import JSONTransfer
+from DataObjects.ModelSettings import ModelSettings
+from GraphAnalyser import GraphAnalyser
+
+class ProjectionWalker:
+    def __init__(self, json_transfer: JSONTransfer, single_instance: bool):
+        self.initial = frozenset([json_transfer.initial])
+        self.single_instance = single_instance
+        self.own_targets: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self.neighbours: Dict[str, List[tuple[str, str]]] = defaultdict(list)
+
+        for event in json_transfer.own_events:
+            self.own_targets[event.source][event.event_name].add(event.target)
+        for event in json_transfer.own_events + json_transfer.other_events:
+            # Both directions as a role can backtrack over events it has read
+            self.neighbours[event.source].append((event.event_name, event.target))
+            self.neighbours[event.target].append((event.event_name, event.source))
+
+        self.closures: Dict[tuple[FrozenSet[str], FrozenSet[str]], FrozenSet[str]] = {}
+        self.steps: Dict[tuple[FrozenSet[str], FrozenSet[str], str], Optional[FrozenSet[str]]] = {}
+
+    def get_closure(self, locations: FrozenSet[str], seen: FrozenSet[str]) -> FrozenSet[str]:
+        key = (locations, seen)
+        if key not in self.closures:
+            reached = set(locations)
+            stack = list(locations)
+            while stack:
+                location = stack.pop()
+                for event_name, neighbour in self.neighbours[location]:
+                    if event_name in seen and neighbour not in reached:
+                        reached.add(neighbour)
+                        stack.append(neighbour)
+            self.closures[key] = frozenset(reached)
+        return self.closures[key]
+
+    # Locations after the role emitted the event, None if it cannot emit it
+    def step(self, locations: FrozenSet[str], seen: FrozenSet[str], event_name: str) -> Optional[FrozenSet[str]]:
+        key = (locations, seen, event_name)
+        if key not in self.steps:
+            reachable = self.get_closure(locations, seen)
+            targets = set()
+            for location in reachable:
+                targets.update(self.own_targets[location].get(event_name, ()))
+            if len(targets) == 0:
+                self.steps[key] = None
+            elif self.single_instance:
+                self.steps[key] = frozenset(targets)
+            else:
+                self.steps[key] = reachable | targets
+        return self.steps[key]
+
+class LogConformanceChecker:
+    def __init__(self, global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer], model_settings: ModelSettings = None):
+        global_events = global_json_transfer.own_events + global_json_transfer.other_events
+        self.event_names = {event.event_name for event in global_events}
+        self.global_initial = frozenset([global_json_transfer.initial])
+        self.global_targets: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        for event in global_events:
+            self.global_targets[event.source][event.event_name].add(event.target)
+        self.global_steps: Dict[tuple[FrozenSet[str], str], FrozenSet[str]] = {}
+
+        role_amount = {}
+        self.log_size = None
+        self.path_bound = -1
+        if model_settings != None:
+            role_amount = model_settings.role_amount
+            self.log_size = model_settings.log_size
+            self.path_bound = model_settings.path_bound
+
+        # Without settings the amount of instances is unknown so every role is treated as having several
+        self.owners: Dict[str, str] = {}
+        self.walkers: Dict[str, ProjectionWalker] = {}
+        self.emit_limits: Dict[str, int] = {}
+        non_exit_events = GraphAnalyser(global_events).analyse_graph(global_json_transfer.initial)["non_exit_paths"]
+        for json_transfer in json_transfers:
+            amount = role_amount.get(json_transfer.name)
+            self.walkers[json_transfer.name] = ProjectionWalker(json_transfer, amount == 1)
+            for event in json_transfer.own_events:
+                self.owners[event.event_name] = json_transfer.name
+                if event in non_exit_events and self.path_bound > -1 and amount != None:
+                    self.emit_limits[event.event_name] = self.path_bound * amount
+            # The bound is only on the edges of the projection that are non exit paths of the protocol
+            for event in json_transfer.own_events:
+                if event not in non_exit_events:
+                    self.emit_limits.pop(event.event_name, None)
+
+    # Returns why the log cannot occur, None if it might
+    def check(self, log: List[str], valid_only: bool = False) -> Optional[str]:
+        if self.log_size != None and len(log) > self.log_size:
+            return f"log is longer than the log size {self.log_size}"
+
+        counts: Dict[str, int] = defaultdict(int)
+        role_locations = {name: walker.initial for name, walker in self.walkers.items()}
+        global_locations = self.global_initial
+        seen: FrozenSet[str] = frozenset()
+
+        for index, event_name in enumerate(log):
+            if event_name not in self.event_names:
+                return f"event {index} ({event_name}) is not part of the protocol"
+
+            if event_name in self.emit_limits:
+                counts[event_name] += 1
+                if counts[event_name] > self.emit_limits[event_name]:
+                    return f"event {index} ({event_name}) is emitted more often than the path bound allows"
+
+            if valid_only:
+                global_locations = self.step_global(global_locations, event_name)
+                if len(global_locations) == 0:
+                    return f"event {index} ({event_name}) does not follow the global protocol"
+            elif event_name in self.owners:
+                role = self.owners[event_name]
+                locations = self.walkers[role].step(role_locations[role], seen, event_name)
+                if locations == None:
+                    return f"event {index} ({event_name}) cannot be emitted by {role} at that point"
+                role_locations[role] = locations
+
+            if event_name not in seen:
+                seen = seen | {event_name}
+        return None
+
+    def step_global(self, locations: FrozenSet[str], event_name: str) -> FrozenSet[str]:
+        key = (locations, event_name)
+        if key not in self.global_steps:
+            targets = set()
+            for location in locations:
+                targets.update(self.global_targets[location].get(event_name, ()))
+            self.global_steps[key] = frozenset(targets)
+        return self.global_steps[key]
+
+# The settings a model was built with are read from its declarations, so the checker matches the model being verified
+def read_model_settings(model_path: str) -> ModelSettings:
+    with open(model_path, 'r', encoding='utf-8') as file:
+        model = file.read()
+
+    role_amount = {name: int(amount) for name, amount in re.findall(r"const int NUMBER_OF_(\w+) = (\d+);", model)}
+    model_settings = ModelSettings(role_amount=role_amount, delay_type={})
+    match_log_size = re.search(r"const int logSize = (\d+);", model)
+    model_settings.log_size = int(match_log_size.group(1)) if match_log_size else None
+    match_path_bound = re.search(r"nonExitCounterMap\[id \+ id_start\]\[\w+\] (?:&lt;|<) (\d+)", model)
+    model_settings.path_bound = int(match_path_bound.group(1)) if match_path_bound else -1
+    return model_settings
+
+# Every event of the model has an id constant named after it, the protocol checked against must have the same events
+def read_model_event_names(model_path: str) -> Set[str]:
+    with open(model_path, 'r', encoding='utf-8') as file:
+        model = file.read()
+    return set(re.findall(r"const int (\w+)_ID = \d+;", model))
@@ -20,15 +20,17 @@ from Functions import *
 from Log import Log
 from Role import Role
 from GraphAnalyser import GraphAnalyser
+from Timing import StageTimer, timed
 
-def add_branching_functionality(declaration: Declaration, branching_events: Set[EventData], eventname_to_UID_dict: Dict[str, int]):
+# Partitions the branching events by their source, returning the partitions padded with -1,
+# whether each event is branching and which partition each event is in (-1 if not branching)
+def get_branching_partitions(branching_events: Set[EventData], eventname_to_UID_dict: Dict[str, int]) -> tuple[List[List[int]], List[bool], List[int]]:
     # Handling branching events
     # based on source partition the branching events into set so we have a list of sets
     sorted_events = sorted(branching_events, key=attrgetter('source'))
     partioned_branching_events = [{Utils.get_eventtype_UID(event.event_name) for event in group}
         for _, group in groupby(sorted_events, key=attrgetter('source'))]
     
-    outer_size = len(partioned_branching_events)
     inner_size_max = 0
 
     for partition in partioned_branching_events:
@@ -60,6 +62,13 @@ def add_branching_functionality(declaration: Declaration, branching_events: Set[
         for _ in range(inner_size_max - current_partition_len):
             partition.append(-1)
 
+    return partioned_branching_events_UID, is_branching_list, is_in_branching_partion
+
+def add_branching_functionality(declaration: Declaration, branching_events: Set[EventData], eventname_to_UID_dict: Dict[str, int]):
+    partioned_branching_events_UID, is_branching_list, is_in_branching_partion = get_branching_partitions(branching_events, eventname_to_UID_dict)
+    outer_size = len(partioned_branching_events_UID)
+    inner_size_max = max((len(partition) for partition in partioned_branching_events_UID), default=0)
+
     if len(branching_events) == 0 :
         declaration.add_variable(f"const int outerSizeBranchingList = 1;")
         declaration.add_variable(f"const int innerSizeBranchingList = 1;")
@@ -160,7 +169,7 @@ def create_flow_list(jsonTransfer: JSONTransfer, eventname_to_UID_dict: Dict[str
 
     return location_map[jsonTransfer.initial], flow_list
 
-def enrich_json(jsonTransfers: List[JSONTransfer], eventnames_dict: Dict[str,str], global_non_exit_paths: Set[EventData]):
+def enrich_json(jsonTransfers: List[JSONTransfer], eventnames_dict: Dict[str,str], global_non_exit_paths: Set[EventData], timer: StageTimer = None):
     for jsonTransfer in jsonTransfers:
         jsonTransfer.total_amount_of_events = len(eventnames_dict)
 
@@ -170,8 +179,9 @@ def enrich_json(jsonTransfers: List[JSONTransfer], eventnames_dict: Dict[str,str
         all_events = jsonTransfer.own_events.copy()
         all_events.extend(jsonTransfer.other_events)
 
-        analyzer = GraphAnalyser(all_events)
-        analysis_results = (analyzer.analyse_graph(jsonTransfer.initial))
+        with timed(timer, "analyse_graph"):
+            analyzer = GraphAnalyser(all_events)
+            analysis_results = (analyzer.analyse_graph(jsonTransfer.initial))
         branching_events = analysis_results["branching_events"]
 
         non_exit_paths = global_non_exit_paths
@@ -180,7 +190,8 @@ def enrich_json(jsonTransfers: List[JSONTransfer], eventnames_dict: Dict[str,str
         
     return branching_events
 
-def createModel(jsonTransfers: List[JSONTransfer], globalJsonTransfer: JSONTransfer, model_settings: ModelSettings):
+def createModel(jsonTransfers: List[JSONTransfer], globalJsonTransfer: JSONTransfer, model_settings: ModelSettings, timer: StageTimer = None,
+                headless: bool = False):
     # We first create the nessesary variable names to be used in UPPAAL.
     eventnames_dict, amount_names, advance_channels, update_channels, backtrack_channels = calculate_relevant_mappings(jsonTransfers)
     name_amount_dict = model_settings.role_amount
@@ -203,13 +214,14 @@ def createModel(jsonTransfers: List[JSONTransfer], globalJsonTransfer: JSONTrans
                     max_time=0)
                 model_settings.time_json_transfer.event_time_data.append(etd)
 
-    analyzer = GraphAnalyser(all_events)
-    analysis_results = (analyzer.analyse_graph(globalJsonTransfer.initial))
+    with timed(timer, "analyse_graph"):
+        analyzer = GraphAnalyser(all_events)
+        analysis_results = (analyzer.analyse_graph(globalJsonTransfer.initial))
     non_exit_paths = analysis_results["non_exit_paths"]
     global_branching_events = analysis_results["branching_events"]
 
     # Set total amount of events
-    branching_events = enrich_json(jsonTransfers, eventnames_dict, non_exit_paths)
+    branching_events = enrich_json(jsonTransfers, eventnames_dict, non_exit_paths, timer)
 
     # set flag if any are using global events as bounds
     using_global_event_bound = False
@@ -372,10 +384,11 @@ def createModel(jsonTransfers: List[JSONTransfer], globalJsonTransfer: JSONTrans
 
     for jsonTransfer in jsonTransfers:
         role = None
-        if model_settings.time_json_transfer == None:
-            role = Role(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.path_bound, [])
-        else:
-            role = Role(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.path_bound, model_settings.time_json_transfer.event_time_data)
+        with timed(timer, "role"):
+            if model_settings.time_json_transfer == None:
+                role = Role(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.path_bound, [], timer, headless)
+            else:
+                role = Role(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.path_bound, model_settings.time_json_transfer.event_time_data, timer, headless)
         roles.append(role)
         names_roles_dict[jsonTransfer.name] = role
 
@@ -397,11 +410,12 @@ def createModel(jsonTransfers: List[JSONTransfer], globalJsonTransfer: JSONTrans
             declaration.add_variable(f"int maxUpdatesSincePropagation_{jsonTransfer.name} = 0;")
 
         log = None
-        if model_settings.time_json_transfer == None:
-            log = Log(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.log_size, model_settings.delay_type[jsonTransfer.name], using_global_event_bound, eventnames_dict)
-        else:
-            log_time_data_role = next((log_time_data for log_time_data in model_settings.time_json_transfer.log_time_data if log_time_data.role_name == jsonTransfer.name), None)
-            log = Log(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.log_size,model_settings.delay_type[jsonTransfer.name], using_global_event_bound, eventnames_dict, log_time_data_role)
+        with timed(timer, "log"):
+            if model_settings.time_json_transfer == None:
+                log = Log(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.log_size, model_settings.delay_type[jsonTransfer.name], using_global_event_bound, eventnames_dict)
+            else:
+                log_time_data_role = next((log_time_data for log_time_data in model_settings.time_json_transfer.log_time_data if log_time_data.role_name == jsonTransfer.name), None)
+                log = Log(amount_names[jsonTransfer.name] + " id", jsonTransfer, model_settings.log_size,model_settings.delay_type[jsonTransfer.name], using_global_event_bound, eventnames_dict, log_time_data_role)
         logs.append(log)
 
     return Model(declaration, roles, logs)
\ No newline at end of file
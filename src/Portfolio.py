@@ -0,0 +1,165 @@
+"""\
+Races several verifyta search strategies on the same query.
+Every strategy is started as its own verifyta process, the first one that reaches a
+conclusive answer wins and the remaining processes are killed.
+The winner of every race is appended to a log so good defaults can be found per protocol.
+
+"""
+
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from DataObjects.VerificationResult import VerificationResult
+from ResultCache import ResultCache
+from Verifier import OutputParser, ProcessUsage, get_cached_result, get_query_from_file, get_verifyta_options, put_cached_result, start_verifyta, stop_process, verifyta_options, wait_for_usage, work_folder_path
+
+portfolio_log_path = os.path.join(work_folder_path, "portfolio_log.jsonl")
+
+# Search order (-o) and state space reduction (-S) given to verifyta for each strategy, these replace a tuned profile
+portfolio_strategies: Dict[str, List[str]] = {
+    "bfs": ["-o", "0"],
+    "dfs": ["-o", "1"],
+    "random-dfs": ["-o", "2"],
+    "bfs-aggressive": ["-o", "0", "-S", "2"],
+    "dfs-no-reduction": ["-o", "1", "-S", "0"],
+}
+
+def is_conclusive(parser: OutputParser) -> bool:
+    return parser.verdict_found and not parser.error
+
+def read_strategy(name: str, process: subprocess.Popen, parser: OutputParser, finished: queue.Queue):
+    try:
+        for line in process.stdout:
+            if parser.feed(line):
+                break
+    except (OSError, ValueError):
+        pass # The stream is closed once the process is killed
+    finished.put(name)
+
+# Returns the name of the winning strategy (None if no strategy was conclusive), the parser of each strategy, the wall time
+# and the CPU time and memory of the winning verifyta process
+def race_query(model_path: str, query_path: str, verifyta_path: str, index: int,
+               strategies: Dict[str, List[str]]) -> Tuple[Optional[str], Dict[str, OutputParser], float, ProcessUsage]:
+    finished = queue.Queue()
+    processes: Dict[str, subprocess.Popen] = {}
+    parsers: Dict[str, OutputParser] = {}
+    threads: List[threading.Thread] = []
+    winner = None
+    usage = ProcessUsage()
+    start_time = time.perf_counter()
+
+    try:
+        for name, options in strategies.items():
+            command = [verifyta_path, model_path, query_path, "--query-index", f"{index}"] + verifyta_options + options
+            processes[name] = start_verifyta(command)
+            # Read until the statistics verifyta prints after the verdict
+            parsers[name] = OutputParser(expect_statistics=True)
+            thread = threading.Thread(target=read_strategy, args=(name, processes[name], parsers[name], finished), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for _ in range(len(processes)):
+            name = finished.get()
+            if is_conclusive(parsers[name]):
+                winner = name
+                break
+        elapsed = time.perf_counter() - start_time
+    finally:
+        # The winner is reaped with its resource usage, polling it first would lose the usage
+        if winner != None:
+            stop_process(processes[winner])
+            usage = wait_for_usage(processes[winner])
+        for name, process in processes.items():
+            if name != winner and process.poll() == None:
+                process.kill()
+        for thread in threads:
+            thread.join()
+        for process in processes.values():
+            process.stdout.close()
+            process.wait()
+
+    return winner, parsers, elapsed, usage
+
+def log_portfolio_result(model_path: str, query: str, winner: Optional[str], elapsed: float, strategies: Dict[str, List[str]], log_path: str = None):
+    if log_path == None:
+        log_path = portfolio_log_path
+    entry = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "model": os.path.abspath(model_path),
+        "query": query.strip(),
+        "winner": winner,
+        "wall_time": round(elapsed, 3),
+        "strategies": list(strategies.keys())
+    }
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'a') as file:
+            file.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write portfolio log: {e}")
+
+# Amount of races won by each strategy, optionally only for a single model
+def count_portfolio_wins(model_path: str = None, log_path: str = None) -> Dict[str, int]:
+    if log_path == None:
+        log_path = portfolio_log_path
+    wins = {}
+    if not os.path.exists(log_path):
+        return wins
+    with open(log_path, 'r') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("winner") == None:
+                continue
+            if model_path != None and entry.get("model") != os.path.abspath(model_path):
+                continue
+            wins[entry["winner"]] = wins.get(entry["winner"], 0) + 1
+    return wins
+
+def get_strategies(names: List[str] = None) -> Dict[str, List[str]]:
+    if names == None or len(names) == 0:
+        return portfolio_strategies
+    return {name: portfolio_strategies[name] for name in names}
+
+def run_query_portfolio(model_path: str, query_path: str, verifyta_path: str, index: int, cache: ResultCache = None, strategies: Dict[str, List[str]] = None) -> VerificationResult:
+    if strategies == None:
+        strategies = portfolio_strategies
+
+    query = ""
+    cache_key = None
+    try:
+        query = get_query_from_file(query_path, index)
+        if cache != None:
+            # The verdict does not depend on the search strategy so results are shared with single runs
+            cache_key = cache.get_key(model_path, query, verifyta_path, get_verifyta_options(model_path))
+    except OSError:
+        pass # Missing files are left for verifyta to report
+    if cache_key != None:
+        cached_result = get_cached_result(cache, cache_key, query)
+        if cached_result != None:
+            return cached_result
+
+    winner, parsers, elapsed, usage = race_query(model_path, query_path, verifyta_path, index, strategies)
+    log_portfolio_result(model_path, query, winner, elapsed, strategies)
+
+    if winner == None:
+        if len(parsers) > 0:
+            next(iter(parsers.values())).print_error()
+        return VerificationResult(query.strip(), wall_time=elapsed)
+
+    print(f"Strategy {winner} won after {elapsed:.2f} seconds")
+    result = parsers[winner].create_result(query, elapsed, usage)
+    if cache_key != None:
+        put_cached_result(cache, cache_key, result)
+    return result
+
+def verify_query_portfolio(model_path: str, query_path: str, verifyta_path: str, index: int, cache: ResultCache = None, strategies: Dict[str, List[str]] = None) -> str:
+    return run_query_portfolio(model_path, query_path, verifyta_path, index, cache, strategies).output
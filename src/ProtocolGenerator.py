@@ -0,0 +1,132 @@
+"""\
+Generates random well-formed swarm protocols for testing and benchmarking.
+A protocol is grown from the initial location as a sequence of commands where a location can branch into several
+alternatives, each continuing as its own part of the protocol, or start a loop returning to it before the protocol
+continues. Loops can be nested inside the body of other loops up to the loop depth.
+
+Every role emits at least one command when there are enough commands and commands are named after their role like the
+protocols in tests/integration/GeneratedTests. The same settings and seed always give the same protocol.
+
+"""
+
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from JSONParser import build_graph, create_JSONTransfer, generate_projection
+from WellFormedness import WellFormednessAnalyser
+
+max_attempts = 20 # Protocols that are not well-formed are generated again with the next random numbers
+max_loop_length = 3
+
+@dataclass
+class GeneratorSettings:
+    roles: int = 3
+    commands: int = 10
+    branch_fanout: int = 2 # Most alternatives of a branch, below two there are no branches
+    loop_depth: int = 1 # Most loops nested inside each other, zero means no loops
+    branch_probability: float = 0.15
+    loop_probability: float = 0.15
+    seed: Optional[int] = None
+
+class ProtocolGenerator:
+    def __init__(self, settings: GeneratorSettings, rng: random.Random):
+        self.settings = settings
+        self.rng = rng
+        self.transitions: List[Dict[str, Any]] = []
+        self.location_count = 0
+        self.role_names = [f"R{i}" for i in range(settings.roles)]
+        self.command_counts = {role: 0 for role in self.role_names}
+        # Every role gets a command first, the rest are spread randomly
+        self.unused_roles = self.role_names.copy()
+        rng.shuffle(self.unused_roles)
+
+    def new_location(self) -> str:
+        location = str(self.location_count)
+        self.location_count += 1
+        return location
+
+    def add_command(self, source: str, target: str):
+        role = self.unused_roles.pop() if self.unused_roles else self.rng.choice(self.role_names)
+        index = self.command_counts[role]
+        self.command_counts[role] += 1
+        self.transitions.append({
+            "label": {"cmd": f"{role}_cmd_{index}", "logType": [f"{role}_e_{index}"], "role": role},
+            "source": source,
+            "target": target
+        })
+
+    # Commands from the head back to it, nested loops start at locations inside the body. Returns the commands used
+    def add_loop(self, head: str, budget: int, depth: int) -> int:
+        length = self.rng.randint(1, max(1, min(budget, max_loop_length)))
+        used = 0
+        location = head
+        for i in range(length):
+            target = head if i == length - 1 else self.new_location()
+            self.add_command(location, target)
+            used += 1
+            # The next command of the body is the exit of the nested loop, the rest of the body is kept in the budget
+            nested_budget = budget - used - (length - i - 1)
+            if target != head and depth + 1 < self.settings.loop_depth and nested_budget > 0 and self.rng.random() < self.settings.loop_probability:
+                used += self.add_loop(target, nested_budget, depth + 1)
+            location = target
+        return used
+
+    # Grows the protocol from the location until the budget of commands is used
+    def add_block(self, location: str, budget: int):
+        while budget > 0:
+            choice = self.rng.random()
+            if choice < self.settings.branch_probability and self.settings.branch_fanout > 1 and budget >= 2:
+                alternatives = self.rng.randint(2, min(self.settings.branch_fanout, budget))
+                shares = [1] * alternatives
+                for _ in range(budget - alternatives):
+                    shares[self.rng.randrange(alternatives)] += 1
+                for share in shares:
+                    target = self.new_location()
+                    self.add_command(location, target)
+                    self.add_block(target, share - 1)
+                return
+            if choice < self.settings.branch_probability + self.settings.loop_probability and self.settings.loop_depth > 0 and budget >= 2:
+                budget -= self.add_loop(location, budget - 1, 0)
+
+            # Also the exit of a loop started at the location
+            target = self.new_location()
+            self.add_command(location, target)
+            location = target
+            budget -= 1
+
+    def generate(self) -> Dict[str, Any]:
+        initial = self.new_location()
+        self.add_block(initial, max(self.settings.commands, 1))
+        return {"initial": initial, "transitions": self.transitions}
+
+def is_well_formed(protocol: Dict[str, Any]) -> bool:
+    graph = build_graph(protocol["transitions"])
+    graph.initial = protocol["initial"]
+    json_transfers = []
+    for role in graph.get_role_names():
+        json_transfers.append(create_JSONTransfer(generate_projection(graph, role), role))
+    return len(WellFormednessAnalyser(create_JSONTransfer(graph, "GlobalProtocol"), json_transfers).analyse()) == 0
+
+def generate_protocol(settings: GeneratorSettings) -> Dict[str, Any]:
+    rng = random.Random(settings.seed)
+    for _ in range(max_attempts):
+        protocol = ProtocolGenerator(settings, rng).generate()
+        if is_well_formed(protocol):
+            return protocol
+    raise ValueError(f"Could not generate a well-formed protocol in {max_attempts} attempts with {settings}")
+
+def get_protocol_name(settings: GeneratorSettings) -> str:
+    return f"generated_{settings.roles}_roles_{settings.commands}_commands_{settings.seed}"
+
+# Writes the protocol into its own folder so it can be built like any other, the settings are kept next to it
+def write_protocol(protocol: Dict[str, Any], settings: GeneratorSettings, folder_path: str) -> str:
+    os.makedirs(folder_path, exist_ok=True)
+    file_path = os.path.join(folder_path, f"{get_protocol_name(settings)}.json")
+    with open(file_path, 'w') as file:
+        json.dump(protocol, file, indent=4)
+    with open(os.path.join(folder_path, "generator_settings.json"), 'w') as file:
+        file.write(json.dumps(asdict(settings)) + "\n")
+    return file_path
@@ -7,7 +7,7 @@ Some queries do not require any input and are therefore not part of the class fu
 from typing import Set, List, Dict
 
 from DataObjects.JSONTransfer import JSONTransfer
-from JSONParser import build_graph_internal, parse_protocol_JSON_file, parse_projection_JSON_file
+from JSONParser import build_graph_internal, find_reachable_edges, parse_protocol_JSON_file, parse_projection_JSON_file
 from Utils import Utils
 
 class QueryGenerator:
@@ -44,7 +44,16 @@ class QueryGenerator:
         self.protocol_data = global_json_transfer
         self.projection_data = json_transfers
 
-    def generate_end_state_query(self) -> str:
+    # For generating queries from protocols that are already parsed
+    @classmethod
+    def from_json_transfers(cls, global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer]) -> "QueryGenerator":
+        query_generator = cls.__new__(cls)
+        query_generator.protocol_data = global_json_transfer
+        query_generator.projection_data = json_transfers
+        return query_generator
+
+    # The locations of each role that are accepted as the end of a run
+    def find_end_locations(self) -> Dict[str, Set[str]]:
         graph_data = {}
         for projection_transfer in self.projection_data:
             graph_data[projection_transfer.name] = projection_transfer.own_events
@@ -68,21 +77,8 @@ class QueryGenerator:
                 else:
                     locations.add(current_target)
 
-        index = 'i'
-        map_role_index = {}
-
-        for role in graph.get_role_names():
-            map_role_index[role] = index
-            index = chr(ord(index) + 1)
-
-        deadlock_query = "A[] "
-        for role in map_role_index:
-            deadlock_query += f"forall({map_role_index[role]}: {role}_t) "
-
-        deadlock_query += "(deadlock and globalLog[logSize - 1].orderCount == 0) imply "
-
         role_end_state_dict = {}
-        for role in map_role_index:
+        for role in graph.get_role_names():
             role_end_state_dict[role] = set()
 
         for jsonTransfer in self.projection_data:
@@ -100,6 +96,24 @@ class QueryGenerator:
                 elif loc_is_end != None:
                     role_end_state_dict[jsonTransfer.name].add(event.target)
 
+        return role_end_state_dict
+
+    def generate_end_state_query(self) -> str:
+        role_end_state_dict = self.find_end_locations()
+
+        index = 'i'
+        map_role_index = {}
+
+        for role in role_end_state_dict:
+            map_role_index[role] = index
+            index = chr(ord(index) + 1)
+
+        deadlock_query = "A[] "
+        for role in map_role_index:
+            deadlock_query += f"forall({map_role_index[role]}: {role}_t) "
+
+        deadlock_query += "(deadlock and globalLog[logSize - 1].orderCount == 0) imply "
+
         for role in map_role_index:
             current_index = map_role_index[role]
             current_role_addition = "("
@@ -117,8 +131,31 @@ class QueryGenerator:
     def generate_sizebound_query(self) -> str:
         return "sup: globalLogIndex"
     
-    def generate_timebound_queries(self) -> Dict[str,str]:
+    # Locations that cannot be reached from the initial location of a projection, even without time.
+    # Projections generated from the protocol only hold locations reached from their initial location, so only
+    # hand-written projection files can have such locations. Locations only unreachable because of time are left to verifyta
+    def find_unreachable_locations(self) -> Dict[str, Set[str]]:
+        role_unreachable_dict = {}
+        for projection_json_transfer in self.projection_data:
+            all_events = projection_json_transfer.own_events.copy()
+            all_events.extend(projection_json_transfer.other_events)
+
+            graph = build_graph_internal({projection_json_transfer.name: all_events})
+            reachable = {projection_json_transfer.initial}
+            for edge in find_reachable_edges(graph, projection_json_transfer.initial):
+                reachable.add(edge.target)
+
+            locations = {event.source for event in all_events} | {event.target for event in all_events}
+            role_unreachable_dict[projection_json_transfer.name] = locations - reachable
+
+        return role_unreachable_dict
+
+    # Locations given as unreachable for a role get no query
+    def generate_timebound_queries(self, role_unreachable_dict: Dict[str, Set[str]] = None) -> Dict[str, List[str]]:
         role_queries_dict = {}
+        if role_unreachable_dict == None:
+            role_unreachable_dict = {}
+
         for projection_json_transfer in self.projection_data:
             role_queries_dict[projection_json_transfer.name] = []
             all_events = projection_json_transfer.own_events.copy()
@@ -128,6 +165,7 @@ class QueryGenerator:
             for event in all_events:
                 locations.add(event.source)
                 locations.add(event.target)
+            locations -= role_unreachable_dict.get(projection_json_transfer.name, set())
             
             for location in sorted(locations):
                 # bounds{R(0).l4}: globalTime
@@ -0,0 +1,221 @@
+"""\
+Explicit state reachability checking of untimed models in Python.
+For small swarms starting verifyta and compiling the model takes longer than exploring it, so the states
+of the simulator are explored exhaustively instead, breadth first or depth first. A state is the packed
+encoding of the simulator between steps compressed with zlib, which is mostly empty log entries and
+compresses to about a tenth, so storing it is cheap and it can be hashed directly.
+
+A single exploration answers the queries QueryGenerator creates for end state validity, overflow and the
+size bound together with any number of log queries. Clocks are not part of the state, models with timing
+constraints have to be verified by verifyta.
+
+"""
+
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import sys
+import time
+import zlib
+from typing import Dict, List, Optional, Set
+
+from DataObjects.JSONTransfer import JSONTransfer
+from DataObjects.ModelSettings import ModelSettings
+from DataObjects.VerificationResult import VerificationResult, VERDICT_ERROR, VERDICT_NOT_SATISFIED, VERDICT_SATISFIED
+from QueryGenerator import QueryGenerator, generate_log_query
+from Simulator import OUTCOME_DEADLOCK, OUTCOME_END, OUTCOME_ERROR, OUTCOME_OVERFLOW, SimulationModel, SwarmSimulation
+
+# Replays the given choices and takes the first option after them, remembering how many options each choice had
+class ScriptedChoices:
+    def __init__(self, script: List[int]):
+        self.script = script
+        self.made: List[int] = []
+        self.option_amounts: List[int] = []
+
+    def choice(self, options: list):
+        index = self.script[len(self.made)] if len(self.made) < len(self.script) else 0
+        self.made.append(index)
+        self.option_amounts.append(len(options))
+        return options[index]
+
+@dataclass
+class ExplorationStats:
+    states: int = 0
+    transitions: int = 0
+    elapsed: float = 0.0
+    bytes_per_state: float = 0.0 # Memory of the stored states including the set holding them
+    complete: bool = True # False if the state limit was reached or an error stopped the exploration
+    outcomes: Counter = field(default_factory=Counter)
+
+    @property
+    def states_per_second(self) -> float:
+        return self.states / max(self.elapsed, 1e-9)
+
+def format_stats(stats: ExplorationStats) -> str:
+    result = (f"Explored {stats.states} states and {stats.transitions} transitions in {stats.elapsed:.2f}s "
+              f"({stats.states_per_second:.0f} states/s, {stats.bytes_per_state:.0f} bytes per state)")
+    if not stats.complete:
+        result += ", exploration was not completed"
+    return result
+
+def pack_state(simulation: SwarmSimulation) -> bytes:
+    return zlib.compress(simulation.encode(), 1)
+
+def unpack_state(model: SimulationModel, state: bytes, choices: ScriptedChoices) -> SwarmSimulation:
+    return SwarmSimulation.decode(model, zlib.decompress(state), choices)
+
+# Location names as they are shown in the model
+def get_model_location(location: str) -> str:
+    return "l" + location if location[0].isdigit() else location
+
+class ReachabilityChecker:
+    def __init__(self, global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer], model_settings: ModelSettings):
+        self.model = SimulationModel(global_json_transfer, json_transfers, model_settings)
+        self.query_generator = QueryGenerator.from_json_transfers(global_json_transfer, json_transfers)
+        self.end_locations = self.query_generator.find_end_locations()
+        self.event_ids = {event_name: event_id for event_id, event_name in enumerate(self.model.event_names)}
+        self.stats = ExplorationStats()
+
+    # Every state reached by taking the action, internal choices of the model included.
+    # The given simulation of the state is used for the first successor
+    def get_successors(self, state: bytes, action: tuple, simulation: SwarmSimulation = None):
+        scripts = [[]]
+        while scripts:
+            script = scripts.pop()
+            choices = ScriptedChoices(script)
+            if simulation != None:
+                simulation.rng = choices
+            else:
+                simulation = unpack_state(self.model, state, choices)
+            outcome = simulation.apply(action)
+            for i in range(len(script), len(choices.made)):
+                for alternative in range(1, choices.option_amounts[i]):
+                    scripts.append(choices.made[:i] + [alternative])
+            yield outcome, simulation
+            simulation = None
+
+    # Locations of the roles not at an end location, empty if the state is a valid end state
+    def get_invalid_locations(self, simulation: SwarmSimulation) -> List[str]:
+        invalid = []
+        for log_state in simulation.logs:
+            location = get_model_location(log_state.location)
+            if location not in self.end_locations.get(log_state.role.name, set()):
+                invalid.append(f"{log_state.role.name}({log_state.instance}).{location}")
+        return invalid
+
+    def get_log_event_ids(self, log: List) -> tuple:
+        event_ids = []
+        for entry in log:
+            if entry.order_count == 0:
+                break
+            event_ids.append(entry.event_id)
+        return tuple(event_ids)
+
+    # Explores every state and returns a result per query, the end state, overflow and size bound queries come first
+    def check(self, logs: List[List[str]] = [], valid_only: bool = False, depth_first: bool = False,
+              max_states: Optional[int] = None) -> List[VerificationResult]:
+        start_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        stats = ExplorationStats()
+        self.stats = stats
+
+        pending_logs: Dict[tuple, List[int]] = {}
+        unknown_events: Dict[int, str] = {}
+        for log_index, log in enumerate(logs):
+            unknown = [event_name for event_name in log if event_name not in self.event_ids]
+            if unknown or len(log) == 0:
+                unknown_events[log_index] = ", ".join(unknown)
+            else:
+                pending_logs.setdefault(tuple(self.event_ids[event_name] for event_name in log), []).append(log_index)
+        found_logs: Set[int] = set()
+
+        invalid_end_state: Optional[List[str]] = None
+        overflow_found = False
+        size_bound = 0
+
+        def visit(simulation: SwarmSimulation):
+            nonlocal size_bound
+            size_bound = max(size_bound, simulation.global_log_index)
+            if pending_logs:
+                event_ids = self.get_log_event_ids(simulation.true_global_log if valid_only else simulation.global_log)
+                for log_event_ids in [log_event_ids for log_event_ids in pending_logs if event_ids[:len(log_event_ids)] == log_event_ids]:
+                    found_logs.update(pending_logs.pop(log_event_ids))
+
+        initial = SwarmSimulation(self.model, ScriptedChoices([]))
+        initial_state = pack_state(initial)
+        visited = {initial_state}
+        frontier = deque([initial_state])
+        visit(initial)
+
+        stopped = False
+        while frontier and not stopped:
+            if max_states != None and len(visited) >= max_states:
+                stats.complete = False
+                break
+            state = frontier.pop() if depth_first else frontier.popleft()
+            simulation = unpack_state(self.model, state, ScriptedChoices([]))
+            actions = simulation.get_actions()
+            if len(actions) == 0:
+                stats.outcomes[OUTCOME_END] += 1
+                if invalid_end_state == None and len(self.get_invalid_locations(simulation)) > 0:
+                    invalid_end_state = self.get_invalid_locations(simulation)
+                continue
+
+            for action_index, action in enumerate(actions):
+                if stopped:
+                    break
+                for outcome, successor in self.get_successors(state, action, simulation if action_index == 0 else None):
+                    stats.transitions += 1
+                    successor_state = pack_state(successor)
+                    if successor_state in visited:
+                        continue
+                    visited.add(successor_state)
+                    visit(successor)
+                    if outcome == None:
+                        frontier.append(successor_state)
+                        continue
+
+                    stats.outcomes[outcome] += 1
+                    if outcome == OUTCOME_OVERFLOW:
+                        overflow_found = True
+                    elif outcome == OUTCOME_DEADLOCK and invalid_end_state == None and len(self.get_invalid_locations(successor)) > 0:
+                        invalid_end_state = self.get_invalid_locations(successor)
+                    elif outcome == OUTCOME_ERROR:
+                        stats.complete = False # Like verifyta the exploration stops at an out of range array access
+                        stopped = True
+                        break
+
+        stats.states = len(visited)
+        stats.elapsed = time.perf_counter() - start_time
+        stats.bytes_per_state = (sys.getsizeof(visited) + sum(sys.getsizeof(state) for state in visited)) / len(visited)
+        cpu_time = time.process_time() - start_cpu_time
+
+        queries = [self.query_generator.generate_end_state_query(), self.query_generator.generate_overflow_query(),
+                   self.query_generator.generate_sizebound_query()] + [generate_log_query(log, valid_only) for log in logs]
+
+        def create_result(index: int, verdict: str, output: str = "", result_value: int = None) -> VerificationResult:
+            if output == "":
+                output = "Query was satisfied \n" if verdict == VERDICT_SATISFIED else "Query not satisfied \n"
+            if verdict == VERDICT_ERROR:
+                output = ""
+            return VerificationResult(queries[index], verdict, result_value=result_value, wall_time=stats.elapsed, cpu_time=cpu_time,
+                                      states_explored=stats.transitions, states_stored=stats.states, batch_size=len(queries), output=output)
+
+        results = []
+        if invalid_end_state != None:
+            results.append(create_result(0, VERDICT_NOT_SATISFIED, f"Query not satisfied \nEnd state: {', '.join(invalid_end_state)}\n"))
+        else:
+            results.append(create_result(0, VERDICT_SATISFIED if stats.complete else VERDICT_ERROR))
+        if overflow_found:
+            results.append(create_result(1, VERDICT_NOT_SATISFIED))
+        else:
+            results.append(create_result(1, VERDICT_SATISFIED if stats.complete else VERDICT_ERROR))
+        results.append(create_result(2, VERDICT_SATISFIED if stats.complete else VERDICT_ERROR, result_value=size_bound if stats.complete else None))
+
+        for log_index in range(len(logs)):
+            if log_index in unknown_events:
+                results.append(create_result(log_index + 3, VERDICT_ERROR))
+            elif log_index in found_logs:
+                results.append(create_result(log_index + 3, VERDICT_SATISFIED))
+            else:
+                results.append(create_result(log_index + 3, VERDICT_NOT_SATISFIED if stats.complete else VERDICT_ERROR))
+        return results
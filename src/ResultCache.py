@@ -0,0 +1,180 @@
+"""\
+Persistent on-disk cache of verification results.
+Each result is stored under a hash of the model with its layout stripped, the query,
+the verifyta path and version and the command line options given to verifyta.
+So moving locations around in the UPPAAL GUI or rebuilding an unchanged protocol
+does not invalidate earlier results.
+
+Least recently used entries are evicted once the cache grows beyond its size limit.
+The size of the cache is kept as a running total of the writes of this process, the
+folder is only scanned on the first write and when the total goes over the limit.
+Entries written by other processes are therefore counted at the next scan.
+
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+cache_folder_path = os.path.join(base_path, "PermanentState", "cache") # Hardcoded folder for cached results
+default_max_size_mb = 256
+
+# Coordinates written by the layout of roles and logs, they do not change the semantics of the model
+layout_attribute_pattern = re.compile(r'\s[xy]="-?\d+"')
+nail_pattern = re.compile(r'<nail\s[^>]*/>')
+
+def strip_layout(xml_data: str) -> str:
+    xml_data = nail_pattern.sub("", xml_data)
+    return layout_attribute_pattern.sub("", xml_data)
+
+def get_file_signature(file_path: str) -> Tuple[str, int, int]:
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+class ResultCache:
+    # Memorised per process so a model or verifyta is only hashed or asked for its version once
+    _model_hashes: Dict[Tuple[str, int, int], str] = {}
+    _verifyta_versions: Dict[Tuple[str, int, int], str] = {}
+
+    def __init__(self, folder_path: str = cache_folder_path, max_size_mb: int = default_max_size_mb):
+        self.folder_path = folder_path
+        self.max_size = max_size_mb * 1024 * 1024
+        self.total_size: Optional[int] = None # Unknown until the first write scans the folder
+        self.size_lock = threading.Lock()
+
+    def get_model_hash(self, model_path: str) -> str:
+        signature = get_file_signature(model_path)
+        if signature not in ResultCache._model_hashes:
+            with open(model_path, 'r', encoding='utf-8') as file:
+                xml_data = file.read()
+            ResultCache._model_hashes[signature] = hashlib.sha256(strip_layout(xml_data).encode('utf-8')).hexdigest()
+        return ResultCache._model_hashes[signature]
+
+    def get_verifyta_version(self, verifyta_path: str) -> str:
+        signature = get_file_signature(verifyta_path)
+        if signature not in ResultCache._verifyta_versions:
+            result = subprocess.run([verifyta_path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            ResultCache._verifyta_versions[signature] = result.stdout.strip()
+        return ResultCache._verifyta_versions[signature]
+
+    def get_key(self, model_path: str, query: str, verifyta_path: str, options: List[str]) -> str:
+        key_data = {
+            "model": self.get_model_hash(model_path),
+            "query": query.strip(),
+            "verifyta_path": os.path.abspath(verifyta_path),
+            "verifyta_version": self.get_verifyta_version(verifyta_path),
+            "options": options
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.folder_path, f"{key}.json")
+
+    # An entry holds the query, the filtered result and optionally the full record of the verification
+    def get_entry(self, key: str) -> Optional[Dict]:
+        entry_path = self.get_entry_path(key)
+        try:
+            with open(entry_path, 'r') as file:
+                entry = json.load(file)
+            os.utime(entry_path) # Mark as recently used
+            return entry if "result" in entry else None
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry["result"] if entry != None else None
+
+    def put(self, key: str, query: str, result: str, record: Dict = None):
+        os.makedirs(self.folder_path, exist_ok=True)
+        entry_path = self.get_entry_path(key)
+        try:
+            old_size = os.path.getsize(entry_path) # Overwritten entries only count once
+        except FileNotFoundError:
+            old_size = 0
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        entry = {"query": query.strip(), "result": result}
+        if record != None:
+            entry["record"] = record
+        with open(temp_path, 'w') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, entry_path) # Atomic so parallel jobs never read half written entries
+        self.add_size(os.path.getsize(entry_path) - old_size)
+
+    # Keeps the running total up to date, the folder is only scanned when the total goes over the size limit
+    def add_size(self, size: int):
+        with self.size_lock:
+            if self.total_size == None:
+                self.total_size = sum(size for _, size, _ in self.scan_entries()) # Includes the entry just written
+            else:
+                self.total_size += size
+            if self.total_size <= self.max_size:
+                return
+        self.evict()
+
+    def scan_entries(self) -> List[Tuple[int, int, str]]:
+        entries = []
+        with os.scandir(self.folder_path) as iterator:
+            for entry in iterator:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    # Removes least recently used entries until the cache is within its size limit
+    def evict(self):
+        with self.size_lock:
+            entries = self.scan_entries()
+            total_size = sum(size for _, size, _ in entries)
+            if total_size > self.max_size:
+                entries.sort()
+                for _, size, entry_path in entries:
+                    try:
+                        os.remove(entry_path)
+                    except FileNotFoundError:
+                        pass
+                    total_size -= size
+                    if total_size <= self.max_size:
+                        break
+            self.total_size = total_size
+
+# Keeps results in memory in front of the disk cache, used by long running processes such as the daemon
+class MemoryResultCache(ResultCache):
+    def __init__(self, folder_path: str = cache_folder_path, max_size_mb: int = default_max_size_mb, max_entries: int = 10000):
+        super().__init__(folder_path, max_size_mb)
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, key: str, entry: Dict):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = entry
+            if len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))] # Dictionaries keep insertion order so this is the oldest
+
+    def get_entry(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry == None:
+            entry = super().get_entry(key)
+            if entry == None:
+                self.misses += 1
+                return None
+        self.remember(key, entry) # Marks it as recently used
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, query: str, result: str, record: Dict = None):
+        entry = {"query": query.strip(), "result": result}
+        if record != None:
+            entry["record"] = record
+        self.remember(key, entry)
+        super().put(key, query, result, record)
@@ -8,49 +8,29 @@ from typing import List
 
 import math
 
-from graphviz import Digraph
 from DataObjects.Declaration import Declaration
 from DataObjects.Transition import Transition
 from DataObjects.Location import Location, LocationType
 from DataObjects.JSONTransfer import JSONTransfer, EventData
 from DataObjects.TimeJSONTransfer import EventTimeData
+from Layout import layered_layout
 from Template import Template
+from Timing import StageTimer, timed
 from Utils import Utils
 
+grid_spacing = 200 # Distance between locations of a headless build
+
 class Role(Template):
 
     def get_evetname_loopcounter(self):
         return self.evetname_loopcounter
 
-    # Using graphViz to space out locations and edges in UPPAAL to get somewhat more readable models
-    # Only important when directly using the UPPAAL UI.
-    def graphViz_helper(self, locations: List[Location], transitions: List[Transition]):
-        graph = Digraph()
-
-
-        for loc in locations:
-            graph.node(str(loc.id), label=str(loc.id))
-        
-        for transition in transitions:
-            if transition.source.id != transition.target.id:
-                graph.node(str(transition.id), label=str(transition.id))
-                graph.edge(str(transition.source.id), str(transition.id), label=str(transition.id) + "_to")
-                graph.edge(str(transition.id), str(transition.target.id), label=str(transition.id) + "_from")
-        
-        layout_info = graph.pipe(format='plain').decode('utf-8')
-
-        for line in layout_info.splitlines():
-            parts = line.split()
-            if line.startswith('node'):
-                node_id = parts[1]
-                x, y = float(parts[2]), float(parts[3])
-                if any(location.id == int(node_id) for location in locations):
-                    current_l = next((loc for loc in locations if loc.id == int(node_id)), None)
-                    current_l.x = math.floor(x * 100)
-                    current_l.y = math.floor(y * 100)
-                else:
-                    current_t = next((tran for tran in transitions if tran.id == int(node_id)), None)
-                    current_t.nails = [(math.floor(float(x) * 100 ), math.floor(float(y) * 100 ))]
+    # Headless builds place the locations on a grid by name, the model is the same apart from its layout
+    def grid_layout(self, locations: List[Location]):
+        columns = max(1, math.ceil(math.sqrt(len(locations))))
+        for i, location in enumerate(sorted(locations, key=lambda location: location.name)):
+            location.x = (i % columns) * grid_spacing
+            location.y = (i // columns) * grid_spacing
 
     def find_location(self, name: str, locations: List[Location]):
         return next((loc for loc in locations if loc.name == name), None)
@@ -59,7 +39,8 @@ class Role(Template):
          return [event.event_name for event in events if event.source == source]
 
 
-    def __init__(self, parameter: str, jsonTransfer: JSONTransfer, path_bound: int, time_data_list: List[EventTimeData]):
+    def __init__(self, parameter: str, jsonTransfer: JSONTransfer, path_bound: int, time_data_list: List[EventTimeData], timer: StageTimer = None,
+                 headless: bool = False):
         name = jsonTransfer.name
         self.evetname_loopcounter = {}
 
@@ -227,6 +208,11 @@ class Role(Template):
 
                         branch_location.invariant = invariant_result
 
-        self.graphViz_helper(locations, transitions)
+        # Spacing out locations and edges to get somewhat more readable models, only important when using the UPPAAL UI
+        if headless:
+            self.grid_layout(locations)
+        else:
+            with timed(timer, "layout"):
+                layered_layout(locations, transitions, linitial)
 
         super().__init__(name, parameter, declaration, locations, linitial, transitions)
@@ -0,0 +1,780 @@
+"""\
+Runs random executions of a swarm in Python without building the UPPAAL model.
+The tables of the model are computed the same way ModelBuilder does and the UPPAAL functions
+used by the log templates (merging propagated logs, branch competition, backtracking and the
+true global log) are ported one to one, so a simulation follows the same semantics as the model.
+
+Every step either lets a role instance emit one of its events or lets a log with new events propagate.
+The committed parts of the templates that follow (forced propagation, forwarding a propagated log
+around the ring of logs and updating the roles) are executed as part of the same step.
+Clocks are not simulated so timed models are simulated as if every timing was possible.
+
+"""
+
+from array import array
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from DataObjects.JSONTransfer import JSONTransfer
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from GraphAnalyser import GraphAnalyser
+from ModelBuilder import calculate_relevant_mappings, create_flow_list, enrich_json, get_branching_partitions
+from Utils import Utils
+
+OUTCOME_END = "end state"
+OUTCOME_OVERFLOW = "overflow"
+OUTCOME_DEADLOCK = "deadlock"
+OUTCOME_ERROR = "error"
+OUTCOME_STEP_LIMIT = "step limit"
+
+class SimulationStopped(Exception):
+    def __init__(self, outcome: str, message: str = ""):
+        super().__init__(message)
+        self.outcome = outcome
+
+class Entry:
+    __slots__ = ("event_id", "emitter_id", "order_count", "based_on", "tied_to", "ignored")
+
+    def __init__(self, event_id: int = 0, emitter_id: int = 0, order_count: int = 0, based_on: int = 0, tied_to: int = 0, ignored: bool = False):
+        self.event_id = event_id
+        self.emitter_id = emitter_id
+        self.order_count = order_count
+        self.based_on = based_on
+        self.tied_to = tied_to
+        self.ignored = ignored
+
+    def copy(self) -> "Entry":
+        return Entry(self.event_id, self.emitter_id, self.order_count, self.based_on, self.tied_to, self.ignored)
+
+    def to_ints(self) -> tuple:
+        return (self.event_id, self.emitter_id, self.order_count, self.based_on, self.tied_to, self.ignored)
+
+EMPTY_ENTRY = Entry() # Entries in a log are never changed in place so the empty entry can be shared
+
+def is_int_in_list(values: List[int], possible_entry: int) -> bool:
+    for value in values:
+        if value == possible_entry:
+            return True
+        elif value == 0:
+            return False
+    return False
+
+def add_int_to_list(values: List[int], new_entry: int):
+    for i in range(len(values)):
+        if values[i] == 0:
+            values[i] = new_entry
+            return
+
+def is_order_count_in_log(log: List[Entry], possible_entry: int) -> bool:
+    for entry in log:
+        if entry.order_count == possible_entry:
+            return True
+        elif entry.order_count == 0:
+            return False
+    return False
+
+# The log being built and what is needed to decide if an event is accepted into it
+@dataclass
+class EventTracker:
+    res_log: List[Entry]
+    discarded: List[int]
+    competition: List[int]
+    current_index: int
+    current_location: int
+    location_map: List[List[int]]
+
+@dataclass
+class SimulatedRole:
+    name: str
+    initial: str
+    locations: List[str]
+    location_index: Dict[str, int]
+    own_targets: Dict[str, Dict[int, List[tuple[str, bool]]]] # location -> event -> targets of emitting it and if the path bound applies
+    advance_targets: Dict[str, Dict[int, List[str]]] # location -> event -> targets of reading it
+    reset_targets: Dict[str, Dict[int, List[str]]] # location -> event -> sources of backtracking it
+    subscriptions: set
+    initial_pointer: int
+    flow_list: List[List[int]]
+    max_updates: int
+    events_emitted_delay: bool # Propagation bound by global events (DelayType E)
+
+class LogState:
+    def __init__(self, role: SimulatedRole, instance: int, id_start: int, log_size: int):
+        self.role = role
+        self.instance = instance
+        self.id_start = id_start
+        self.location = role.initial # Location of the role template
+        self.current_log = [EMPTY_ENTRY] * log_size
+        self.updates_since_propagation = 0
+        self.new_updates = False
+        self.counter = 0
+        self.emitted_order_counts = [0] * log_size
+        self.in_competition = False
+        self.did_log_change = False
+        self.current_size_of_log = 0
+        self.un_sub_count = [0] * log_size
+        self.discarded_event_ids = [-1] * log_size
+        self.reset_count = 0
+        self.events_to_read = 0
+        self.tracker = EventTracker(self.current_log, [0] * log_size, [0] * log_size, 0, role.initial_pointer, role.flow_list)
+
+# Everything of the model that does not change while simulating
+class SimulationModel:
+    def __init__(self, global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer], model_settings: ModelSettings):
+        self.log_size = model_settings.log_size
+        self.branch_tracking = model_settings.branch_tracking
+        self.path_bound = model_settings.path_bound
+
+        eventnames_dict, _, _, _, _ = calculate_relevant_mappings(json_transfers)
+        all_events = global_json_transfer.own_events + global_json_transfer.other_events
+        analyzer = GraphAnalyser(all_events)
+        analysis_results = analyzer.analyse_graph(global_json_transfer.initial)
+        branching_events = enrich_json(json_transfers, eventnames_dict, analysis_results["non_exit_paths"])
+        tiedto_dict = analyzer.find_tiedto(analysis_results["branching_events"])
+
+        eventname_to_UID_dict = {}
+        self.event_names = []
+        self.events_tied_to = []
+        for counter, event_key in enumerate(eventnames_dict):
+            eventname_to_UID_dict[eventnames_dict[event_key]] = counter
+            self.event_names.append(event_key)
+        for event_key in eventnames_dict:
+            self.events_tied_to.append([eventname_to_UID_dict[Utils.get_eventtype_UID(event.event_name)] for event in tiedto_dict[event_key]])
+
+        self.branching_list, self.is_branching, self.partition_of = get_branching_partitions(branching_events, eventname_to_UID_dict)
+        if len(self.branching_list) == 0:
+            self.branching_list = [[-1]]
+        self.global_pointer, self.global_flow_list = create_flow_list(global_json_transfer, eventname_to_UID_dict)
+        self.using_global_event_bound = any(delay_type == DelayType.EVENTS_EMITTED for delay_type in model_settings.delay_type.values())
+
+        # Instances are numbered in the order of the role amounts like the model does
+        json_transfer_dict = {json_transfer.name: json_transfer for json_transfer in json_transfers}
+        self.instances: List[tuple[SimulatedRole, int, int]] = []
+        for name, amount in model_settings.role_amount.items():
+            role = self.create_role(json_transfer_dict[name], eventname_to_UID_dict, model_settings)
+            id_start = len(self.instances)
+            for instance in range(amount):
+                self.instances.append((role, instance, id_start))
+
+    def create_role(self, json_transfer: JSONTransfer, eventname_to_UID_dict: Dict[str, int], model_settings: ModelSettings) -> SimulatedRole:
+        def get_UID(event_name: str) -> int:
+            return eventname_to_UID_dict[Utils.get_eventtype_UID(event_name)]
+
+        own_targets, advance_targets, reset_targets = {}, {}, {}
+        for event in json_transfer.own_events + json_transfer.other_events:
+            advance_targets.setdefault(event.source, {}).setdefault(get_UID(event.event_name), []).append(event.target)
+            reset_targets.setdefault(event.target, {}).setdefault(get_UID(event.event_name), []).append(event.source)
+            if event in json_transfer.own_events:
+                bounded = event in json_transfer.non_exit_events and self.path_bound > -1
+                own_targets.setdefault(event.source, {}).setdefault(get_UID(event.event_name), []).append((event.target, bounded))
+
+        locations = {json_transfer.initial}
+        for event in json_transfer.own_events + json_transfer.other_events:
+            locations.update((event.source, event.target))
+
+        initial_pointer, flow_list = create_flow_list(json_transfer, eventname_to_UID_dict)
+        delay_type = model_settings.delay_type[json_transfer.name]
+        max_updates = 0 if delay_type == DelayType.NOTHING else model_settings.delay_amount[json_transfer.name]
+        return SimulatedRole(
+            name=json_transfer.name,
+            initial=json_transfer.initial,
+            locations=sorted(locations),
+            location_index={location: index for index, location in enumerate(sorted(locations))},
+            own_targets=own_targets,
+            advance_targets=advance_targets,
+            reset_targets=reset_targets,
+            subscriptions={get_UID(subscription) for subscription in json_transfer.subscriptions},
+            initial_pointer=initial_pointer,
+            flow_list=flow_list,
+            max_updates=max_updates,
+            events_emitted_delay=delay_type == DelayType.EVENTS_EMITTED and self.using_global_event_bound
+        )
+
+class SwarmSimulation:
+    def __init__(self, model: SimulationModel, rng: random.Random):
+        self.model = model
+        self.rng = rng
+        log_size = model.log_size
+        self.logs = [LogState(role, instance, id_start, log_size) for role, instance, id_start in model.instances]
+        self.non_exit_counter = [Counter() for _ in self.logs]
+        self.forced_to_propagate = [False] * len(self.logs)
+
+        self.event_order_counter = 1
+        self.temp_entry = Entry()
+        self.propagation_log = [EMPTY_ENTRY] * log_size
+        self.global_log = [EMPTY_ENTRY] * log_size
+        self.global_log_index = 0
+        self.true_global_log = [EMPTY_ENTRY] * log_size
+        self.true_tracker = EventTracker(self.true_global_log, [0] * log_size, [0] * log_size, -1, model.global_pointer, model.global_flow_list)
+        self.current_log_to_propagate = 0
+        self.amount_of_propagation = 0
+
+    # The state between steps packed into 16 bit integers, the committed intermediate states of the model are not part of it
+    def encode(self) -> bytes:
+        values = [self.event_order_counter, self.global_log_index, self.current_log_to_propagate, self.amount_of_propagation]
+        for log in [self.global_log, self.true_global_log]:
+            for entry in log:
+                values += entry.to_ints()
+        for tracker in [self.true_tracker] + [log_state.tracker for log_state in self.logs]:
+            values += tracker.discarded
+            values += tracker.competition
+            values += (tracker.current_index, tracker.current_location)
+        for log_index, log_state in enumerate(self.logs):
+            values += (log_state.role.location_index[log_state.location], log_state.updates_since_propagation, log_state.new_updates,
+                       log_state.counter, log_state.in_competition, log_state.did_log_change, log_state.current_size_of_log,
+                       log_state.reset_count, log_state.events_to_read)
+            for entry in log_state.current_log:
+                values += entry.to_ints()
+            values += log_state.emitted_order_counts
+            values += log_state.un_sub_count
+            values += log_state.discarded_event_ids
+            non_exit_counter = self.non_exit_counter[log_index]
+            values += [non_exit_counter[event_id] for event_id in range(len(self.model.event_names))]
+        return array('h', values).tobytes()
+
+    @staticmethod
+    def decode(model: SimulationModel, data: bytes, rng) -> "SwarmSimulation":
+        simulation = SwarmSimulation(model, rng)
+        packed = array('h')
+        packed.frombytes(data)
+        values = packed.tolist()
+        position = 0
+        log_size = model.log_size
+
+        def take(amount: int) -> List[int]:
+            nonlocal position
+            position += amount
+            return values[position - amount:position]
+
+        def take_log() -> List[Entry]:
+            nonlocal position
+            log = []
+            for i in range(position, position + 6 * log_size, 6):
+                if values[i + 2] == 0 and values[i] == 0:
+                    log.append(EMPTY_ENTRY)
+                else:
+                    log.append(Entry(values[i], values[i + 1], values[i + 2], values[i + 3], values[i + 4], values[i + 5] != 0))
+            position += 6 * log_size
+            return log
+
+        simulation.event_order_counter, simulation.global_log_index, simulation.current_log_to_propagate, simulation.amount_of_propagation = take(4)
+        simulation.global_log = take_log()
+        simulation.true_global_log = take_log()
+        simulation.true_tracker.res_log = simulation.true_global_log
+        for tracker in [simulation.true_tracker] + [log_state.tracker for log_state in simulation.logs]:
+            tracker.discarded = take(log_size)
+            tracker.competition = take(log_size)
+            tracker.current_index, tracker.current_location = take(2)
+        for log_index, log_state in enumerate(simulation.logs):
+            (location, log_state.updates_since_propagation, new_updates, log_state.counter, in_competition, did_log_change,
+             log_state.current_size_of_log, log_state.reset_count, log_state.events_to_read) = take(9)
+            log_state.location = log_state.role.locations[location]
+            log_state.new_updates = new_updates != 0
+            log_state.in_competition = in_competition != 0
+            log_state.did_log_change = did_log_change != 0
+            log_state.current_log = take_log()
+            log_state.tracker.res_log = log_state.current_log
+            log_state.emitted_order_counts = take(log_size)
+            log_state.un_sub_count = take(log_size)
+            log_state.discarded_event_ids = take(log_size)
+            simulation.non_exit_counter[log_index] = Counter({event_id: amount for event_id, amount in enumerate(take(len(model.event_names))) if amount != 0})
+        return simulation
+
+    # Helpers of the UPPAAL functions
+
+    def get_order_count(self) -> int:
+        order_count = self.event_order_counter
+        self.event_order_counter += 1
+        return order_count
+
+    def get_entry_from_order_count(self, order_count: int) -> Entry:
+        for entry in self.global_log:
+            if entry.order_count == order_count:
+                return entry.copy()
+        return self.global_log[-1].copy()
+
+    def get_event_id_from_order_count(self, order_count: int) -> int:
+        for entry in self.global_log:
+            if entry.order_count == order_count:
+                return entry.event_id
+        return -1
+
+    def get_partition(self, event_id: int) -> int:
+        if event_id < 0:
+            raise SimulationStopped(OUTCOME_ERROR, "Array index out of range in isInBranchingPartion")
+        return self.model.partition_of[event_id]
+
+    def is_in_branching_conflict(self, partition: int, event_id: int) -> bool:
+        if partition < 0:
+            raise SimulationStopped(OUTCOME_ERROR, "Array index out of range in branchingList")
+        return event_id in self.model.branching_list[partition]
+
+    def find_tied_to(self, current_entry: Entry, log: List[Entry]) -> int:
+        tied_events = self.model.events_tied_to[current_entry.event_id]
+        for i in range(current_entry.order_count - 1, -1, -1):
+            entry = log[i]
+            if entry.order_count != 0 and entry.event_id in tied_events and entry.order_count < current_entry.order_count:
+                return entry.order_count
+        return -1
+
+    # Branch competition
+
+    def consolidate_logs(self, tracker: EventTracker, correct_branch_event: Entry):
+        based_on_list = [0] * self.model.log_size
+        for i in range(self.model.log_size):
+            if tracker.competition[i] != 0:
+                current_event = self.get_entry_from_order_count(tracker.competition[i])
+                if is_int_in_list(based_on_list, current_event.based_on):
+                    tracker.res_log[tracker.current_index] = current_event
+                    add_int_to_list(based_on_list, current_event.order_count)
+                    tracker.competition[i] = 0
+                    tracker.current_index += 1
+                    if tracker.location_map[current_event.event_id][0] == tracker.current_location:
+                        tracker.current_location = tracker.location_map[current_event.event_id][1]
+                elif self.model.is_branching[current_event.event_id]:
+                    if (self.is_in_branching_conflict(self.get_partition(current_event.event_id), correct_branch_event.event_id) and
+                        correct_branch_event.tied_to == current_event.tied_to):
+                        if is_int_in_list(self.true_tracker.discarded, current_event.order_count):
+                            add_int_to_list(tracker.discarded, current_event.order_count)
+                            add_int_to_list(based_on_list, current_event.order_count)
+                            tracker.competition[i] = 0
+            if tracker.discarded[i] != 0:
+                current_event = self.get_entry_from_order_count(tracker.discarded[i])
+                if self.model.is_branching[current_event.event_id]:
+                    if (self.is_in_branching_conflict(self.get_partition(current_event.event_id), correct_branch_event.event_id) and
+                        correct_branch_event.based_on == current_event.based_on and correct_branch_event.tied_to == current_event.tied_to):
+                        if is_int_in_list(self.true_tracker.competition, current_event.order_count):
+                            add_int_to_list(tracker.competition, current_event.order_count)
+                            tracker.discarded[i] = 0
+            if tracker.competition[i] == 0 and tracker.discarded[i] == 0:
+                return
+
+    def check_and_fix_branch_competition(self, entry: Entry, tracker: EventTracker):
+        partition = self.get_partition(entry.event_id)
+        for true_entry in self.true_global_log:
+            if true_entry.order_count != 0:
+                if self.is_in_branching_conflict(partition, true_entry.event_id) and true_entry.tied_to == entry.tied_to:
+                    # The model looks up the event id as an order count, kept as is to match it
+                    if is_order_count_in_log(tracker.res_log, true_entry.event_id):
+                        self.consolidate_logs(tracker, true_entry.copy())
+
+    def handle_branching_event(self, entry: Entry, tracker: EventTracker) -> bool:
+        if is_int_in_list(tracker.competition, entry.based_on):
+            entry.ignored = True
+        if is_int_in_list(tracker.discarded, entry.tied_to):
+            tied_to_event_id = self.get_event_id_from_order_count(entry.tied_to)
+            if self.get_partition(entry.event_id) != self.get_partition(tied_to_event_id):
+                entry.ignored = True
+
+        for j in range(tracker.current_index - 1, -1, -1):
+            res_entry = tracker.res_log[j]
+            if self.is_in_branching_conflict(self.get_partition(entry.event_id), res_entry.event_id):
+                if not is_int_in_list(tracker.discarded, res_entry.order_count):
+                    if entry.event_id == res_entry.event_id:
+                        entry.ignored = True
+                        return False
+                    self.check_and_fix_branch_competition(entry, tracker)
+                    entry.ignored = True
+                    return True
+        return False
+
+    # Returns whether the event is in competition, the event is marked as ignored if it is not accepted
+    def handle_event(self, entry: Entry, tracker: EventTracker) -> bool:
+        if self.model.branch_tracking:
+            if self.find_tied_to(entry, tracker.res_log) != entry.tied_to:
+                entry.ignored = True
+                return True
+
+        source, target = tracker.location_map[entry.event_id]
+        if source != tracker.current_location:
+            if self.model.is_branching[entry.event_id]:
+                return self.handle_branching_event(entry, tracker)
+            entry.ignored = True
+            return False
+
+        if is_int_in_list(tracker.competition, entry.based_on):
+            entry.ignored = True
+            return False
+        # Even if correct it might still be in competition, single loop edge case
+        if not self.model.is_branching[entry.event_id] and source != target:
+            for i in range(tracker.current_index - 1, -1, -1):
+                res_entry = tracker.res_log[i]
+                if res_entry.event_id == entry.event_id and (res_entry.tied_to == entry.tied_to or res_entry.based_on == entry.based_on):
+                    entry.ignored = True
+                    return False
+        tracker.current_location = target
+        return False
+
+    # Emitting events
+
+    def update_true_global_log(self):
+        entry = self.temp_entry.copy()
+        tracker = self.true_tracker
+        in_competition = self.handle_event(entry, tracker)
+        if entry.ignored:
+            if in_competition:
+                add_int_to_list(tracker.competition, entry.order_count)
+            elif is_int_in_list(tracker.discarded, entry.based_on):
+                add_int_to_list(tracker.discarded, entry.order_count)
+            elif is_int_in_list(tracker.competition, entry.based_on):
+                add_int_to_list(tracker.competition, entry.order_count)
+            else:
+                add_int_to_list(tracker.discarded, entry.order_count)
+            tracker.current_index -= 1
+        else:
+            tracker.res_log[tracker.current_index] = entry
+
+    def update_log(self, log: List[Entry]):
+        self.temp_entry.tied_to = self.find_tied_to(self.temp_entry, log)
+        self.global_log[self.global_log_index] = self.temp_entry.copy()
+        self.global_log_index += 1
+        self.true_tracker.current_index += 1
+        self.update_true_global_log()
+        for i in range(len(log)):
+            if log[i].order_count == 0:
+                log[i] = self.temp_entry.copy()
+                return
+
+    def update_log_entry(self, log_state: LogState):
+        add_int_to_list(log_state.emitted_order_counts, self.temp_entry.order_count)
+        self.temp_entry.emitter_id += log_state.id_start
+        if self.temp_entry.based_on == -2:
+            for entry in reversed(log_state.current_log):
+                if entry.order_count != 0:
+                    self.temp_entry.based_on = entry.order_count
+                    self.update_log(log_state.current_log)
+                    return
+        self.temp_entry.based_on = -1
+        self.update_log(log_state.current_log)
+
+    # Merging propagated logs
+
+    def handle_log_entry(self, log_state: LogState, entry: Entry, tracker: EventTracker) -> Entry:
+        if entry.event_id in log_state.role.subscriptions:
+            log_state.in_competition = self.handle_event(entry, tracker)
+        else:
+            valid = False
+            for true_entry in self.true_global_log:
+                if true_entry.order_count == 0:
+                    break
+                if true_entry.order_count == entry.order_count:
+                    valid = True
+            if valid:
+                start_from = 0
+                for i, current_entry in enumerate(log_state.current_log):
+                    if current_entry.order_count > entry.order_count or current_entry.order_count == 0:
+                        start_from = i
+                        break
+                for i in range(start_from, self.model.log_size):
+                    log_state.un_sub_count[i] += 1
+            entry.ignored = True
+        return entry
+
+    def find_difference_in_logs(self, old_log: List[Entry], new_log: List[Entry], log_state: LogState):
+        for old_entry, new_entry in zip(old_log, new_log):
+            if old_entry.order_count != new_entry.order_count:
+                log_state.did_log_change = True
+                return
+            elif old_entry.order_count == 0:
+                return
+
+    def find_and_set_difference_in_logs(self, old_log: List[Entry], new_log: List[Entry], log_state: LogState):
+        reset_list = list(log_state.discarded_event_ids)
+        found_difference = False
+
+        def reset():
+            log_state.discarded_event_ids = list(reset_list)
+            log_state.events_to_read = 0
+            log_state.reset_count = 0
+
+        for old_entry, new_entry in zip(old_log, new_log):
+            if old_entry.order_count != new_entry.order_count:
+                if old_entry.order_count == 0:
+                    log_state.events_to_read += 1
+                    found_difference = True
+                elif new_entry.order_count == 0:
+                    log_state.discarded_event_ids[log_state.reset_count] = old_entry.event_id
+                    log_state.reset_count += 1
+                    found_difference = True
+                elif old_entry.event_id != new_entry.event_id:
+                    log_state.discarded_event_ids[log_state.reset_count] = old_entry.event_id
+                    log_state.events_to_read += 1
+                    log_state.reset_count += 1
+                    found_difference = True
+                elif found_difference:
+                    found_difference = False
+                    reset()
+            elif old_entry.order_count == 0 and new_entry.order_count == 0:
+                return
+            elif found_difference: # The same event is in both logs again so there is no need to backtrack
+                found_difference = False
+                reset()
+
+    def merge_propagation_log(self, log_state: LogState):
+        log_size = self.model.log_size
+        current_log = log_state.current_log
+        res_log = [EMPTY_ENTRY] * log_size
+        tracker = log_state.tracker
+        tracker.res_log = res_log
+        tracker.current_location = log_state.role.initial_pointer
+
+        current_log_counter = 0
+        propagated_log_counter = 0
+        current_log_done = False
+        propagated_log_done = False
+        new_event_considered = False
+
+        i = 0
+        while i < log_size * 2:
+            current_entry = current_log[current_log_counter]
+            propagated_entry = self.propagation_log[propagated_log_counter]
+            if current_entry.order_count == 0:
+                current_log_done = True
+            if propagated_entry.order_count == 0:
+                propagated_log_done = True
+
+            if current_log_done and propagated_log_done:
+                if log_state.current_size_of_log != i:
+                    log_state.current_size_of_log = i
+                    log_state.did_log_change = True
+                else:
+                    self.find_difference_in_logs(current_log, res_log, log_state)
+                if log_state.did_log_change:
+                    self.find_and_set_difference_in_logs(current_log, res_log, log_state)
+                log_state.current_log = res_log
+                return
+
+            # If one entry is invalid then we have to choose the other one
+            if current_log_done:
+                propagated_log_counter += 1
+                entry = propagated_entry
+                new_event_considered = True
+            elif propagated_log_done:
+                current_log_counter += 1
+                entry = current_entry
+            elif propagated_entry.order_count == current_entry.order_count:
+                propagated_log_counter += 1
+                current_log_counter += 1
+                entry = current_entry
+            elif current_entry.order_count > propagated_entry.order_count:
+                propagated_log_counter += 1
+                entry = propagated_entry
+                new_event_considered = True
+            else:
+                current_log_counter += 1
+                entry = current_entry
+
+            if (is_int_in_list(tracker.discarded, entry.order_count) or is_int_in_list(tracker.competition, entry.order_count) or
+                is_order_count_in_log(res_log, entry.order_count)):
+                i -= 1
+            elif not new_event_considered:
+                tracker.current_location = log_state.role.flow_list[entry.event_id][1]
+                res_log[i] = entry
+            else:
+                prior_index = i
+                tracker.current_index = i
+                entry = self.handle_log_entry(log_state, entry.copy(), tracker)
+                i = tracker.current_index
+                if i != prior_index:
+                    log_state.new_updates = True
+
+                if entry.ignored:
+                    i -= 1
+                    if log_state.in_competition:
+                        add_int_to_list(tracker.competition, entry.order_count)
+                        log_state.in_competition = False
+                    elif is_int_in_list(tracker.discarded, entry.based_on):
+                        add_int_to_list(tracker.discarded, entry.order_count)
+                    elif is_int_in_list(tracker.competition, entry.based_on):
+                        add_int_to_list(tracker.competition, entry.order_count)
+                    else:
+                        add_int_to_list(tracker.discarded, entry.order_count)
+                else:
+                    res_log[i] = entry
+            i += 1
+
+    # Templates
+
+    def set_next_log_to_propagate(self):
+        if self.amount_of_propagation < len(self.logs) - 2:
+            self.current_log_to_propagate = (self.current_log_to_propagate + 1) % len(self.logs)
+            self.amount_of_propagation += 1
+        else:
+            self.amount_of_propagation = 0
+
+    def move_role(self, log_state: LogState, targets: Dict[int, List[str]], event_id: int) -> bool:
+        options = targets.get(log_state.location, {}).get(event_id)
+        if not options:
+            return False
+        log_state.location = options[0] if len(options) == 1 else self.rng.choice(options)
+        return True
+
+    # A log receiving a propagated log merges it, backtracks its role and lets it read the new events
+    def receive_propagation(self, log_state: LogState):
+        self.merge_propagation_log(log_state)
+        log_state.counter = log_state.current_size_of_log - log_state.events_to_read
+        self.set_next_log_to_propagate()
+        if log_state.did_log_change and log_state.reset_count != 0:
+            while log_state.reset_count != 0:
+                event_id = log_state.discarded_event_ids[log_state.reset_count - 1]
+                if not self.move_role(log_state, log_state.role.reset_targets, event_id):
+                    raise SimulationStopped(OUTCOME_DEADLOCK, f"{log_state.role.name}({log_state.instance}) cannot backtrack {self.model.event_names[event_id]}")
+                log_state.discarded_event_ids[log_state.reset_count - 1] = -1
+                log_state.reset_count -= 1
+
+        while log_state.current_log[log_state.counter].order_count != 0:
+            event_id = log_state.current_log[log_state.counter].event_id
+            if event_id not in log_state.role.subscriptions:
+                raise SimulationStopped(OUTCOME_DEADLOCK, f"{log_state.role.name}({log_state.instance}) cannot read {self.model.event_names[event_id]}")
+            self.move_role(log_state, log_state.role.advance_targets, event_id)
+            log_state.counter += 1
+        log_state.did_log_change = False
+        log_state.events_to_read = 0
+
+    # The log is sent to the next log, which merges it and sends it on until every other log has received it
+    def propagate(self, log_index: int):
+        log_state = self.logs[log_index]
+        self.current_log_to_propagate = (log_index + 1) % len(self.logs)
+        log_state.updates_since_propagation = 0
+        log_state.new_updates = False
+        self.propagation_log = list(log_state.current_log)
+
+        sender = log_index
+        for _ in range(len(self.logs)):
+            receiver = self.current_log_to_propagate
+            if receiver == sender:
+                return
+            self.receive_propagation(self.logs[receiver])
+            sender = receiver
+
+    def is_bound_exceeded(self, log_state: LogState) -> bool:
+        if log_state.role.events_emitted_delay:
+            return not (log_state.updates_since_propagation + log_state.role.max_updates > self.global_log_index)
+        return log_state.updates_since_propagation > log_state.role.max_updates
+
+    # Logs delayed by global events that have waited too long propagate one at a time in order
+    def force_propagate(self):
+        for i, log_state in enumerate(self.logs):
+            if log_state.role.events_emitted_delay and log_state.new_updates and self.is_bound_exceeded(log_state):
+                self.forced_to_propagate[i] = True
+        while any(self.forced_to_propagate):
+            log_index = self.forced_to_propagate.index(True)
+            self.forced_to_propagate[log_index] = False
+            self.propagate(log_index)
+
+    def emit(self, log_index: int, event_id: int, target: str, bounded: bool):
+        log_state = self.logs[log_index]
+        role = log_state.role
+        self.temp_entry = Entry(event_id, log_state.instance, self.get_order_count(), -2, -1, False)
+        if bounded:
+            self.non_exit_counter[log_index][event_id] += 1
+        log_state.location = target
+
+        self.update_log_entry(log_state)
+        log_state.current_size_of_log += 1
+        if not role.events_emitted_delay:
+            log_state.updates_since_propagation += 1
+            log_state.new_updates = True
+
+        if self.global_log_index == self.model.log_size:
+            raise SimulationStopped(OUTCOME_OVERFLOW)
+
+        if role.events_emitted_delay and not log_state.new_updates:
+            log_state.updates_since_propagation = self.global_log_index
+            log_state.new_updates = True
+        if self.is_bound_exceeded(log_state):
+            self.propagate(log_index)
+        if self.model.using_global_event_bound:
+            self.force_propagate()
+
+    def get_actions(self) -> List[tuple]:
+        actions = []
+        path_bound = self.model.path_bound
+        for log_index, log_state in enumerate(self.logs):
+            role = log_state.role
+            for event_id, targets in role.own_targets.get(log_state.location, {}).items():
+                for target, bounded in targets:
+                    if not bounded or self.non_exit_counter[log_index][event_id] < path_bound:
+                        actions.append((log_index, event_id, target, bounded))
+            if log_state.new_updates:
+                actions.append((log_index, None, None, False))
+        return actions
+
+    # Takes one of the actions of get_actions, returns the outcome if the execution stopped
+    def apply(self, action: tuple) -> Optional[str]:
+        log_index, event_id, target, bounded = action
+        try:
+            if event_id == None:
+                self.propagate(log_index)
+            else:
+                self.emit(log_index, event_id, target, bounded)
+        except SimulationStopped as e:
+            return e.outcome
+        except IndexError:
+            return OUTCOME_ERROR # Out of range array access, which stops verification in UPPAAL
+        return None
+
+    # Runs until no role can emit and every log has propagated, returns the outcome
+    def run(self, max_steps: int) -> str:
+        for _ in range(max_steps):
+            actions = self.get_actions()
+            if len(actions) == 0:
+                return OUTCOME_END
+            outcome = self.apply(self.rng.choice(actions))
+            if outcome != None:
+                return outcome
+        return OUTCOME_STEP_LIMIT
+
+    def get_end_state(self) -> tuple:
+        return tuple(f"{log_state.role.name}({log_state.instance}).{log_state.location}" for log_state in self.logs)
+
+    def get_event_log(self, log: List[Entry]) -> tuple:
+        return tuple(self.model.event_names[entry.event_id] for entry in log if entry.order_count != 0)
+
+@dataclass
+class SimulationReport:
+    runs: int = 0
+    steps: int = 0
+    elapsed: float = 0.0
+    outcomes: Counter = field(default_factory=Counter)
+    end_states: Counter = field(default_factory=Counter)
+    global_logs: Counter = field(default_factory=Counter)
+    true_global_logs: Counter = field(default_factory=Counter)
+
+def simulate(global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer], model_settings: ModelSettings, runs: int,
+             seed: Optional[int] = None, max_steps: int = 1000) -> SimulationReport:
+    model = SimulationModel(global_json_transfer, json_transfers, model_settings)
+    rng = random.Random(seed)
+    report = SimulationReport()
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        simulation = SwarmSimulation(model, rng)
+        outcome = simulation.run(max_steps)
+        report.runs += 1
+        report.steps += simulation.event_order_counter - 1
+        report.outcomes[outcome] += 1
+        if outcome == OUTCOME_END:
+            report.end_states[simulation.get_end_state()] += 1
+        report.global_logs[simulation.get_event_log(simulation.global_log)] += 1
+        report.true_global_logs[simulation.get_event_log(simulation.true_global_log)] += 1
+    report.elapsed = time.perf_counter() - start_time
+    return report
+
+def format_report(report: SimulationReport, top: int = 5) -> str:
+    lines = [f"Simulated {report.runs} executions with {report.steps} events in {report.elapsed:.2f}s "
+             f"({report.runs / max(report.elapsed, 1e-9):.0f} executions/s)"]
+    for outcome, amount in report.outcomes.most_common():
+        lines.append(f"  {outcome}: {amount}")
+    lines.append(f"{len(report.end_states)} distinct end states, most common:")
+    for end_state, amount in report.end_states.most_common(top):
+        lines.append(f"  {amount}: {', '.join(end_state)}")
+    lines.append(f"{len(report.global_logs)} distinct global logs, most common:")
+    for log, amount in report.global_logs.most_common(top):
+        lines.append(f"  {amount}: {', '.join(log)}")
+    lines.append(f"{len(report.true_global_logs)} distinct true global logs, most common:")
+    for log, amount in report.true_global_logs.most_common(top):
+        lines.append(f"  {amount}: {', '.join(log)}")
+    return "\n".join(lines)
@@ -0,0 +1,244 @@
+"""\
+Spreads verification jobs over several machines using a directory on a shared filesystem.
+The coordinator copies the model into the spool under its hash and writes a job file per query.
+Workers on any node claim a job by renaming its file into the claimed folder, which only one
+worker can succeed at, verify it with run_query and write the result back into the spool.
+
+Layout of the spool folder:
+    models/<model hash>.xml
+    queue/<job id>.json      jobs waiting for a worker
+    claimed/<job id>.json    jobs being verified
+    results/<job id>.json    finished jobs
+
+Start a worker with "python Spool.py worker <spool folder> -vp <verifyta>".
+
+Workers touch the claim of the job they verify every few seconds, so a claim that has not been touched for a while
+belongs to a worker that died and is put back in the queue for another worker.
+
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ResultCache import ResultCache
+from DataObjects.VerificationResult import VERDICT_ERROR, VerificationResult
+from Verifier import capture_output, run_query
+
+heartbeat_interval = 10 # Seconds between touches of the claim of a running job
+default_stale_after = 120 # Seconds after which a claim that was not touched is requeued
+default_spool_timeout = 3600 # Seconds the coordinator waits for all results
+
+def write_json_atomic(file_path: str, data: Dict):
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(data, file)
+    os.replace(temp_path, file_path) # Readers never see a half written file
+
+def read_json(file_path: str) -> Optional[Dict]:
+    try:
+        with open(file_path, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def get_job_id(model_hash: str, query: str) -> str:
+    return hashlib.sha256(f"{model_hash}\n{query.strip()}".encode('utf-8')).hexdigest()[:32]
+
+class Spool:
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self.models_path = os.path.join(folder_path, "models")
+        self.queue_path = os.path.join(folder_path, "queue")
+        self.claimed_path = os.path.join(folder_path, "claimed")
+        self.results_path = os.path.join(folder_path, "results")
+        for path in [self.models_path, self.queue_path, self.claimed_path, self.results_path]:
+            os.makedirs(path, exist_ok=True)
+
+    def get_model_path(self, model_hash: str) -> str:
+        return os.path.join(self.models_path, f"{model_hash}.xml")
+
+    def get_result_path(self, job_id: str) -> str:
+        return os.path.join(self.results_path, f"{job_id}.json")
+
+    # Returns a job id per query, queries that already have a result or are queued are not added again
+    def submit(self, model_path: str, queries: List[str]) -> List[str]:
+        model_hash = ResultCache().get_model_hash(model_path)
+        spool_model_path = self.get_model_path(model_hash)
+        if not os.path.exists(spool_model_path):
+            temp_path = f"{spool_model_path}.{os.getpid()}.tmp"
+            shutil.copyfile(model_path, temp_path)
+            os.replace(temp_path, spool_model_path)
+
+        job_ids = []
+        for query in queries:
+            job_id = get_job_id(model_hash, query)
+            job_ids.append(job_id)
+            job_file = f"{job_id}.json"
+            if os.path.exists(os.path.join(self.claimed_path, job_file)):
+                continue
+            result = self.get_result(job_id)
+            if result != None:
+                if result["result"] != "":
+                    continue
+                os.remove(self.get_result_path(job_id)) # Failed jobs are tried again
+            write_json_atomic(os.path.join(self.queue_path, job_file), {"id": job_id, "model_hash": model_hash, "query": query.strip()})
+        return job_ids
+
+    # Moves a job into the claimed folder, None if another worker was faster
+    def claim(self) -> Optional[Dict]:
+        for job_file in sorted(os.listdir(self.queue_path)):
+            if not job_file.endswith(".json"):
+                continue
+            claimed_file = os.path.join(self.claimed_path, job_file)
+            try:
+                os.rename(os.path.join(self.queue_path, job_file), claimed_file)
+            except (FileNotFoundError, PermissionError):
+                continue
+            os.utime(claimed_file) # Marks when the claim was made for requeue_stale
+            job = read_json(claimed_file)
+            if job != None:
+                return job
+        return None
+
+    def complete(self, job: Dict, result: VerificationResult, output: str, worker: str):
+        write_json_atomic(self.get_result_path(job["id"]), {
+            "id": job["id"],
+            "query": job["query"],
+            "result": result.output,
+            "output": output,
+            "worker": worker,
+            "record": result.to_dict()
+        })
+        try:
+            os.remove(os.path.join(self.claimed_path, f"{job['id']}.json"))
+        except FileNotFoundError:
+            pass
+
+    # Puts claims older than max_age seconds back in the queue, for workers that died while verifying
+    def requeue_stale(self, max_age: float) -> int:
+        amount = 0
+        for job_file in os.listdir(self.claimed_path):
+            claimed_file = os.path.join(self.claimed_path, job_file)
+            try:
+                if time.time() - os.path.getmtime(claimed_file) > max_age:
+                    os.rename(claimed_file, os.path.join(self.queue_path, job_file))
+                    amount += 1
+            except FileNotFoundError:
+                continue
+        return amount
+
+    # Keeps touching the claim while the job is verified so it never looks stale
+    @contextlib.contextmanager
+    def keep_claimed(self, job: Dict, interval: float = heartbeat_interval):
+        claimed_file = os.path.join(self.claimed_path, f"{job['id']}.json")
+        stopped = threading.Event()
+
+        def touch():
+            while not stopped.wait(interval):
+                try:
+                    os.utime(claimed_file)
+                except FileNotFoundError:
+                    return
+
+        thread = threading.Thread(target=touch, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        return read_json(self.get_result_path(job_id))
+
+    def is_empty(self) -> bool:
+        return not any(job_file.endswith(".json") for job_file in os.listdir(self.queue_path))
+
+    # Waits until every job has a result, returns the results in the order of the job ids
+    def wait(self, job_ids: List[str], poll_interval: float = 0.2, timeout: float = None, stale_after: float = None) -> List[Optional[Dict]]:
+        results = {}
+        start_time = time.time()
+        while len(results) < len(set(job_ids)):
+            for job_id in job_ids:
+                if job_id not in results:
+                    result = self.get_result(job_id)
+                    if result != None:
+                        results[job_id] = result
+            if len(results) == len(set(job_ids)):
+                break
+            if timeout != None and time.time() - start_time > timeout:
+                break
+            if stale_after != None:
+                self.requeue_stale(stale_after)
+            time.sleep(poll_interval)
+        return [results.get(job_id) for job_id in job_ids]
+
+def get_worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_worker(spool: Spool, verifyta_path: str, exit_when_empty: bool = False, poll_interval: float = 1.0, cache: ResultCache = None) -> int:
+    worker = get_worker_name()
+    amount = 0
+    with tempfile.TemporaryDirectory(prefix="spool_worker_") as work_folder:
+        query_path = os.path.join(work_folder, "query.txt")
+        while True:
+            job = spool.claim()
+            if job == None:
+                if exit_when_empty:
+                    return amount
+                time.sleep(poll_interval)
+                continue
+
+            with open(query_path, 'w') as file:
+                file.write(job["query"] + "\n")
+
+            # Errors printed while verifying are sent back to the coordinator, a job that fails gets an error result
+            # instead of stopping the worker, so the coordinator is not left waiting for it
+            captured = io.StringIO()
+            with capture_output(captured), spool.keep_claimed(job):
+                try:
+                    result = run_query(spool.get_model_path(job["model_hash"]), query_path, verifyta_path, 0, cache=cache)
+                except Exception as e:
+                    print(f"Worker {worker} failed to verify the query: {type(e).__name__}: {e}")
+                    result = VerificationResult(job["query"], VERDICT_ERROR)
+            result.query = job["query"]
+            spool.complete(job, result, captured.getvalue(), worker)
+            amount += 1
+
+# Starts workers as subprocesses of this machine, used when no other nodes are available
+def start_local_workers(spool_folder: str, verifyta_path: str, amount: int, no_cache: bool = False) -> List[subprocess.Popen]:
+    command = [sys.executable, os.path.abspath(__file__), "worker", spool_folder, "--exit-when-empty"]
+    if verifyta_path != None:
+        command += ["-vp", verifyta_path] # Otherwise the worker uses the path saved in the state
+    if no_cache:
+        command.append("--no-cache")
+    return [subprocess.Popen(command) for _ in range(amount)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs verification jobs from a shared spool folder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Claims and verifies jobs until stopped")
+    worker_parser.add_argument("spool_folder", type=str, nargs='+', help="Path to the shared spool folder")
+    worker_parser.add_argument("-vp", "--verifyta-path", type=str, nargs='+', help="Path to the verifyta distribution if not specified local will be used")
+    worker_parser.add_argument("--exit-when-empty", action="store_true", help="Stop once the queue is empty instead of waiting for new jobs")
+    worker_parser.add_argument("--no-cache", action="store_true", help="Always run verifyta instead of reusing cached results")
+    args = parser.parse_args()
+
+    from CLI import get_result_cache, get_verifyta_path # Imported here as the CLI itself uses the spool
+    amount = run_worker(Spool(" ".join(args.spool_folder)), get_verifyta_path(args.verifyta_path), args.exit_when_empty, cache=get_result_cache(args.no_cache))
+    print(f"Worker {get_worker_name()} verified {amount} jobs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""\
+Parameter sweeps over the model settings.
+A sweep file is a JSON object mapping settings of the state to a list of values, every combination of which is a variant,
+or a list of objects each giving the settings of one variant. Settings given per role such as role_amount take either
+a dictionary for some roles, the others keep the value of the state, or a single value used for every role.
+
+Every variant is built and verified against the same queries, and each query of each variant becomes a cell of one table.
+
+"""
+
+import csv
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from DataObjects.VerificationResult import VERDICT_ERROR, VERDICT_SATISFIED, VerificationResult
+
+role_settings = ["role_amount", "delay_amount", "delay_type"]
+sweep_settings = role_settings + ["log_size", "path_bound", "branch_tracking"]
+delay_type_names = ["N", "E", "S"]
+
+table_columns = ["variant", "settings", "query_index", "query", "verdict", "result_value", "wall_time", "cpu_time", "user_time",
+                 "system_time", "states_explored", "states_stored", "peak_rss_kb", "verifyta_memory_kb", "batch_size", "batch_cpu_time",
+                 "batch_peak_rss_kb", "cached"]
+
+@dataclass
+class SweepVariant:
+    index: int
+    overrides: Dict[str, Any]
+    model_path: Optional[str] = None
+    error: Optional[str] = None # Why the variant could not be built
+    results: List[VerificationResult] = field(default_factory=list)
+
+    def describe(self) -> str:
+        return ", ".join(f"{key}={json.dumps(value)}" for key, value in self.overrides.items())
+
+def get_combinations(grid: Any) -> List[Dict[str, Any]]:
+    if isinstance(grid, list):
+        combinations = grid
+    elif isinstance(grid, dict):
+        keys = list(grid.keys())
+        for key in keys:
+            if not isinstance(grid[key], list) or len(grid[key]) == 0:
+                raise ValueError(f"Values of {key} must be a non-empty list")
+        combinations = [dict(zip(keys, values)) for values in itertools.product(*[grid[key] for key in keys])]
+    else:
+        raise ValueError("Sweep must be an object of settings to values or a list of settings")
+
+    for combination in combinations:
+        if not isinstance(combination, dict):
+            raise ValueError(f"Settings of a variant must be an object, got {combination}")
+        for key in combination:
+            if key not in sweep_settings:
+                raise ValueError(f"Cannot sweep over {key}, choose from {', '.join(sweep_settings)}")
+    return combinations
+
+def read_sweep(file_path: str) -> List[Dict[str, Any]]:
+    with open(file_path, 'r') as file:
+        return get_combinations(json.load(file))
+
+def check_value(key: str, value: Any):
+    if key == "delay_type":
+        if value not in delay_type_names:
+            raise ValueError(f"Delay type must be one of {', '.join(delay_type_names)}, got {value}")
+    elif key == "branch_tracking":
+        if not isinstance(value, bool):
+            raise ValueError(f"branch_tracking must be true or false, got {value}")
+    elif not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"{key} must be an integer, got {value}")
+    elif value < (-1 if key == "path_bound" else 0 if key == "delay_amount" else 1):
+        raise ValueError(f"{key} is out of range, got {value}")
+
+# The state of the variant, the given state is not changed
+def apply_overrides(state_data: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    variant_state = json.loads(json.dumps(state_data))
+    for key, value in overrides.items():
+        if key not in role_settings:
+            check_value(key, value)
+            variant_state[key] = value
+            continue
+
+        role_values = dict(variant_state[key])
+        if isinstance(value, dict):
+            for role, role_value in value.items():
+                if role not in variant_state["role_amount"]:
+                    raise ValueError(f"Unknown role {role} in {key}")
+                check_value(key, role_value)
+                role_values[role] = role_value
+        else:
+            check_value(key, value)
+            role_values = {role: value for role in variant_state["role_amount"]}
+        variant_state[key] = role_values
+    return variant_state
+
+def get_cells(variants: List[SweepVariant], queries: List[str]) -> List[Dict[str, Any]]:
+    cells = []
+    for variant in variants:
+        results = variant.results if variant.error == None else [VerificationResult(query.strip()) for query in queries]
+        for i, result in enumerate(results):
+            cell = {column: getattr(result, column, None) for column in table_columns}
+            cell.update({"variant": variant.index, "settings": variant.describe(), "query_index": i})
+            cells.append(cell)
+    return cells
+
+def write_table(variants: List[SweepVariant], queries: List[str], file_path: str):
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=table_columns)
+        writer.writeheader()
+        writer.writerows(get_cells(variants, queries))
+
+# Queries verified in a batch only know the peak memory of the whole verifyta run
+def get_peak_memory(result: VerificationResult) -> Optional[int]:
+    return result.batch_peak_rss_kb if result.batch_peak_rss_kb != None else result.peak_rss_kb
+
+def format_variant(variant: SweepVariant) -> str:
+    if variant.error != None:
+        return f"Variant {variant.index} ({variant.describe()}): not built, {variant.error}"
+
+    satisfied = len([result for result in variant.results if result.verdict == VERDICT_SATISFIED])
+    errors = len([result for result in variant.results if result.verdict == VERDICT_ERROR])
+    not_satisfied = len(variant.results) - satisfied - errors
+    # Queries of a variant share a verifyta run, so the memory is the peak of the run rather than a sum
+    wall_time = sum(result.wall_time for result in variant.results if result.wall_time != None)
+    states = sum(result.states_stored for result in variant.results if result.states_stored != None)
+    peak_memory = max([get_peak_memory(result) for result in variant.results if get_peak_memory(result) != None], default=None)
+
+    line = f"Variant {variant.index} ({variant.describe()}): {satisfied} satisfied, {not_satisfied} not satisfied, {errors} errors"
+    line += f", {wall_time:.2f}s, {states} states stored"
+    if peak_memory != None:
+        line += f", {peak_memory / 1024:.0f} MB"
+    return line
@@ -0,0 +1,153 @@
+"""\
+Named timers for the stages of building and verifying a model.
+Functions taking a timer wrap each of their stages in it, a stage run several times, such as building the template of
+every role, adds up its time. When tracemalloc is tracing, the most memory allocated at once during a stage is kept as
+well. Stages can be nested, the memory of an outer stage includes that of the stages inside it.
+
+With a profile folder every outermost stage is also profiled with cProfile and written as a pstats dump named after
+the stage, the stages nested inside it are part of its profile as only one profiler can run at a time. Snapshots of
+tracemalloc can be written at the end of every stage as well.
+
+"""
+
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+class StageTimer:
+    def __init__(self, profile_folder: str = None, snapshots: bool = False):
+        self.profile_folder = profile_folder
+        self.snapshots = snapshots
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.peak_memory: Dict[str, int] = {} # Bytes, only while tracemalloc is tracing
+        self.order: List[str] = []
+        self.parents: Dict[str, Optional[str]] = {} # Stage a stage was first started in
+        self.failed: List[str] = [] # Stages left by an exception, their times are not complete
+        self.stack: List[str] = []
+        # Memory at the start and highest peak so far of every running stage
+        self.running: List[List[int]] = []
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.snapshot_paths: List[str] = []
+        self.start_time = None
+        self.total_seconds = None
+        self.started_tracing = False
+
+    # Starts the total time, tracemalloc is started if snapshots are wanted
+    def start(self):
+        self.start_time = time.perf_counter()
+        if self.snapshots and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self):
+        if self.start_time != None:
+            self.total_seconds = time.perf_counter() - self.start_time
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    # tracemalloc only keeps one peak, so it is passed on to every running stage before it is reset
+    def record_peak(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self.running:
+            frame[1] = max(frame[1], peak)
+
+    @contextmanager
+    def stage(self, name: str):
+        if name not in self.seconds:
+            self.seconds[name] = 0.0
+            self.calls[name] = 0
+            self.order.append(name)
+            self.parents[name] = self.stack[-1] if len(self.stack) > 0 else None
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self.record_peak()
+            tracemalloc.reset_peak()
+            frame = [tracemalloc.get_traced_memory()[0], 0]
+            self.running.append(frame)
+
+        profile = None
+        if self.profile_folder != None and len(self.stack) == 0:
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+
+        self.stack.append(name)
+        start_time = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed.append(name)
+            raise
+        finally:
+            self.seconds[name] += time.perf_counter() - start_time
+            self.calls[name] += 1
+            self.stack.pop()
+            if profile != None:
+                profile.disable()
+            if tracing:
+                self.record_peak()
+                self.running.pop()
+                self.peak_memory[name] = max(self.peak_memory.get(name, 0), frame[1] - frame[0])
+                if self.snapshots and self.profile_folder != None:
+                    self.write_snapshot(name)
+
+    def write_snapshot(self, name: str):
+        os.makedirs(self.profile_folder, exist_ok=True)
+        file_path = os.path.join(self.profile_folder, f"{name}_{self.calls[name]}.snapshot")
+        tracemalloc.take_snapshot().dump(file_path)
+        self.snapshot_paths.append(file_path)
+
+    # Dumps can be read with pstats, for example "python -m pstats createModel.prof"
+    def write_profiles(self) -> List[str]:
+        if self.profile_folder == None:
+            return []
+        os.makedirs(self.profile_folder, exist_ok=True)
+        file_paths = []
+        for name, profile in self.profiles.items():
+            file_path = os.path.join(self.profile_folder, f"{name}.prof")
+            profile.dump_stats(file_path)
+            file_paths.append(file_path)
+        return file_paths
+
+    def get_depth(self, name: str) -> int:
+        depth = 0
+        while self.parents[name] != None:
+            name = self.parents[name]
+            depth += 1
+        return depth
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = {}
+        for name in self.order:
+            stages[name] = {"seconds": self.seconds[name], "calls": self.calls[name], "parent": self.parents[name]}
+            if name in self.failed:
+                stages[name]["failed"] = True
+            if name in self.peak_memory:
+                stages[name]["peak_memory_kb"] = self.peak_memory[name] / 1024
+        return {"total_seconds": self.total_seconds, "stages": stages}
+
+# Stage of the timer, or nothing when the caller did not ask for timings
+def timed(timer: Optional[StageTimer], name: str):
+    if timer == None:
+        return nullcontext()
+    return timer.stage(name)
+
+def format_timings(timer: StageTimer) -> str:
+    total = timer.total_seconds if timer.total_seconds != None else sum(seconds for name, seconds in timer.seconds.items() if timer.parents[name] == None)
+    lines = [f"{'stage':<34}{'calls':>7}{'seconds':>12}{'share':>8}"]
+    for name in timer.order:
+        label = "  " * timer.get_depth(name) + name
+        share = timer.seconds[name] / total * 100 if total > 0 else 0
+        line = f"{label:<34}{timer.calls[name]:>7}{timer.seconds[name]:>12.4f}{share:>7.1f}%"
+        if name in timer.peak_memory:
+            line += f"{timer.peak_memory[name] / 1024:>12.0f} KB"
+        if name in timer.failed:
+            line += "  failed"
+        lines.append(line)
+    lines.append(f"{'total':<34}{'':>7}{total:>12.4f}")
+    return "\n".join(lines)
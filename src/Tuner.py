@@ -0,0 +1,147 @@
+"""\
+Finds the verifyta options that verify a model fastest.
+Every combination of the option grid is run on a representative query file while the
+wall time and peak memory of verifyta are measured. The best combination is saved as a
+profile next to the state file, which is then used by every later verification.
+
+Runs that take longer than the best run so far are killed as they can no longer win.
+
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ResultCache import ResultCache
+from Verifier import BatchOutputParser, profile_path, start_verifyta, verifyta_options, wait_for_usage
+
+# Each entry is a list of alternatives for one verifyta setting, an empty list keeps the default
+tune_grid: Dict[str, List[List[str]]] = {
+    "search order": [["-o", "0"], ["-o", "1"], ["-o", "2"]],
+    "state space reduction": [["-S", "0"], ["-S", "1"], ["-S", "2"]],
+    "state space representation": [[], ["-C"]],
+    "hash table size": [[], ["-H", "24"], ["-H", "30"]],
+}
+
+@dataclass
+class TuneResult:
+    options: List[str]
+    wall_time: Optional[float] = None
+    peak_memory_kb: Optional[int] = None
+    status: str = "ok" # ok, error, inconclusive, different verdicts or killed
+    verdicts: Optional[List[bool]] = None
+
+def get_option_combinations(grid: Dict[str, List[List[str]]] = None) -> List[List[str]]:
+    if grid == None:
+        grid = tune_grid
+    combinations = []
+    for choice in itertools.product(*grid.values()):
+        combinations.append([option for options in choice for option in options])
+    return combinations
+
+def count_queries(query_path: str) -> int:
+    with open(query_path, 'r') as file:
+        return len([line for line in file if line.strip()])
+
+def run_candidate(model_path: str, query_path: str, verifyta_path: str, options: List[str], amount_of_queries: int, time_limit: float = None) -> TuneResult:
+    result = TuneResult(options)
+    command = [verifyta_path, model_path, query_path] + verifyta_options + options
+    parser = BatchOutputParser(amount_of_queries)
+    killed = threading.Event()
+
+    start_time = time.perf_counter()
+    process = start_verifyta(command)
+    timer = None
+    if time_limit != None:
+        def kill():
+            killed.set()
+            process.kill()
+        timer = threading.Timer(time_limit, kill)
+        timer.start()
+
+    try:
+        for line in process.stdout:
+            parser.feed(line)
+        result.peak_memory_kb = wait_for_usage(process).peak_rss_kb
+        result.wall_time = time.perf_counter() - start_time
+    finally:
+        if timer != None:
+            timer.cancel()
+        if process.poll() == None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    if killed.is_set():
+        result.status = "killed"
+    elif process.returncode != 0 or parser.header.error or any(query_parser.error for query_parser in parser.parsers):
+        result.status = "error"
+    elif not all(query_parser.verdict_found for query_parser in parser.parsers):
+        result.status = "inconclusive"
+    else:
+        result.verdicts = [query_parser.satisfied for query_parser in parser.parsers]
+    return result
+
+def get_best_result(results: List[TuneResult]) -> Optional[TuneResult]:
+    successful = [result for result in results if result.status == "ok"]
+    if len(successful) == 0:
+        return None
+    # Ties in time are broken by memory, unknown memory is never preferred
+    return min(successful, key=lambda result: (result.wall_time, result.peak_memory_kb if result.peak_memory_kb != None else sys.maxsize))
+
+def tune(model_path: str, query_path: str, verifyta_path: str, grid: Dict[str, List[List[str]]] = None, timeout: float = None) -> List[TuneResult]:
+    amount_of_queries = count_queries(query_path)
+    results = []
+    best = None
+    for options in get_option_combinations(grid):
+        # A run slower than the best so far can never win so it is stopped at that time
+        time_limit = timeout
+        if best != None:
+            time_limit = best.wall_time if time_limit == None else min(time_limit, best.wall_time)
+
+        result = run_candidate(model_path, query_path, verifyta_path, options, amount_of_queries, time_limit)
+        if result.status == "ok" and best != None and result.verdicts != best.verdicts:
+            result.status = "different verdicts" # Options that change the answer are never safe to use
+        results.append(result)
+
+        if result.status == "ok" and (best == None or get_best_result([best, result]) is result):
+            best = result
+    return results
+
+def save_profile(model_path: str, query_path: str, verifyta_path: str, best: TuneResult, results: List[TuneResult], file_path: str = None):
+    if file_path == None:
+        file_path = profile_path
+    profile = {
+        "options": best.options,
+        "model": os.path.abspath(model_path),
+        "query_path": os.path.abspath(query_path),
+        "verifyta_path": verifyta_path,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "wall_time": best.wall_time,
+        "peak_memory_kb": best.peak_memory_kb,
+        "results": [asdict(result) for result in results]
+    }
+    # Profiles are kept per model so tuning one model never changes the options of another
+    profiles = {}
+    try:
+        with open(file_path, 'r') as file:
+            profiles = json.load(file)["profiles"]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        pass
+    profiles[ResultCache().get_model_hash(model_path)] = profile
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as file:
+        json.dump({"profiles": profiles}, file, indent=4)
+
+def format_result(result: TuneResult) -> str:
+    options = " ".join(result.options) if len(result.options) > 0 else "(defaults)"
+    if result.status != "ok":
+        return f"{options:<24} {result.status}"
+    memory = f"{result.peak_memory_kb} KB" if result.peak_memory_kb != None else "unknown"
+    return f"{options:<24} {result.wall_time:8.3f} s   {memory}"
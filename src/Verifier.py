@@ -0,0 +1,654 @@
+"""\
+Runs verifyta on a model and a query file and filters the output.
+The output is read straight from verifyta while it runs and filtered line by line,
+so even very long traces are never written to disk or held in memory.
+Queries can either be verified one at a time or spread across a pool of worker
+processes where each job gets its own work files.
+
+"""
+
+import contextlib
+import io
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from DataObjects.VerificationResult import VERDICT_ERROR, VERDICT_NOT_SATISFIED, VERDICT_SATISFIED, VerificationResult
+from ResultCache import ResultCache
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+work_folder_path = os.path.join(base_path, "PermanentState") # Hardcoded folder for files used during verification
+profile_path = os.path.join(work_folder_path, "profile.json") # Written by the tune command
+statistics_options = ["-u"] # verifyta prints the states explored and stored, time and memory after every formula
+verifyta_options = ["--diagnostic", "0"] + statistics_options
+
+_profile_memo = {}
+_announced_profiles = set()
+
+# Tuned profiles by the hash of the model they were tuned for, empty if no model has been tuned
+def read_profiles() -> Dict[str, Dict]:
+    try:
+        signature = os.stat(profile_path).st_mtime_ns
+    except OSError:
+        return {}
+    if _profile_memo.get("signature") != signature:
+        try:
+            with open(profile_path, 'r') as file:
+                profiles = json.load(file)["profiles"]
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            profiles = {} # Profiles written before they were kept per model are not applied to any model
+        _profile_memo["signature"] = signature
+        _profile_memo["profiles"] = profiles
+    return _profile_memo["profiles"]
+
+# Options tuned for the model, found by the same layout independent hash the result cache uses so rebuilds keep their
+# profile. Empty for models that have not been tuned
+def get_profile_options(model_path: str) -> List[str]:
+    profiles = read_profiles()
+    if len(profiles) == 0:
+        return []
+    try:
+        model_hash = ResultCache().get_model_hash(model_path)
+    except OSError:
+        return [] # Missing files are left for verifyta to report
+    profile = profiles.get(model_hash)
+    if profile == None:
+        return []
+    options = profile.get("options", [])
+    if (model_hash, tuple(options)) not in _announced_profiles:
+        _announced_profiles.add((model_hash, tuple(options)))
+        print(f"Using the verifyta options {' '.join(options) or '(defaults)'} tuned for {profile.get('model')} on {profile.get('time')}")
+    return options
+
+def get_verifyta_options(model_path: str) -> List[str]:
+    return verifyta_options + get_profile_options(model_path)
+
+class VerificationCancelled(Exception):
+    pass
+
+# Lets a long running caller such as the daemon kill the verifyta processes of a job running on another thread.
+# A job can run several at once, such as the strategies of a portfolio
+class CancelToken:
+    def __init__(self):
+        self.cancelled = False
+        self.processes: List[subprocess.Popen] = []
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            for process in self.processes:
+                if process.returncode == None:
+                    stop_process(process)
+
+    def attach(self, process: subprocess.Popen):
+        with self.lock:
+            # Processes that were waited for are done and no longer kept
+            self.processes = [running for running in self.processes if running.returncode == None] + [process]
+            if self.cancelled:
+                stop_process(process)
+
+_thread_state = threading.local()
+
+# Every verifyta process started on this thread is killed when the token is cancelled, so verifyta is always started
+# through start_verifyta
+def set_cancel_token(token: Optional[CancelToken]):
+    _thread_state.cancel_token = token
+
+def start_verifyta(command: List[str]) -> subprocess.Popen:
+    token = getattr(_thread_state, "cancel_token", None)
+    if token != None and token.cancelled:
+        raise VerificationCancelled()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if token != None:
+        token.attach(process)
+    return process
+
+# Sends what a thread prints to the buffer set for that thread, other threads keep printing to the default output.
+# The daemon installs it as sys.stdout so jobs running at the same time each capture their own output
+class ThreadLocalOutput(io.TextIOBase):
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def get_buffer(self) -> Optional[io.StringIO]:
+        return getattr(self.local, "buffer", None)
+
+    def set_buffer(self, buffer: Optional[io.StringIO]):
+        self.local.buffer = buffer
+
+    def write(self, text: str) -> int:
+        buffer = self.get_buffer()
+        if buffer == None:
+            return self.default.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        self.default.flush()
+
+# Captures what the current thread prints. Replacing sys.stdout would also capture the output of every other thread,
+# so it is only replaced when nothing else prints at the same time, that is when it is not a ThreadLocalOutput
+@contextlib.contextmanager
+def capture_output(buffer: io.StringIO):
+    output = sys.stdout
+    if not isinstance(output, ThreadLocalOutput):
+        with contextlib.redirect_stdout(buffer):
+            yield buffer
+        return
+    previous = output.get_buffer()
+    output.set_buffer(buffer)
+    try:
+        yield buffer
+    finally:
+        output.set_buffer(previous)
+
+@dataclass
+class VerificationJob:
+    model_path: str
+    query_path: str
+    verifyta_path: str
+    index: int
+    query: Optional[str] = None # If set the query is written to query_path before running
+    trace_path: Optional[str] = None # If set the raw output of verifyta is also written here
+    cache: Optional[ResultCache] = None
+
+# Patterns are only searched for when a cheap substring check finds a possible match
+role_transition_pattern = re.compile(r"setLogEntryForUpdate\(\w+_ID,")
+propagation_pattern = re.compile(r"log\(\d+\).l_prop[1-9]->")
+property_satisfied_pattern = re.compile(r"-- Formula is satisfied.")
+delay_pattern = re.compile(r"Delay: \d+")
+global_time_pattern = re.compile(r"globalTime=\d+")
+sup_result_pattern = re.compile(r"-- Result: \d+")
+
+time_bounds_pattern = re.compile(r"globalTime: (.*)")
+states_explored_pattern = re.compile(r"-- States explored\s*:\s*(\d+)")
+states_stored_pattern = re.compile(r"-- States stored\s*:\s*(\d+)")
+cpu_time_pattern = re.compile(r"-- CPU user time used\s*:\s*(\d+)\s*ms")
+virtual_memory_pattern = re.compile(r"-- Virtual memory used\s*:\s*(\d+)\s*KB")
+resident_memory_pattern = re.compile(r"-- Resident memory used\s*:\s*(\d+)\s*KB")
+
+max_header_lines = 10000 # Lines kept for printing if verifyta reports an error
+formula_pattern = re.compile(r"Verifying formula (\d+)")
+
+# Resource usage of the verifyta process as told by the operating system
+class ProcessUsage(NamedTuple):
+    cpu_time: Optional[float] = None # User and system time in seconds
+    peak_rss_kb: Optional[int] = None
+    user_time: Optional[float] = None
+    system_time: Optional[float] = None
+
+# Single pass state machine over the output of verifyta.
+# Lines are fed one at a time so the output never has to be held in memory, only the
+# filtered trace which is what is shown to the user.
+class OutputParser:
+    # With expect_statistics the output is read until the statistics of the formula even if the result is known
+    def __init__(self, expect_statistics: bool = False):
+        self.expect_statistics = expect_statistics
+        self.satisfied = False
+        self.verdict_found = False
+        self.error = False
+        self.ending_found = False # A result of a sup or bounds query ends the filtered output
+        self.filtered_parts = []
+        self.kept_lines = []
+        self.result_value = None
+        self.time_bounds = None
+        self.states_explored = None
+        self.states_stored = None
+        self.cpu_time = None
+        self.virtual_memory_kb = None
+        self.resident_memory_kb = None
+
+        self.next_is_state = False
+        self.next_is_transition = False
+        self.current_state = None
+        self.current_global_time = None
+
+    def is_done(self) -> bool:
+        statistics_done = not self.expect_statistics or self.resident_memory_kb != None # The last statistic printed
+        return self.ending_found and self.verdict_found and statistics_done and not self.error
+
+    # Returns true once nothing more of the output is needed
+    def feed(self, line: str) -> bool:
+        if self.error or len(self.kept_lines) < max_header_lines:
+            self.kept_lines.append(line)
+
+        if "Error " in line or "syntax error:" in line or " [error] " in line:
+            self.error = True
+
+        if "-- Formula " in line:
+            self.verdict_found = True
+            if property_satisfied_pattern.search(line) != None:
+                self.satisfied = True
+
+        if "-- States " in line or "-- CPU " in line or " memory used" in line:
+            self.read_statistics(line)
+
+        if not self.ending_found:
+            self.filter_line(line.rstrip("\r\n"))
+
+        return self.is_done()
+
+    # Statistics are only printed by verifyta when asked for
+    def read_statistics(self, line: str):
+        states_explored_match = states_explored_pattern.search(line)
+        if states_explored_match != None:
+            self.states_explored = int(states_explored_match.group(1))
+        states_stored_match = states_stored_pattern.search(line)
+        if states_stored_match != None:
+            self.states_stored = int(states_stored_match.group(1))
+        cpu_time_match = cpu_time_pattern.search(line)
+        if cpu_time_match != None:
+            self.cpu_time = int(cpu_time_match.group(1)) / 1000
+        virtual_memory_match = virtual_memory_pattern.search(line)
+        if virtual_memory_match != None:
+            self.virtual_memory_kb = int(virtual_memory_match.group(1))
+        resident_memory_match = resident_memory_pattern.search(line)
+        if resident_memory_match != None:
+            self.resident_memory_kb = int(resident_memory_match.group(1))
+
+    def filter_line(self, line: str):
+        if "-- Result: " in line:
+            sup_result_match = sup_result_pattern.search(line)
+            if sup_result_match != None:
+                self.filtered_parts.append(sup_result_match.group())
+                self.result_value = int(sup_result_match.group()[11:])
+                self.ending_found = True
+                return
+
+        if "globalTime: " in line:
+            self.filtered_parts.append("Giving the resulting bound: " + line[12:])
+            time_bounds_match = time_bounds_pattern.search(line)
+            if time_bounds_match != None:
+                self.time_bounds = time_bounds_match.group(1).strip().replace("âˆž)", "INF]")
+            self.ending_found = True
+            return
+
+        if "State:" in line:
+            self.next_is_state = True
+            return
+
+        if self.next_is_state:
+            lines_to_save = [role for role in line.split() if "log" not in role and role != "(" and role != ")"]
+            if lines_to_save != self.current_state:
+                self.filtered_parts.append(f"State: {lines_to_save}" + "\n")
+                self.current_state = lines_to_save
+            self.next_is_state = False
+
+        if "Transition:" in line:
+            self.next_is_transition = True
+            return
+
+        if self.next_is_transition:
+            propagation_match = propagation_pattern.search(line)
+            role_transition_match = role_transition_pattern.search(line)
+            transition = line.partition("{")[0]
+            if propagation_match != None:
+                role = line.partition("_log")
+                self.filtered_parts.append(f"Role {role[0]}({role[2][1]}) propagated to all other roles\n")
+            if role_transition_match != None:
+                grouped = role_transition_match.group()
+                self.filtered_parts.append(f"Transition: {transition} {(grouped.partition("(")[2])[:-4]}\n")
+            self.next_is_transition = False
+
+        if "Delay: " in line:
+            delay_match = delay_pattern.search(line)
+            if delay_match != None:
+                self.filtered_parts.append(delay_match.group() + "  ")
+
+        if "globalTime=" in line:
+            global_time_match = global_time_pattern.search(line)
+            if global_time_match != None and self.current_global_time != global_time_match.group():
+                self.current_global_time = global_time_match.group()
+                self.filtered_parts.append(self.current_global_time + "\n")
+
+    def get_result(self) -> str:
+        if self.satisfied:
+            result = "Query was satisfied \n"
+        else:
+            result = "Query not satisfied \n"
+        return result + "".join(self.filtered_parts)
+
+    def get_error_output(self) -> str:
+        return "".join(self.kept_lines)
+
+    def get_verdict(self) -> str:
+        if self.error or not self.verdict_found:
+            return VERDICT_ERROR
+        return VERDICT_SATISFIED if self.satisfied else VERDICT_NOT_SATISFIED
+
+    def create_result(self, query: str, wall_time: float = None, usage: ProcessUsage = ProcessUsage(),
+                      trace_path: str = None, batch_size: int = 1) -> VerificationResult:
+        usage = ProcessUsage(*usage)
+        # The process of a batch verified every query of it, so its usage is kept apart from that of the query
+        batch_usage = ProcessUsage()
+        if batch_size > 1:
+            batch_usage, usage = usage, ProcessUsage()
+        return VerificationResult(
+            query=query.strip(),
+            verdict=self.get_verdict(),
+            result_value=self.result_value,
+            time_bounds=self.time_bounds,
+            wall_time=wall_time,
+            cpu_time=usage.cpu_time if usage.cpu_time != None else self.cpu_time,
+            peak_rss_kb=usage.peak_rss_kb,
+            user_time=usage.user_time,
+            system_time=usage.system_time,
+            verifyta_cpu_time=self.cpu_time,
+            verifyta_memory_kb=self.resident_memory_kb,
+            verifyta_virtual_memory_kb=self.virtual_memory_kb,
+            states_explored=self.states_explored,
+            states_stored=self.states_stored,
+            trace_path=trace_path,
+            batch_size=batch_size,
+            batch_cpu_time=batch_usage.cpu_time,
+            batch_peak_rss_kb=batch_usage.peak_rss_kb,
+            output="" if self.error else self.get_result())
+
+    def print_error(self):
+        print("Error during verification")
+        print(self.get_error_output())
+
+def parse_output(lines: Iterable[str]) -> str:
+    parser = OutputParser()
+    for line in lines:
+        if parser.feed(line):
+            break
+
+    if parser.error:
+        parser.print_error()
+        return ""
+    return parser.get_result()
+
+def filter_output(file_path_input: str) -> str:
+    with open(file_path_input, "r") as infile:
+        return parse_output(infile)
+
+# Copies each line to the given file before handing it on
+def tee_lines(lines: Iterable[str], file) -> Iterator[str]:
+    for line in lines:
+        file.write(line)
+        yield line
+
+# Stops a process without reaping it so its resource usage can still be read
+def stop_process(process: subprocess.Popen):
+    if not hasattr(os, "wait4"):
+        if process.poll() == None:
+            process.kill()
+        return
+    try:
+        os.kill(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+# Waits for the process and returns the CPU time in seconds and peak memory in KB it used, None where the platform cannot tell
+def wait_for_usage(process: subprocess.Popen) -> ProcessUsage:
+    if not hasattr(os, "wait4") or process.returncode != None:
+        process.wait()
+        return ProcessUsage()
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        process.wait() # Already reaped elsewhere such as by a cancel
+        return ProcessUsage()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    peak_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss # macOS reports bytes
+    return ProcessUsage(rusage.ru_utime + rusage.ru_stime, peak_rss_kb, rusage.ru_utime, rusage.ru_stime)
+
+# Feeds the output of verifyta to the parser while it runs, verifyta is stopped once the parser has what it needs.
+# Returns the CPU time and peak memory used by verifyta.
+def run_verifyta(command: List[str], parser, trace_file_path: str = None) -> ProcessUsage:
+    with start_verifyta(command) as process:
+        file = None
+        stopped_early = True
+        try:
+            lines = process.stdout
+            if trace_file_path != None:
+                file = open(trace_file_path, "w")
+                lines = tee_lines(process.stdout, file)
+            for line in lines:
+                if parser.feed(line):
+                    break
+            else:
+                stopped_early = False
+        finally:
+            if file != None:
+                file.close()
+            if stopped_early:
+                stop_process(process)
+            usage = wait_for_usage(process)
+    return usage
+
+# Parses the output of verifyta while it runs, stopping verifyta once the result is known
+def stream_output(command: List[str], trace_file_path: str = None) -> str:
+    parser = OutputParser()
+    run_verifyta(command, parser, trace_file_path)
+    if parser.error:
+        parser.print_error()
+        return ""
+    return parser.get_result()
+
+# Splits the output of one verifyta run over several queries into a parser per query
+class BatchOutputParser:
+    def __init__(self, amount_of_queries: int):
+        self.parsers = [OutputParser() for _ in range(amount_of_queries)]
+        self.header = OutputParser() # Everything before the first formula such as errors in the model
+        self.current = self.header
+        self.start_times = [None] * amount_of_queries
+        self.end_times = [None] * amount_of_queries
+        self.current_index = None
+
+    def feed(self, line: str):
+        formula_match = formula_pattern.search(line)
+        if formula_match != None:
+            index = int(formula_match.group(1)) - 1
+            if 0 <= index < len(self.parsers):
+                self.finish_current()
+                self.current = self.parsers[index]
+                self.current_index = index
+                self.start_times[index] = time.perf_counter()
+        self.current.feed(line)
+
+    def finish_current(self):
+        if self.current_index != None and self.end_times[self.current_index] == None:
+            self.end_times[self.current_index] = time.perf_counter()
+
+    # Time from the start of a formula until the next formula or the end of the output
+    def get_wall_time(self, index: int) -> Optional[float]:
+        if self.start_times[index] == None or self.end_times[index] == None:
+            return None
+        return self.end_times[index] - self.start_times[index]
+
+    # verifyta stops at the first error so any error means some verdicts are missing
+    def has_error(self) -> bool:
+        return self.header.error or any(parser.error or not parser.verdict_found for parser in self.parsers)
+
+# Whether verifyta would give a trace for the query so it has to be verified on its own to show it
+def has_trace(query: str, satisfied: bool) -> bool:
+    query = query.strip()
+    if query.startswith("E<>") or query.startswith("E[]"):
+        return satisfied
+    if query.startswith("A[]") or query.startswith("A<>") or "-->" in query:
+        return not satisfied
+    return False
+
+def get_cached_result(cache: ResultCache, cache_key: str, query: str) -> Optional[VerificationResult]:
+    entry = cache.get_entry(cache_key)
+    if entry == None:
+        return None
+    if "record" in entry:
+        result = VerificationResult.from_dict(entry["record"])
+    else:
+        verdict = VERDICT_SATISFIED if entry["result"].startswith("Query was satisfied") else VERDICT_NOT_SATISFIED
+        result = VerificationResult(query.strip(), verdict, output=entry["result"])
+    result.cached = True
+    return result
+
+def put_cached_result(cache: ResultCache, cache_key: str, result: VerificationResult):
+    cache.put(cache_key, result.query, result.output, result.to_dict())
+
+# Verifies all queries in a single run of verifyta so the model is only parsed and compiled once.
+# Results are returned in the same order as the queries.
+def run_queries_batch(model_path: str, queries: List[str], verifyta_path: str, cache: ResultCache = None, show_traces: bool = True) -> List[VerificationResult]:
+    queries = [query.strip() for query in queries]
+    results: List[Optional[VerificationResult]] = [None] * len(queries)
+    cache_keys = [None] * len(queries)
+
+    if cache != None:
+        for i, query in enumerate(queries):
+            try:
+                cache_keys[i] = cache.get_key(model_path, query, verifyta_path, get_verifyta_options(model_path))
+            except OSError:
+                break # Missing files are left for verifyta to report
+            results[i] = get_cached_result(cache, cache_keys[i], query)
+
+    missing = [i for i in range(len(queries)) if results[i] == None]
+    if len(missing) == 0:
+        return results
+
+    with tempfile.TemporaryDirectory(prefix="batch_", dir=work_folder_path) as work_folder:
+        query_path = os.path.join(work_folder, "queries.txt")
+        with open(query_path, 'w') as file:
+            file.write("\n".join(queries[i] for i in missing) + "\n")
+
+        # No trace is generated as traces of several queries cannot be told apart
+        command = [verifyta_path, model_path, query_path] + statistics_options + get_profile_options(model_path)
+        parser = BatchOutputParser(len(missing))
+        usage = run_verifyta(command, parser)
+        parser.finish_current()
+
+        for batch_index, i in enumerate(missing):
+            query_parser = parser.parsers[batch_index]
+            if parser.has_error() or (show_traces and has_trace(queries[i], query_parser.satisfied)):
+                # Verified on its own to either show the trace or report exactly which query failed
+                with open(query_path, 'w') as file:
+                    file.write(queries[i] + "\n")
+                results[i] = run_query(model_path, query_path, verifyta_path, 0)
+            else:
+                results[i] = query_parser.create_result(queries[i], parser.get_wall_time(batch_index), usage, batch_size=len(missing))
+
+            # Results without their trace are not the same as a result from verify_query
+            if cache_keys[i] != None and results[i].output != "" and (show_traces or not has_trace(queries[i], query_parser.satisfied)):
+                put_cached_result(cache, cache_keys[i], results[i])
+
+    return results
+
+def verify_queries_batch(model_path: str, queries: List[str], verifyta_path: str, cache: ResultCache = None, show_traces: bool = True) -> List[str]:
+    return [result.output for result in run_queries_batch(model_path, queries, verifyta_path, cache, show_traces)]
+
+def get_query_from_file(query_path: str, index: int) -> str:
+    with open(query_path, 'r') as file:
+        for i, line in enumerate(file):
+            if i == index:
+                return line
+    return ""
+
+def run_query(model_path, query_path, verifyta_path, index, trace_file_path: str = None, cache: ResultCache = None) -> VerificationResult:
+    query = ""
+    cache_key = None
+    try:
+        query = get_query_from_file(query_path, index)
+        if cache != None:
+            cache_key = cache.get_key(model_path, query, verifyta_path, get_verifyta_options(model_path))
+    except OSError:
+        pass # Missing files are left for verifyta to report
+    if cache_key != None:
+        cached_result = get_cached_result(cache, cache_key, query)
+        if cached_result != None:
+            return cached_result
+
+    command = [verifyta_path, model_path, query_path, "--query-index", f"{index}"] + get_verifyta_options(model_path)
+
+    # The output is filtered into a format that the user can understand while verifyta runs
+    parser = OutputParser(expect_statistics=True)
+    start_time = time.perf_counter()
+    usage = run_verifyta(command, parser, trace_file_path)
+    result = parser.create_result(query, time.perf_counter() - start_time, usage, trace_file_path)
+    if parser.error:
+        parser.print_error()
+
+    # An empty output means verification failed so it is not worth remembering
+    if cache_key != None and result.output != "":
+        put_cached_result(cache, cache_key, result)
+    return result
+
+def verify_query(model_path, query_path, verifyta_path, index, trace_file_path: str = None, cache: ResultCache = None) -> str:
+    return run_query(model_path, query_path, verifyta_path, index, trace_file_path, cache).output
+
+def run_verification_job(job: VerificationJob) -> tuple[str, VerificationResult]:
+    # Anything printed by the job (such as errors) is captured so the caller can print it in order
+    captured = io.StringIO()
+    with capture_output(captured):
+        if job.query != None:
+            with open(job.query_path, 'w') as file:
+                file.write(job.query)
+        result = run_query(job.model_path, job.query_path, job.verifyta_path, job.index, job.trace_path, job.cache)
+    return captured.getvalue(), result
+
+@dataclass
+class BatchJob:
+    model_path: str
+    queries: List[str]
+    verifyta_path: str
+    cache: Optional[ResultCache] = None
+    show_traces: bool = True
+
+def run_batch_job(job: BatchJob) -> tuple[str, List[VerificationResult]]:
+    captured = io.StringIO()
+    with capture_output(captured):
+        results = run_queries_batch(job.model_path, job.queries, job.verifyta_path, job.cache, job.show_traces)
+    return captured.getvalue(), results
+
+def get_worker_amount(workers: Optional[int]) -> int:
+    if workers == None or workers < 0:
+        return 1
+    if workers == 0:
+        return os.cpu_count() or 1
+    return workers
+
+# Yields what each job printed along with its result in the same order as the given jobs
+def verify_jobs_parallel(jobs: List[VerificationJob], workers: int) -> Iterator[tuple[str, VerificationResult]]:
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1))) as executor:
+        yield from executor.map(run_verification_job, jobs)
+
+# Each batch is a single verifyta run, so batches are spread over the workers rather than single queries
+def verify_batches_parallel(jobs: List[BatchJob], workers: int) -> Iterator[tuple[str, List[VerificationResult]]]:
+    if workers == 1:
+        yield from map(run_batch_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1))) as executor:
+        yield from executor.map(run_batch_job, jobs)
+
+# Creates a job per query each with their own work files inside work_folder
+def create_jobs(model_path: str, query_path: str, verifyta_path: str, work_folder: str, indices: List[int] = None, queries: List[str] = None, cache: ResultCache = None) -> List[VerificationJob]:
+    jobs = []
+    if queries != None:
+        for i, query in enumerate(queries):
+            jobs.append(VerificationJob(
+                model_path=model_path,
+                query_path=os.path.join(work_folder, f"query_{i}.txt"),
+                verifyta_path=verifyta_path,
+                index=0,
+                query=query,
+                cache=cache))
+    else:
+        for i in indices:
+            jobs.append(VerificationJob(
+                model_path=model_path,
+                query_path=query_path,
+                verifyta_path=verifyta_path,
+                index=i,
+                cache=cache))
+    return jobs
+
+def verify_queries_parallel(model_path: str, query_path: str, verifyta_path: str, indices: List[int], workers: int, cache: ResultCache = None) -> Iterator[tuple[str, VerificationResult]]:
+    jobs = create_jobs(model_path, query_path, verifyta_path, None, indices=indices, cache=cache)
+    yield from verify_jobs_parallel(jobs, workers)
@@ -0,0 +1,107 @@
+"""\
+Checks that a swarm protocol and the projections of its roles are well-formed before a model is built or verified.
+A protocol that is not well-formed is not implemented correctly by the roles, so verifying it only wastes time.
+
+The checked conditions are
+    causal consistency, a role emitting an event subscribes to the events leading to the location it emits from,
+    determinacy, every location has at most one transition per event and roles taking part after a branch
+    subscribe to every event that decides the branch, and
+    subscription completeness, every event is emitted by exactly one role and roles subscribe to the events of their projection.
+
+Each violation is reported with the role, event and location it concerns.
+
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from DataObjects.JSONTransfer import EventData, JSONTransfer
+
+class WellFormednessAnalyser:
+    def __init__(self, global_json_transfer: JSONTransfer, json_transfers: List[JSONTransfer]):
+        self.events: List[EventData] = global_json_transfer.own_events + global_json_transfer.other_events
+        self.json_transfers = json_transfers
+        self.event_names = {event.event_name for event in self.events}
+
+        self.outgoing: Dict[str, List[EventData]] = defaultdict(list)
+        self.incoming: Dict[str, List[EventData]] = defaultdict(list)
+        for event in self.events:
+            self.outgoing[event.source].append(event)
+            self.incoming[event.target].append(event)
+
+        # The role of an event is the role whose projection emits it
+        self.subscriptions: Dict[str, Set[str]] = {}
+        self.event_roles: Dict[str, Set[str]] = defaultdict(set)
+        for json_transfer in json_transfers:
+            self.subscriptions[json_transfer.name] = set(json_transfer.subscriptions)
+            for event in json_transfer.own_events:
+                self.event_roles[event.event_name].add(json_transfer.name)
+
+    def get_roles(self, event: EventData) -> List[str]:
+        return sorted(self.event_roles.get(event.event_name, set()))
+
+    def check_subscription_completeness(self) -> List[str]:
+        violations = []
+        for event_name in sorted(self.event_names):
+            roles = sorted(self.event_roles.get(event_name, set()))
+            if len(roles) == 0:
+                violations.append(f"Subscription completeness: no role emits {event_name}")
+            elif len(roles) > 1:
+                violations.append(f"Subscription completeness: {event_name} is emitted by several roles {', '.join(roles)}")
+
+        for json_transfer in self.json_transfers:
+            subscriptions = self.subscriptions[json_transfer.name]
+            for subscription in sorted(subscriptions - self.event_names):
+                violations.append(f"Subscription completeness: {json_transfer.name} subscribes to {subscription} which is not part of the protocol")
+            for event in json_transfer.own_events + json_transfer.other_events:
+                if event.event_name not in self.event_names:
+                    violations.append(f"Subscription completeness: {json_transfer.name} has {event.event_name} from {event.source} to {event.target} which is not part of the protocol")
+                elif event.event_name not in subscriptions:
+                    violations.append(f"Subscription completeness: {json_transfer.name} has {event.event_name} from {event.source} to {event.target} but does not subscribe to it")
+        return violations
+
+    def check_causal_consistency(self) -> List[str]:
+        violations = []
+        for event in self.events:
+            for role in self.get_roles(event):
+                for preceding in self.incoming[event.source]:
+                    if preceding.event_name not in self.subscriptions[role]:
+                        violations.append(f"Causal consistency: {role} emits {event.event_name} at {event.source} "
+                                          f"but does not subscribe to {preceding.event_name} which leads to {event.source}")
+        return violations
+
+    # Roles emitting an event reachable from the location, the branches themselves included
+    def find_active_roles(self, location: str) -> Set[str]:
+        roles = set()
+        visited = {location}
+        stack = [location]
+        while stack:
+            current = stack.pop()
+            for event in self.outgoing[current]:
+                roles.update(self.event_roles.get(event.event_name, set()))
+                if event.target not in visited:
+                    visited.add(event.target)
+                    stack.append(event.target)
+        return roles
+
+    def check_determinacy(self) -> List[str]:
+        violations = []
+        for location in sorted(self.outgoing):
+            branches = self.outgoing[location]
+            event_names = [event.event_name for event in branches]
+            for event_name in sorted(set(event_names)):
+                if event_names.count(event_name) > 1:
+                    violations.append(f"Determinacy: {location} has several transitions with {event_name}")
+            if len(set(event_names)) < 2:
+                continue
+
+            for role in sorted(self.find_active_roles(location)):
+                for event_name in sorted(set(event_names)):
+                    if event_name not in self.subscriptions[role]:
+                        violations.append(f"Determinacy: {role} takes part after the branch at {location} "
+                                          f"but does not subscribe to {event_name} which decides it")
+        return violations
+
+    # Returns every violation, empty if the protocol is well-formed
+    def analyse(self) -> List[str]:
+        return self.check_subscription_completeness() + self.check_causal_consistency() + self.check_determinacy()
@@ -2,5 +2,15 @@
 import sys
 import os
 
+import pytest
+
 # Add the src directory to the system path so it can be imported in all tests
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import History
+
+# Builds and verifications of the tests are recorded in a history of their own instead of the one in the source tree
+@pytest.fixture(autouse=True)
+def history_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(History, "history_path", str(tmp_path / "history.db"))
+    return str(tmp_path / "history.db")
@@ -0,0 +1,38 @@
+import pytest
+import copy
+
+from Benchmark import ScalingTier, compare_runs, read_results, run_scaling, save_results
+
+@pytest.mark.unit
+def test_scaling_run_is_recorded(tmp_path):
+    results = run_scaling([ScalingTier("tiny", 2, 10)], seeds=2)
+    tier = results["tiers"][0]
+    assert results["seeds"] == 2 and len(tier["runs"]) == 2
+    assert all(run["error"] == None for run in tier["runs"])
+    # Without verifyta every stage but verification is measured
+    for name in ["parse", "projection", "analyse", "createModel", "to_xml"]:
+        assert tier["median"][name] > 0
+        assert results["curves"][name] == [[10, tier["median"][name]]]
+    assert "verify" not in tier["median"]
+
+    file_path = str(tmp_path / "scaling.json")
+    save_results(results, file_path)
+    assert read_results(file_path) == results
+
+@pytest.mark.unit
+def test_stages_of_a_tier_are_compared():
+    def create_results(createModel: float, commands: int = 10, seeds: int = 3):
+        return {"seeds": seeds, "tiers": [{"name": "tiny", "roles": 2, "commands": commands, "median": {"parse": 0.5, "createModel": createModel}}]}
+
+    baseline = create_results(1.0)
+    assert compare_runs(create_results(1.2), baseline, 0.25) == []
+    assert compare_runs(create_results(1.3), baseline, 0.25) == ["tiny createModel took 1.3000s, baseline is 1.0000s"]
+    # Tiers generated with other settings or seeds are not comparable
+    assert compare_runs(create_results(2.0, commands=20), baseline, 0.25) == []
+    assert compare_runs(create_results(2.0, seeds=1), baseline, 0.25) == []
+    # Tiny stages are not failed for noise
+    assert compare_runs(create_results(0.004), create_results(0.001), 0.25) == []
+
+    slower = copy.deepcopy(baseline)
+    slower["tiers"][0]["median"]["verify"] = 3.0
+    assert compare_runs(slower, baseline, 0.25) == []
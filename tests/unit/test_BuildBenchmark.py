@@ -0,0 +1,42 @@
+import pytest
+import os
+
+from BuildBenchmark import compare_to_baseline, get_incomplete, measure_protocol, stage_names
+
+path_to_folder = os.path.join(os.path.dirname(__file__), "TestCaseProjection")
+
+@pytest.mark.unit
+def test_every_stage_is_measured():
+    result = measure_protocol(path_to_folder, repeats=2)
+    assert result["error"] == None
+    for name in ["identify_json_files", "parse_protocol_JSON_file", "generate_projection", "analyse_graph", "role", "layout", "log", "to_xml"]:
+        assert result["stages"][name]["seconds"] > 0
+
+@pytest.mark.unit
+def test_regressions_past_threshold():
+    def create_results(seconds: float, memory: float, protocols: int = 3):
+        return {"stages": {"role": {"seconds": seconds, "peak_memory_kb": memory, "protocols": protocols}}, "protocols": {}}
+
+    baseline = create_results(1.0, 1000)
+    assert compare_to_baseline(create_results(1.2, 1200), baseline, 0.25) == []
+    assert len(compare_to_baseline(create_results(1.3, 1300), baseline, 0.25)) == 2
+    # Measured over other protocols than the baseline so not comparable
+    assert compare_to_baseline(create_results(2.0, 2000, 2), baseline, 0.25) == []
+    # Tiny stages are not failed for noise
+    assert compare_to_baseline(create_results(0.004, 10), create_results(0.001, 1), 0.25) == []
+
+@pytest.mark.unit
+def test_incomplete_results_fail():
+    stage = {"seconds": 1.0, "peak_memory_kb": 1000, "protocols": 2}
+    results = {"stages": {name: dict(stage) for name in stage_names}, "protocols": {"A": {"error": None}, "B": {"error": None}}}
+    assert get_incomplete(results) == []
+    assert compare_to_baseline(results, results) == []
+
+    # A stage the baseline does not have is never let through
+    baseline = {"stages": {name: dict(stage) for name in stage_names if name != "layout"}}
+    assert compare_to_baseline(results, baseline) == ["layout has no baseline, update the baseline on a setup where every protocol builds"]
+
+    failed = {"stages": {name: dict(stage, protocols=1) for name in stage_names if name != "to_xml"},
+              "protocols": {"A": {"error": None}, "B": {"error": "dot not found"}}}
+    assert get_incomplete(failed) == ["B failed to build: dot not found"] + [f"{name} was measured for 1 of 2 protocols" for name in stage_names if name != "to_xml"] + ["to_xml was measured for 0 of 2 protocols"]
+    assert compare_to_baseline(failed, results) == ["B failed to build: dot not found"]
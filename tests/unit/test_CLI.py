@@ -70,7 +70,7 @@ def test_welcome_message():
 def test_help_message():
     user_inputs = ["-h", "q"]  # Simulate user typing 'q' to quit
     expected_output = """positional arguments:
-  {build,setArgs,showArgs,loadState,writeState,verify,autoVerify,verifyLog,q}"""
+  {build,setArgs,showArgs,loadState,writeState,verify,autoVerify,verifyLog,tune,simulate,explore,reverify,sweep,searchDelays,generate,benchmark,history,q}"""
 
     output_list = [expected_output]
 
@@ -377,3 +377,19 @@ def test_auto_verification_fault():
     run_and_assert(user_inputs, output_list)
 
     os.remove(path_to_model_projection)
+
+@pytest.mark.unit
+def test_build_headless_without_graphviz():
+    user_inputs = [set_all_args_cmd, f"build -pf {path_to_folder_projection} -ps {path_to_test_state_projection} --headless", "q"]
+
+    # Importing graphviz fails, a headless build must never need it
+    with patch.dict("sys.modules", {"graphviz": None}):
+        with patch("builtins.input", side_effect=user_inputs), patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+            output = mock_stdout.getvalue()
+
+    assert "XML file saved successfully at" in output
+    assert "Failed to build" not in output
+    assert os.path.isfile(path_to_model_projection)
+
+    os.remove(path_to_model_projection)
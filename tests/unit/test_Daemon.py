@@ -0,0 +1,250 @@
+import pytest
+import io
+import os
+import shutil
+import sys
+import threading
+import json
+import urllib.error
+import urllib.request
+
+import CLI
+from Daemon import Job, JobScheduler, ThreadLocalOutput, VerificationService, create_server
+from Verifier import VerificationCancelled
+
+path_to_folder = os.path.join(os.path.dirname(__file__), "TestCaseProjection")
+
+class FakeService:
+    def __init__(self):
+        self.order = []
+        self.release = threading.Event()
+
+    def get_handler(self, job_type: str):
+        def handler(job: Job):
+            if job.params.get("block"):
+                self.release.wait(10)
+            if job.token.cancelled:
+                raise VerificationCancelled()
+            print(f"ran {job.id}")
+            self.order.append(job.id)
+        return handler
+
+@pytest.fixture
+def scheduler_setup():
+    service = FakeService()
+    scheduler = JobScheduler(service, workers=1, max_queued=10)
+    yield service, scheduler
+    service.release.set()
+    scheduler.shutdown()
+
+@pytest.mark.unit
+def test_jobs_run_highest_priority_first(scheduler_setup):
+    service, scheduler = scheduler_setup
+    blocking = scheduler.submit("verify", {"block": True})
+    while blocking.status == "queued":
+        pass
+    low = scheduler.submit("verify", {}, priority=0)
+    high = scheduler.submit("verify", {}, priority=5)
+    service.release.set()
+
+    assert low.done.wait(5) and high.done.wait(5)
+    assert service.order == [blocking.id, high.id, low.id]
+    assert low.status == "done"
+
+@pytest.mark.unit
+def test_cancel_queued_and_running_jobs(scheduler_setup):
+    service, scheduler = scheduler_setup
+    running = scheduler.submit("verify", {"block": True})
+    queued = scheduler.submit("build", {})
+
+    scheduler.cancel(queued.id)
+    assert queued.status == "cancelled"
+
+    while running.status == "queued":
+        pass
+    scheduler.cancel(running.id)
+    service.release.set()
+    assert running.done.wait(5)
+    assert running.status == "cancelled"
+    assert service.order == []
+
+@pytest.mark.unit
+def test_unknown_job_type_is_rejected(scheduler_setup):
+    _, scheduler = scheduler_setup
+    with pytest.raises(ValueError):
+        scheduler.submit("deploy", {})
+
+@pytest.mark.unit
+def test_finished_jobs_are_forgotten():
+    service = FakeService()
+    scheduler = JobScheduler(service, workers=1, max_queued=10, max_finished=1)
+    try:
+        first = scheduler.submit("verify", {})
+        second = scheduler.submit("verify", {})
+        assert first.done.wait(5) and second.done.wait(5)
+        third = scheduler.submit("verify", {})
+        assert list(scheduler.jobs) == [second.id, third.id]
+
+        assert third.done.wait(5)
+        scheduler.job_ttl = 0
+        fourth = scheduler.submit("verify", {})
+        assert list(scheduler.jobs) == [fourth.id]
+    finally:
+        scheduler.shutdown()
+
+@pytest.mark.unit
+def test_job_output_is_captured_per_thread():
+    default = io.StringIO()
+    output = ThreadLocalOutput(default)
+    buffer = io.StringIO()
+
+    output.set_buffer(buffer)
+    output.write("job output")
+    thread = threading.Thread(target=output.write, args=("daemon output",))
+    thread.start()
+    thread.join()
+    output.set_buffer(None)
+
+    assert buffer.getvalue() == "job output"
+    assert default.getvalue() == "daemon output"
+
+# Sleeps before reading its query file so the runs of jobs submitted together overlap
+fake_verifyta_script = """import sys, time
+time.sleep(0.5)
+query = open(sys.argv[2]).read()
+print("Verifying formula 1 at query.txt:1")
+print(" -- Formula is NOT satisfied." if "Request_ID" in query else " -- Formula is satisfied.")
+print(" -- States stored : 1 states")
+print(" -- States explored : 1 states")
+print(" -- CPU user time used : 0 ms")
+print(" -- Virtual memory used : 1 KB")
+print(" -- Resident memory used : 1 KB")
+"""
+
+@pytest.fixture
+def service_setup(tmp_path, monkeypatch):
+    output = ThreadLocalOutput(sys.stdout)
+    monkeypatch.setattr(CLI, "shared_result_cache", None)
+    folder = tmp_path / "protocol"
+    shutil.copytree(path_to_folder, folder)
+    script = tmp_path / "verifyta.py"
+    script.write_text(fake_verifyta_script)
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    verifyta_path.chmod(0o755)
+
+    service = VerificationService(verifyta_path=str(verifyta_path), roots=[str(tmp_path)], cache_folder=str(tmp_path / "cache"))
+    scheduler = JobScheduler(service, workers=2, max_queued=10, output=output)
+    yield service, scheduler, str(folder), str(verifyta_path), output
+    scheduler.shutdown()
+
+def build(scheduler: JobScheduler, folder: str) -> Job:
+    job = scheduler.submit("build", {"folder": folder, "state_path": os.path.join(folder, "test_state.json"), "headless": True})
+    assert job.done.wait(30) and job.status == "done", job.error
+    return job
+
+@pytest.mark.unit
+def test_service_reuses_built_models_and_results(service_setup, tmp_path, monkeypatch):
+    service, scheduler, folder, verifyta_path, output = service_setup
+    monkeypatch.setattr(sys, "stdout", output)
+    build(scheduler, folder)
+    assert "Model unchanged since last build" in build(scheduler, folder).output
+    assert len(service.models) == 1
+
+    log_path = tmp_path / "log.txt"
+    log_path.write_text("Open")
+    params = {"model_path": os.path.join(folder, "uppaal_model.xml"), "log_path": str(log_path), "folder": folder}
+    jobs = []
+    for _ in range(2):
+        jobs.append(scheduler.submit("verifyLog", params))
+        assert jobs[-1].done.wait(30) and jobs[-1].status == "done", jobs[-1].error
+    assert [job.results[0]["cached"] for job in jobs] == [False, True]
+    assert service.result_cache.hits == 1
+    assert len(os.listdir(tmp_path / "cache")) > 0
+
+@pytest.mark.unit
+def test_concurrent_log_jobs_keep_their_query_and_output(service_setup, tmp_path, monkeypatch):
+    _, scheduler, folder, verifyta_path, output = service_setup
+    # Installed here as pytest replaces sys.stdout again after the fixtures are set up
+    monkeypatch.setattr(sys, "stdout", output)
+    build(scheduler, folder)
+
+    jobs = []
+    for name, log in [("satisfied", "Open"), ("not_satisfied", "Open, Request")]:
+        log_path = tmp_path / f"{name}.txt"
+        log_path.write_text(log)
+        jobs.append(scheduler.submit("verifyLog", {"model_path": os.path.join(folder, "uppaal_model.xml"), "log_path": str(log_path),
+                                                   "folder": folder, "no_cache": True}))
+    for job in jobs:
+        assert job.done.wait(30) and job.status == "done", job.error
+
+    # Both verifyta runs overlapped, a shared query file would have given both the same query
+    assert [job.results[0]["verdict"] for job in jobs] == ["satisfied", "not satisfied"]
+    assert "Request_ID" not in jobs[0].output and "Request_ID" in jobs[1].output
+    assert sys.stdout is output and output.get_buffer() == None
+
+@pytest.mark.unit
+def test_paths_outside_the_roots_are_refused(service_setup, tmp_path):
+    service, scheduler, folder, _, _ = service_setup
+    with pytest.raises(PermissionError):
+        service.check_params({"folder": os.path.dirname(tmp_path)})
+    with pytest.raises(PermissionError):
+        service.check_params({"model_path": os.path.join(folder, "..", "..", "uppaal_model.xml")})
+    service.check_params({"folder": folder, "state_path": ""})
+
+    # The state can still point the build somewhere else
+    job = scheduler.submit("build", {"state_path": os.path.join(folder, "test_state.json"), "headless": True})
+    assert job.done.wait(30) and job.status == "failed"
+    assert "PermissionError" in job.error
+
+@pytest.mark.unit
+def test_stores_keep_the_most_recently_used(tmp_path):
+    service = VerificationService(cache_folder=str(tmp_path / "cache"), max_stored=2)
+    for key in ["a", "b", "c"]:
+        service.remember(service.models, (key,), key)
+        service.get_stored(service.models, ("b",))
+    assert list(service.models) == [("c",), ("b",)]
+
+@pytest.fixture
+def server_setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(CLI, "shared_result_cache", None)
+    service = VerificationService(roots=[str(tmp_path)], cache_folder=str(tmp_path / "cache"))
+    server, scheduler = create_server(0, 1, 10, "secret", service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", scheduler
+    server.shutdown()
+    server.server_close()
+    scheduler.shutdown()
+
+def send(url: str, data: bytes = None, headers: dict = {}) -> int:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data, headers)) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+@pytest.mark.unit
+def test_requests_need_the_token_and_json(server_setup, tmp_path):
+    url, scheduler = server_setup
+    job = json.dumps({"type": "verify", "model_path": str(tmp_path / "missing.xml"), "queries": [], "verifyta_path": "/bin/false"}).encode("utf-8")
+    authorized = {"Authorization": "Bearer secret"}
+
+    assert send(f"{url}/stats") == 401
+    assert send(f"{url}/stats", headers={"Authorization": "Bearer guess"}) == 401
+    assert send(f"{url}/jobs", job, {"Content-Type": "application/json"}) == 401
+    # Forms can be posted cross site by a browser, json cannot without the page being allowed to
+    assert send(f"{url}/jobs", job, {**authorized, "Content-Type": "text/plain"}) == 415
+    outside = json.dumps({"type": "build", "folder": os.path.dirname(tmp_path)}).encode("utf-8")
+    assert send(f"{url}/jobs", outside, {**authorized, "Content-Type": "application/json"}) == 403
+
+    assert send(f"{url}/jobs", job, {**authorized, "Content-Type": "application/json; charset=utf-8"}) == 202
+    assert "verifyta_path" not in scheduler.jobs[1].params
+    assert send(f"{url}/stats", headers=authorized) == 200
+
+@pytest.mark.unit
+def test_invalid_wait_is_a_bad_request(server_setup, tmp_path):
+    url, scheduler = server_setup
+    job = scheduler.submit("verify", {"model_path": str(tmp_path / "missing.xml"), "queries": []})
+    assert send(f"{url}/jobs/{job.id}?wait=soon", headers={"Authorization": "Bearer secret"}) == 400
@@ -0,0 +1,63 @@
+import pytest
+import stat
+import sys
+
+from DelaySearch import STATUS_OK, STATUS_TIME, Budget, DelaySearch, SearchPoint, find_frontier, get_most_realistic, run_within_budget
+
+# The second query takes as many seconds as given in the model file, traces are never asked for
+fake_verifyta = f"""#!{sys.executable}
+import sys, time
+assert "--diagnostic" not in sys.argv and "-u" in sys.argv
+seconds = float(open(sys.argv[1]).read())
+print("Verifying formula 1 at query.txt:1")
+print(" -- Formula is satisfied.", flush=True)
+print("Verifying formula 2 at query.txt:2", flush=True)
+time.sleep(seconds)
+print(" -- Formula is NOT satisfied.", flush=True)
+"""
+
+@pytest.mark.unit
+def test_frontier_skips_dominated_runs():
+    # Cost grows with both the delay level and the replicas, a budget of 4 fits level 3 with 1 replica and level 1 with 2
+    runs = []
+    def within_budget(level: int, replicas: int) -> bool:
+        runs.append((level, replicas))
+        return (level + 1) * replicas <= 4
+
+    frontier = find_frontier(within_budget, 5, [1, 2, 3, 4, 5])
+    assert frontier == [(3, 1), (1, 2), (0, 3), (0, 4)]
+    assert len(runs) == len(set(runs)) == 12
+    assert (4, 2) not in runs and (2, 3) not in runs # Known to be over budget from a cheaper configuration
+
+@pytest.mark.unit
+def test_most_realistic_configuration():
+    def evaluate(overrides) -> SearchPoint:
+        cost = overrides.get("delay_amount", 0) + overrides["role_amount"] * (2 if overrides["delay_type"] == "E" else 1)
+        return SearchPoint(overrides, STATUS_OK if cost <= 4 else STATUS_TIME)
+
+    search = DelaySearch(evaluate, ["E", "S"], max_delay=3, replica_amounts=[1, 2])
+    best = get_most_realistic(search.search())
+
+    assert best.overrides == {"delay_type": "S", "delay_amount": 3, "role_amount": 1}
+    # Without delay the configuration is the same for both delay types so it is only run once
+    assert len([point for point in search.points.values() if point.overrides["delay_type"] == "N"]) == 2
+    assert get_most_realistic(DelaySearch(lambda overrides: SearchPoint(overrides, STATUS_TIME)).search()) == None
+
+@pytest.mark.unit
+def test_run_within_budget(tmp_path):
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(fake_verifyta)
+    verifyta_path.chmod(verifyta_path.stat().st_mode | stat.S_IEXEC)
+    query_path = tmp_path / "query.txt"
+    query_path.write_text("A[] true\nA[] false\n")
+    fast_model = tmp_path / "fast.xml"
+    fast_model.write_text("0")
+    slow_model = tmp_path / "slow.xml"
+    slow_model.write_text("30")
+
+    fast = run_within_budget(str(fast_model), str(query_path), str(verifyta_path), 2, Budget(5))
+    assert fast.status == STATUS_OK and fast.verdicts == [True, False]
+
+    slow = run_within_budget(str(slow_model), str(query_path), str(verifyta_path), 2, Budget(0.5))
+    assert slow.status == STATUS_TIME
+    assert slow.wall_time < 10 # Stopped long before the query would have finished
@@ -0,0 +1,79 @@
+import pytest
+import os
+
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from DataObjects.VerificationResult import VerificationResult
+from History import BenchmarkMeasurement, BuildRecord, History, format_trends, get_protocol_name
+
+def create_result(query: str, verdict: str, wall_time: float, cached: bool = False) -> VerificationResult:
+    return VerificationResult(query=query, verdict=verdict, wall_time=wall_time, states_explored=int(wall_time * 1000), cached=cached)
+
+@pytest.mark.unit
+def test_runs_are_grouped_by_protocol(tmp_path):
+    model_path = str(tmp_path / "Warehouse" / "uppaal_model.xml")
+    assert get_protocol_name(model_path) == "Warehouse"
+    assert get_protocol_name(str(tmp_path / "Warehouse")) == "Warehouse"
+
+    with History(str(tmp_path / "history.db")) as history:
+        history.record_run("verify", model_path, [create_result("A[] not deadlock", "satisfied", 0.5),
+                                                  create_result("E<> overflow", "not satisfied", 1.0, cached=True)], model_hash="abc")
+        history.record_run("verify", str(tmp_path / "Other" / "uppaal_model.xml"), [create_result("A[] not deadlock", "satisfied", 0.1)])
+
+        results = history.get_results(protocol="Warehouse")
+        assert [(result["query"], result["cached"], result["model_hash"]) for result in results] == \
+            [("E<> overflow", 1, "abc"), ("A[] not deadlock", 0, "abc")]
+        assert len(history.get_results(query="deadlock")) == 2
+
+@pytest.mark.unit
+def test_trends_find_slower_queries_and_changed_verdicts(tmp_path):
+    model_path = str(tmp_path / "Warehouse" / "uppaal_model.xml")
+    with History(str(tmp_path / "history.db")) as history:
+        for day, seconds in [("01", 1.0), ("02", 1.2), ("10", 3.6), ("11", 3.0)]:
+            history.record_run("verify", model_path, [create_result("A[] not deadlock", "satisfied", seconds),
+                                                      create_result("E<> overflow", "not satisfied" if day < "10" else "satisfied", 2.0)],
+                               time=f"2024-05-{day}T12:00:00")
+        # Cached results did not run verifyta and would hide the slowdown
+        history.record_run("verify", model_path, [create_result("A[] not deadlock", "satisfied", 0.001, cached=True)], time="2024-05-12T12:00:00")
+
+        trends = {trend.query: trend for trend in history.get_trends("2024-05-05")}
+        assert trends["A[] not deadlock"].runs_after == 2
+        assert trends["A[] not deadlock"].get_factor() == pytest.approx(3.0)
+        assert trends["E<> overflow"].verdict_changed()
+
+        lines = format_trends(list(trends.values()), 2.0).splitlines()
+        assert "3.0x slower" in lines[0] and "verdict changed from not satisfied to satisfied" in lines[1]
+        assert format_trends(list(trends.values())[:1], 4.0).startswith("No query changed")
+
+@pytest.mark.unit
+def test_builds_record_input_hashes(tmp_path):
+    folder = tmp_path / "Warehouse"
+    folder.mkdir()
+    protocol_file = folder / "protocol.json"
+    protocol_file.write_text('{"initial": "0", "transitions": []}')
+    model_settings = ModelSettings({"T": 2}, {"T": DelayType.NOTHING})
+
+    with History(str(tmp_path / "history.db")) as history:
+        history.record_build(BuildRecord(str(folder), [str(protocol_file)], model_settings, locations=4, transitions=6, timings={"to_xml": {"seconds": 0.1}}))
+        protocol_file.write_text('{"initial": "1", "transitions": []}')
+        history.record_build(BuildRecord(str(folder), [str(protocol_file)], model_settings))
+
+        builds = history.get_builds("Warehouse")
+        assert len(builds) == 2 and builds[1]["locations"] == 4
+        assert builds[0]["input_hash"] != builds[1]["input_hash"]
+        assert os.path.exists(tmp_path / "history.db")
+
+@pytest.mark.unit
+def test_benchmarks_are_recorded_per_stage(tmp_path):
+    with History(str(tmp_path / "history.db")) as history:
+        history.record_benchmark("build", [BenchmarkMeasurement("RobotPump", "role", 0.01, 24.0)], "3.12.1", time="2024-05-01T12:00:00")
+        history.record_benchmark("scaling", [BenchmarkMeasurement("tiny", "parse", 0.001), BenchmarkMeasurement("tiny", "to_xml", 0.005)],
+                                 time="2024-05-02T12:00:00")
+
+        assert [(row["name"], row["stage"], row["peak_memory_kb"]) for row in history.get_benchmarks("build")] == [("RobotPump", "role", 24.0)]
+        assert [row["stage"] for row in history.get_benchmarks(name="tiny")] == ["parse", "to_xml"]
+        assert [row["suite"] for row in history.get_benchmarks(since="2024-05-02")] == ["scaling", "scaling"]
+
+@pytest.mark.unit
+def test_tests_do_not_write_the_history_of_the_source_tree(history_path):
+    with History() as history:
+        assert history.file_path == history_path
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import patch
+
+from DataObjects.VerificationResult import VERDICT_SATISFIED, VerificationResult
+from Incremental import ModelComponents, find_dependencies, get_declared_name, plan_reverification, reverify, split_statements
+from ResultCache import ResultCache
+from Verifier import get_verifyta_options, put_cached_result
+
+declaration = """<declaration>
+const int logSize = 5;
+typedef int[0,NUMBER_OF_A-1] A_t;
+typedef struct {
+    int eventID;
+} logEntryType;
+const int NUMBER_OF_A = 1;
+const int Go_ID = 0;
+const int Stop_ID = STOP;
+int countA = 0;
+int countB = 0;
+logEntryType globalLog[logSize];
+urgent broadcast chan propagate_log;
+// Counts the events of A
+void incA(int event) {
+    if (event == Go_ID) { countA++; }
+}
+</declaration>"""
+
+template = """<template><name>{name}</name><parameter>{parameter}</parameter><declaration>int local = 0;</declaration>
+<location id="id{first}" x="{x}" y="0"><name x="{x}" y="2">l0</name></location>
+<location id="id{second}" x="0" y="{x}"><name x="2" y="{x}">l1</name><urgent/></location>
+<init ref="id{first}"/>
+<transition id="id{third}"><source ref="id{first}"/><target ref="id{second}"/><label kind="guard" x="{x}" y="0">{guard}</label>
+<label kind="assignment" x="0" y="0">{assignment}</label></transition></template>"""
+
+def create_model(stop: int = 1, guard_b: str = "countB &lt; 2", offset: int = 0, x: int = 0) -> str:
+    template_a = template.format(name="A", parameter="A_t id", first=1 + offset, second=2 + offset, third=3 + offset, x=x,
+                                 guard="countA &lt; 2", assignment="incA(Go_ID)")
+    template_b = template.format(name="B", parameter="", first=4 + offset, second=5 + offset, third=6 + offset, x=x,
+                                 guard=guard_b, assignment="countB++")
+    # The rebuilt model has the templates in another order
+    templates = template_a + template_b if offset == 0 else template_b + template_a
+    return f"<nta>{declaration.replace('STOP', str(stop))}{templates}<system>system A, B;</system></nta>"
+
+def write_file(path, content: str) -> str:
+    with open(path, 'w') as file:
+        file.write(content)
+    return str(path)
+
+@pytest.mark.unit
+def test_split_declaration():
+    statements = split_statements("const int a[2] = {1, 2}; typedef struct { int b; } entry; void f(int c) { if (c) { a[0] = c; } } chan go[a_t];")
+
+    assert [get_declared_name(statement) for statement in statements] == ["a", "entry", "f", "go"]
+    components = ModelComponents.from_xml(create_model())
+    assert {"logSize", "A_t", "logEntryType", "countA", "incA", "propagate_log", "A", "B", "system"} <= set(components.signatures)
+    assert components.references["incA"] == {"Go_ID", "countA"}
+
+@pytest.mark.unit
+def test_dependencies_of_queries():
+    components = ModelComponents.from_xml(create_model())
+    dependencies = find_dependencies(components, "E<> countA == 2 and forall(i : A_t) A(i).l1")
+
+    assert dependencies.roles == {"A"}
+    assert dependencies.events == {"Go"}
+    assert dependencies.settings == {"role_amount.A"}
+    assert "B" not in dependencies.components and "countB" not in dependencies.components
+    assert find_dependencies(components, "A[] not deadlock").roles == {"A", "B"}
+
+@pytest.mark.unit
+def test_affected_queries():
+    queries = ["E<> countA == 2", "E<> countB == 2", "A[] not deadlock"]
+    before = ModelComponents.from_xml(create_model())
+
+    # Rebuilding with other ids, layout and template order changes nothing
+    rebuilt = ModelComponents.from_xml(create_model(offset=10, x=-250))
+    assert [dependencies.affected for dependencies in plan_reverification(before, rebuilt, queries)] == [False, False, False]
+
+    changed_b = ModelComponents.from_xml(create_model(guard_b="countB &lt; 3"))
+    assert [dependencies.affected for dependencies in plan_reverification(before, changed_b, queries)] == [False, True, True]
+
+    # Stop_ID is not used by A so changing it only affects queries naming it
+    changed_stop = ModelComponents.from_xml(create_model(stop=2))
+    assert [dependencies.affected for dependencies in plan_reverification(before, changed_stop, queries + ["E<> Stop_ID == 2"])] == [False, False, False, True]
+
+@pytest.mark.unit
+def test_reverify_reuses_results(tmp_path):
+    verifyta = write_file(tmp_path / "verifyta", "")
+    before = write_file(tmp_path / "before.xml", create_model())
+    after = write_file(tmp_path / "after.xml", create_model(guard_b="countB &lt; 3"))
+    cache = ResultCache(folder_path=str(tmp_path / "cache"))
+    queries = ["E<> countA == 2", "E<> countB == 2"]
+
+    def fake_run_queries_batch(model_path, batch_queries, verifyta_path, cache=None, show_traces=True):
+        return [VerificationResult(query, VERDICT_SATISFIED, output="Query was satisfied \n") for query in batch_queries]
+
+    with patch.object(ResultCache, "get_verifyta_version", return_value="UPPAAL 5.0.0"):
+        put_cached_result(cache, cache.get_key(before, queries[0], verifyta, get_verifyta_options(before)),
+                          VerificationResult(queries[0], VERDICT_SATISFIED, output="Query was satisfied \n"))
+        with patch("Incremental.run_queries_batch", side_effect=fake_run_queries_batch) as run:
+            plan, results = reverify(before, after, queries, verifyta, cache)
+        stored = cache.get_entry(cache.get_key(after, queries[0], verifyta, get_verifyta_options(after)))
+
+    assert [dependencies.affected for dependencies in plan] == [False, True]
+    assert run.call_args[0][1] == ["E<> countB == 2"]
+    assert results[0].cached and not results[1].cached
+    assert stored != None
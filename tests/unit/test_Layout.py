@@ -0,0 +1,37 @@
+import pytest
+
+from DataObjects.Location import Location, LocationType
+from DataObjects.Transition import Transition
+from Layout import get_layered_layout, layered_layout
+
+def create_template(names, edges, first_id):
+    locations = [Location(id=first_id + i, name=name, x=0, y=0, locationType=LocationType.NEITHER) for i, name in enumerate(names)]
+    transitions = [Transition(id=first_id + len(names) + i, source=locations[source], target=locations[target]) for i, (source, target) in enumerate(edges)]
+    return locations, transitions
+
+@pytest.mark.unit
+def test_layers_follow_the_transitions():
+    # A loop back to the start, two transitions between the same locations and a loop on a location
+    locations, transitions = create_template(["0", "1", "2", "3"], [(0, 1), (1, 2), (1, 2), (2, 3), (3, 0), (2, 2)], 1)
+    layered_layout(locations, transitions, locations[0])
+
+    assert locations[0].y < locations[1].y < locations[2].y < locations[3].y
+    assert len({(location.x, location.y) for location in locations}) == 4
+    # Nails go between the locations of the transition, parallel transitions get their own
+    assert all(len(transition.nails) == 1 for transition in transitions[:5])
+    assert locations[0].y < transitions[0].nails[0][1] < locations[1].y
+    assert transitions[1].nails != transitions[2].nails
+    assert len(transitions[5].nails) == 2 and all(nail[0] > locations[2].x for nail in transitions[5].nails)
+
+@pytest.mark.unit
+def test_layouts_are_reused_for_the_same_shape():
+    get_layered_layout.cache_clear()
+    edges = [(0, 1), (1, 2), (0, 2)]
+    first_locations, first_transitions = create_template(["a", "b", "c"], edges, 1)
+    second_locations, second_transitions = create_template(["x", "y", "z"], edges, 100)
+    layered_layout(first_locations, first_transitions, first_locations[0])
+    layered_layout(second_locations, second_transitions, second_locations[0])
+
+    assert get_layered_layout.cache_info().hits == 1
+    assert [(location.x, location.y) for location in first_locations] == [(location.x, location.y) for location in second_locations]
+    assert [transition.nails for transition in first_transitions] == [transition.nails for transition in second_transitions]
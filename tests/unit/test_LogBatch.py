@@ -0,0 +1,36 @@
+import pytest
+from unittest.mock import patch
+
+from DataObjects.VerificationResult import VERDICT_NOT_SATISFIED, VERDICT_SATISFIED, VerificationResult
+from LogBatch import LogBatchStats, read_logs, verify_logs_batch
+from QueryGenerator import generate_log_query
+
+def fake_batch(reachable):
+    verified = []
+    def run_queries_batch(model_path, queries, verifyta_path, cache=None, show_traces=True):
+        verified.extend(queries)
+        return [VerificationResult(query, VERDICT_SATISFIED if query in reachable else VERDICT_NOT_SATISFIED) for query in queries]
+    return run_queries_batch, verified
+
+@pytest.mark.unit
+def test_read_logs(tmp_path):
+    log_path = tmp_path / "logs.txt"
+    log_path.write_text('A, B,C\n\n["A", "B"]\n{"log": ["C"]}\n')
+    assert read_logs(str(log_path)) == [["A", "B", "C"], ["A", "B"], ["C"]]
+
+@pytest.mark.unit
+def test_unreachable_prefix_prunes_extensions():
+    logs = [["A", "B", "C"], ["A", "B", "D"], ["A", "B", "C"], ["E"], ["A", "F"]]
+    # The shared prefix A is reachable, A,B is not so neither of its extensions is verified
+    reachable = {generate_log_query(["A"], False), generate_log_query(["A", "F"], False)}
+    run_queries_batch, verified = fake_batch(reachable)
+
+    stats = LogBatchStats()
+    with patch("Verifier.run_queries_batch", run_queries_batch):
+        results = verify_logs_batch("model.xml", logs, "verifyta", batch_size=2, stats=stats)
+
+    assert [result.verdict for result in results] == [VERDICT_NOT_SATISFIED, VERDICT_NOT_SATISFIED, VERDICT_NOT_SATISFIED, VERDICT_NOT_SATISFIED, VERDICT_SATISFIED]
+    assert results[0].query == generate_log_query(logs[0], False)
+    assert results[0] is not results[2]
+    assert sorted(verified) == sorted(generate_log_query(log, False) for log in [["A"], ["E"], ["A", "B"], ["A", "F"]])
+    assert (stats.logs, stats.unique_logs, stats.queries, stats.pruned, stats.rounds) == (5, 4, 4, 2, 2)
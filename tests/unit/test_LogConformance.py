@@ -0,0 +1,58 @@
+import pytest
+import os
+
+from CLI import get_log_checker, load_json_transfers
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from JSONParser import parse_protocol_JSON_file
+from LogConformance import LogConformanceChecker, read_model_event_names, read_model_settings
+from ModelBuilder import createModel
+
+path_to_folder = os.path.join(os.path.dirname(__file__), "TestCaseProjection")
+path_to_protocol = os.path.join(path_to_folder, "SwarmProtocol.json")
+path_to_other_folder = os.path.join(os.path.dirname(__file__), "..", "integration", "RobotPump")
+
+@pytest.fixture
+def checker():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(path_to_protocol)
+    model_settings = ModelSettings({json_transfer.name: 1 for json_transfer in json_transfers}, {}, path_bound=2, log_size=20)
+    return LogConformanceChecker(global_json_transfer, json_transfers, model_settings)
+
+@pytest.mark.unit
+def test_possible_logs_are_kept(checker):
+    assert checker.check(["Open", "Request", "Get", "Deliver", "Close"]) == None
+    assert checker.check(["Open", "Request", "Get", "Deliver", "Close"], valid_only=True) == None
+    # Close competes with Request so it may still be emitted in the global log
+    assert checker.check(["Open", "Request", "Close"]) == None
+
+@pytest.mark.unit
+def test_impossible_logs_are_rejected(checker):
+    assert "not part of the protocol" in checker.check(["Open", "Nope"])
+    assert "cannot be emitted by Forklift" in checker.check(["Open", "Get"])
+    assert "does not follow the global protocol" in checker.check(["Open", "Request", "Close"], valid_only=True)
+    assert "path bound" in checker.check(["Open"] + ["Request", "Get", "Deliver"] * 3)
+    assert "log size" in checker.check(["Open"] * 21)
+
+@pytest.mark.unit
+def test_read_model_settings(tmp_path):
+    model_path = tmp_path / "model.xml"
+    model_path.write_text("""<nta><declaration>const int logSize = 16;
+const int NUMBER_OF_Door = 1;
+const int NUMBER_OF_Transport = 2;</declaration>
+<label kind="guard">nonExitCounterMap[id + id_start][Request_ID] &lt; 3</label></nta>""")
+
+    model_settings = read_model_settings(str(model_path))
+    assert model_settings.role_amount == {"Door": 1, "Transport": 2}
+    assert (model_settings.log_size, model_settings.path_bound) == (16, 3)
+
+@pytest.mark.unit
+def test_prefilter_only_uses_the_protocol_of_the_model(tmp_path):
+    global_json_transfer, json_transfers, _ = load_json_transfers(path_to_folder)
+    model_settings = ModelSettings({json_transfer.name: 1 for json_transfer in json_transfers},
+                                   {json_transfer.name: DelayType.NOTHING for json_transfer in json_transfers})
+    model_path = tmp_path / "uppaal_model.xml"
+    model_path.write_text(createModel(json_transfers, global_json_transfer, model_settings, headless=True).to_xml())
+
+    assert {"Open", "Request", "Get", "Deliver", "Close"} <= read_model_event_names(str(model_path))
+    assert get_log_checker(str(model_path), [path_to_folder]) != None
+    # Logs of this model would all be rejected by the checker of another protocol
+    assert get_log_checker(str(model_path), [path_to_other_folder]) == None
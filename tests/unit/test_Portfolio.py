@@ -0,0 +1,109 @@
+import pytest
+import stat
+import sys
+import threading
+import time
+
+from Portfolio import count_portfolio_wins, log_portfolio_result, race_query, run_query_portfolio, verify_query_portfolio
+from Verifier import CancelToken, set_cancel_token
+
+# Answers at once when searching depth first and never answers for any other search order
+fake_verifyta = f"""#!{sys.executable}
+import sys, time
+args = sys.argv[1:]
+if args[args.index("-o") + 1] != "1":
+    time.sleep(60)
+sum(range(3000000))
+print("Verifying formula 1 at query.txt:1")
+print(" -- Formula is satisfied.")
+print(" -- States explored : 340 states")
+print(" -- CPU user time used : 250 ms")
+print(" -- Resident memory used : 8192 KB", flush=True)
+"""
+
+@pytest.fixture
+def portfolio_setup(tmp_path):
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(fake_verifyta)
+    verifyta_path.chmod(verifyta_path.stat().st_mode | stat.S_IEXEC)
+    query_path = tmp_path / "query.txt"
+    query_path.write_text("A[] true\n")
+    model_path = tmp_path / "model.xml"
+    model_path.write_text("<nta></nta>")
+    return str(model_path), str(query_path), str(verifyta_path), str(tmp_path / "portfolio_log.jsonl")
+
+@pytest.mark.unit
+def test_race_returns_first_conclusive_strategy(portfolio_setup):
+    model_path, query_path, verifyta_path, _ = portfolio_setup
+    strategies = {"bfs": ["-o", "0"], "dfs": ["-o", "1"]}
+
+    start_time = time.perf_counter()
+    winner, parsers, _, _ = race_query(model_path, query_path, verifyta_path, 0, strategies)
+
+    assert winner == "dfs"
+    assert parsers["dfs"].get_result() == "Query was satisfied \n"
+    assert time.perf_counter() - start_time < 30 # The losing process was killed
+
+@pytest.mark.unit
+def test_portfolio_logs_winner(portfolio_setup):
+    model_path, query_path, verifyta_path, log_path = portfolio_setup
+    strategies = {"bfs": ["-o", "0"], "dfs": ["-o", "1"]}
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("Portfolio.portfolio_log_path", log_path)
+        assert verify_query_portfolio(model_path, query_path, verifyta_path, 0, strategies=strategies) == "Query was satisfied \n"
+
+    assert count_portfolio_wins(log_path=log_path) == {"dfs": 1}
+
+@pytest.mark.unit
+def test_winner_statistics_and_usage_are_attached(portfolio_setup):
+    model_path, query_path, verifyta_path, log_path = portfolio_setup
+    strategies = {"bfs": ["-o", "0"], "dfs": ["-o", "1"]}
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("Portfolio.portfolio_log_path", log_path)
+        result = run_query_portfolio(model_path, query_path, verifyta_path, 0, strategies=strategies)
+
+    assert result.satisfied and result.wall_time < 30
+    assert result.states_explored == 340 and result.verifyta_cpu_time == 0.25 and result.verifyta_memory_kb == 8192
+    if sys.platform != "win32":
+        assert result.peak_rss_kb > 0 and result.user_time > 0
+        assert result.cpu_time == pytest.approx(result.user_time + result.system_time)
+
+@pytest.mark.unit
+def test_count_wins_per_model(tmp_path):
+    log_path = str(tmp_path / "portfolio_log.jsonl")
+    log_portfolio_result("a.xml", "A[] true", "bfs", 1.0, {}, log_path)
+    log_portfolio_result("a.xml", "A[] true", "dfs", 1.0, {}, log_path)
+    log_portfolio_result("b.xml", "A[] true", "dfs", 1.0, {}, log_path)
+    log_portfolio_result("b.xml", "A[] false", None, 1.0, {}, log_path)
+
+    assert count_portfolio_wins(log_path=log_path) == {"bfs": 1, "dfs": 2}
+    assert count_portfolio_wins("b.xml", log_path) == {"dfs": 1}
+    assert count_portfolio_wins(log_path=str(tmp_path / "missing.jsonl")) == {}
+
+@pytest.mark.unit
+def test_cancel_kills_every_racing_strategy(portfolio_setup):
+    model_path, query_path, verifyta_path, _ = portfolio_setup
+    # Neither strategy searches depth first so both would run for a minute
+    strategies = {"bfs": ["-o", "0"], "random": ["-o", "2"]}
+    token = CancelToken()
+    race = {}
+
+    def run():
+        set_cancel_token(token)
+        try:
+            race["winner"] = race_query(model_path, query_path, verifyta_path, 0, strategies)[0]
+        finally:
+            set_cancel_token(None)
+
+    thread = threading.Thread(target=run)
+    start_time = time.perf_counter()
+    thread.start()
+    while len(token.processes) < 2 and time.perf_counter() - start_time < 10:
+        time.sleep(0.01)
+    token.cancel()
+    thread.join(30)
+
+    assert not thread.is_alive() and race["winner"] == None
+    assert time.perf_counter() - start_time < 30
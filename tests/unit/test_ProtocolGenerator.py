@@ -0,0 +1,40 @@
+import pytest
+
+from Benchmark import ScalingTier, run_scaling
+from ProtocolGenerator import GeneratorSettings, generate_protocol, is_well_formed
+
+@pytest.mark.unit
+def test_generated_protocol_is_reproducible():
+    settings = GeneratorSettings(roles=4, commands=30, branch_fanout=3, loop_depth=2, seed=7)
+    assert generate_protocol(settings) == generate_protocol(settings)
+    assert generate_protocol(settings) != generate_protocol(GeneratorSettings(roles=4, commands=30, branch_fanout=3, loop_depth=2, seed=8))
+
+@pytest.mark.unit
+def test_generated_protocol_matches_settings():
+    for seed in range(25):
+        settings = GeneratorSettings(roles=3, commands=20, branch_fanout=3, loop_depth=2, branch_probability=0.3, loop_probability=0.3, seed=seed)
+        protocol = generate_protocol(settings)
+        assert len(protocol["transitions"]) == 20
+        assert {transition["label"]["role"] for transition in protocol["transitions"]} == {"R0", "R1", "R2"}
+        assert is_well_formed(protocol)
+
+@pytest.mark.unit
+def test_generator_without_branches_or_loops_is_a_sequence():
+    protocol = generate_protocol(GeneratorSettings(roles=2, commands=6, branch_fanout=1, loop_depth=0, seed=1))
+    sources = [transition["source"] for transition in protocol["transitions"]]
+    assert len(set(sources)) == 6
+    assert all(transition["target"] not in sources[:i + 1] for i, transition in enumerate(protocol["transitions"]))
+
+@pytest.mark.unit
+def test_scaling_records_every_tier():
+    results = run_scaling([ScalingTier("a", 2, 5), ScalingTier("b", 3, 15)], seeds=2)
+    assert [tier["name"] for tier in results["tiers"]] == ["a", "b"]
+    for tier in results["tiers"]:
+        assert len(tier["runs"]) == 2
+        for name in ["parse", "projection", "analyse"]:
+            assert tier["median"][name] >= 0
+        # Stages after a failure, such as a missing verifyta, are not timed
+        for run in tier["runs"]:
+            if run["error"] != None:
+                assert "verify" not in run["stages"]
+    assert [commands for commands, _ in results["curves"]["parse"]] == [5, 15]
@@ -0,0 +1,81 @@
+import pytest
+import os
+import sys
+
+from CLI import auto_verify_queries, get_location_bounds, identify_json_files, str_timebound
+from DataObjects.JSONTransfer import EventData, JSONTransfer
+from DataObjects.VerificationResult import VerificationResult
+from JSONParser import parse_protocol_JSON_file
+from QueryGenerator import QueryGenerator
+
+path_to_folder = os.path.join(os.path.dirname(__file__), "TestCaseProjection")
+
+# Written by hand, l2 and l3 cannot be reached from the initial location
+def create_projections():
+    robot = JSONTransfer("Robot", "l0", [], own_events=[EventData("Move", "l0", "l1"), EventData("Stop", "l2", "l3")],
+                         other_events=[EventData("Reset", "l1", "l0")])
+    pump = JSONTransfer("Pump", "l0", [], own_events=[EventData("Pump", "l0", "l1")], other_events=[EventData("Move", "l1", "l2")])
+    return QueryGenerator.from_json_transfers(None, [robot, pump])
+
+@pytest.mark.unit
+def test_unreachable_locations_get_no_query():
+    query_generator = create_projections()
+    role_unreachable_dict = query_generator.find_unreachable_locations()
+    assert role_unreachable_dict == {"Robot": {"l2", "l3"}, "Pump": set()}
+
+    role_queries_dict = query_generator.generate_timebound_queries(role_unreachable_dict)
+    assert role_queries_dict["Robot"] == ["bounds{Robot(0).l0}: globalTime", "bounds{Robot(0).l1}: globalTime"]
+    assert len(role_queries_dict["Pump"]) == 3
+    assert len(query_generator.generate_timebound_queries()["Robot"]) == 4
+
+@pytest.mark.unit
+def test_generated_projections_reach_every_location():
+    _, protocol_json_file, _ = identify_json_files(path_to_folder)
+    query_generator = QueryGenerator.from_json_transfers(*parse_protocol_JSON_file(protocol_json_file))
+    assert all(len(locations) == 0 for locations in query_generator.find_unreachable_locations().values())
+
+@pytest.mark.unit
+def test_location_bounds_table():
+    queries = ["bounds{Robot(0).l0}: globalTime", "bounds{Robot(0).l1}: globalTime", "bounds{Robot(0).l4}: globalTime"]
+    results = [VerificationResult(queries[0], "satisfied", time_bounds="[0,5]"),
+               VerificationResult(queries[1], "not satisfied"),
+               VerificationResult(queries[2], "satisfied")]
+    assert get_location_bounds(queries, results, {"l2"}) == {"l0": "[0,5]", "l1": "Unreachable", "l2": "Unreachable", "l4": "Unreachable"}
+
+# Answers every bounds query of its query file, l1 is never reached. Each run logs its query file and the amount of queries
+batch_verifyta = """import sys
+queries = open(sys.argv[2]).read().splitlines()
+with open(sys.argv[1], "a") as file:
+    file.write(f"{sys.argv[2]} {len(queries)}\\n")
+for i, query in enumerate(queries):
+    print(f"Verifying formula {i + 1} at {sys.argv[2]}:{i + 1}")
+    if ".l1}" in query:
+        print(" -- Formula is NOT satisfied.")
+    else:
+        print(" -- Formula is satisfied.")
+        print(f"globalTime: [0,{i + 1}]")
+"""
+
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [1, 2])
+def test_timebound_roles_are_verified_in_a_batch_each(tmp_path, capsys, workers):
+    script = tmp_path / "verifyta.py"
+    script.write_text(batch_verifyta)
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    verifyta_path.chmod(0o755)
+    # The model path is where the stub logs its runs
+    log_path = tmp_path / "runs.log"
+
+    records = auto_verify_queries(str(log_path), create_projections(), str_timebound, str(verifyta_path), workers, None)
+    assert [record.query for record in records] == ["bounds{Robot(0).l0}: globalTime", "bounds{Robot(0).l1}: globalTime",
+                                                    "bounds{Pump(0).l0}: globalTime", "bounds{Pump(0).l1}: globalTime",
+                                                    "bounds{Pump(0).l2}: globalTime"]
+    runs = log_path.read_text().splitlines()
+    assert sorted(int(run.split()[-1]) for run in runs) == [2, 3]
+    assert len({run.split()[0] for run in runs}) == 2
+
+    output = capsys.readouterr().out
+    robot_table = output[output.index("Robot has the following time bounds"):output.index("Pump has the following time bounds")]
+    assert robot_table.splitlines()[1:] == ["Location l0: [0,1]", "Location l1: Unreachable", "Location l2: Unreachable", "Location l3: Unreachable"]
+    assert "Location l2: [0,3]" in output[output.index("Pump has the following time bounds"):]
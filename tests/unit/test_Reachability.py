@@ -0,0 +1,50 @@
+import pytest
+import os
+
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from DataObjects.VerificationResult import VERDICT_ERROR, VERDICT_NOT_SATISFIED, VERDICT_SATISFIED
+from JSONParser import parse_protocol_JSON_file
+from Reachability import ReachabilityChecker
+from Simulator import simulate
+
+path_to_protocol = os.path.join(os.path.dirname(__file__), "TestCaseProjection", "SwarmProtocol.json")
+
+def create_model_settings(json_transfers, delay_type: DelayType, log_size: int) -> ModelSettings:
+    return ModelSettings({json_transfer.name: 1 for json_transfer in json_transfers},
+                         {json_transfer.name: delay_type for json_transfer in json_transfers},
+                         path_bound=2, log_size=log_size,
+                         delay_amount={json_transfer.name: 1 for json_transfer in json_transfers})
+
+@pytest.mark.unit
+def test_queries_of_untimed_model():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(path_to_protocol)
+    checker = ReachabilityChecker(global_json_transfer, json_transfers, create_model_settings(json_transfers, DelayType.NOTHING, 20))
+    logs = [["Open", "Request", "Get", "Deliver", "Close"], ["Open", "Close", "Request"], ["Nope"]]
+    results = checker.check(logs)
+
+    assert [result.verdict for result in results] == [VERDICT_SATISFIED, VERDICT_SATISFIED, VERDICT_SATISFIED,
+                                                      VERDICT_SATISFIED, VERDICT_NOT_SATISFIED, VERDICT_ERROR]
+    assert results[0].query.startswith("A[]") and results[3].query.startswith("E<> globalLog[0]")
+    # Open and two rounds of Request, Get and Deliver before Close
+    assert results[2].result_value == 8
+    assert checker.stats.complete and checker.stats.states == results[0].states_stored
+
+@pytest.mark.unit
+def test_exploration_covers_simulation():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(path_to_protocol)
+    model_settings = create_model_settings(json_transfers, DelayType.EVENTS_EMITTED, 8)
+    report = simulate(global_json_transfer, json_transfers, model_settings, 200, seed=3)
+    logs = [list(log) for log in report.global_logs]
+
+    checker = ReachabilityChecker(global_json_transfer, json_transfers, model_settings)
+    results = checker.check(logs)
+    assert all(result.verdict == VERDICT_SATISFIED for result in results[3:])
+    assert results[1].verdict == VERDICT_NOT_SATISFIED # The log size is too small so the model overflows
+    assert results[2].result_value == 8
+
+    # Depth first finds the same states, an exploration that is stopped early cannot prove anything
+    states = checker.stats.states
+    assert all(result.verdict == VERDICT_SATISFIED for result in checker.check(logs, depth_first=True)[3:])
+    assert checker.stats.states == states
+    results = checker.check([], max_states=10)
+    assert not checker.stats.complete and results[0].verdict == VERDICT_ERROR
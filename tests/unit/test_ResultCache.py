@@ -0,0 +1,113 @@
+import pytest
+import os
+from unittest.mock import patch
+
+from ResultCache import MemoryResultCache, ResultCache, strip_layout
+from Verifier import run_query, verify_query
+
+model_xml = """<nta><template><location id="id1" x="{x}" y="-12"><name x="{x}" y="-10">l0</name></location>
+<transition id="id2"><source ref="id1"/><target ref="id1"/><label kind="guard" x="3" y="{x}">x &lt;= 2</label><nail x="{x}" y="4"/></transition></template></nta>"""
+
+def write_file(path, content: str) -> str:
+    with open(path, 'w') as file:
+        file.write(content)
+    return str(path)
+
+@pytest.fixture
+def cache_setup(tmp_path):
+    verifyta = write_file(tmp_path / "verifyta", "")
+    queries = write_file(tmp_path / "queries.txt", "A[] not deadlock\nE<> R(0).l1\n")
+    cache = ResultCache(folder_path=str(tmp_path / "cache"))
+    with patch.object(ResultCache, "get_verifyta_version", return_value="UPPAAL 5.0.0"):
+        yield tmp_path, verifyta, queries, cache
+
+@pytest.mark.unit
+def test_strip_layout():
+    assert strip_layout(model_xml.format(x=10)) == strip_layout(model_xml.format(x=-250))
+    assert "nail" not in strip_layout(model_xml.format(x=10))
+    assert "x &lt;= 2" in strip_layout(model_xml.format(x=10))
+
+@pytest.mark.unit
+def test_key_ignores_layout(cache_setup):
+    tmp_path, verifyta, _, cache = cache_setup
+    model1 = write_file(tmp_path / "model1.xml", model_xml.format(x=10))
+    model2 = write_file(tmp_path / "model2.xml", model_xml.format(x=99))
+
+    key1 = cache.get_key(model1, "A[] not deadlock\n", verifyta, ["--diagnostic", "0"])
+    key2 = cache.get_key(model2, "A[] not deadlock", verifyta, ["--diagnostic", "0"])
+    key3 = cache.get_key(model2, "A[] not deadlock", verifyta, ["--diagnostic", "1"])
+    key4 = cache.get_key(model2, "E<> R(0).l1", verifyta, ["--diagnostic", "0"])
+
+    assert key1 == key2
+    assert key2 != key3
+    assert key2 != key4
+
+@pytest.mark.unit
+def test_cache_hit_skips_verifyta(cache_setup):
+    tmp_path, verifyta, queries, cache = cache_setup
+    model = write_file(tmp_path / "model.xml", model_xml.format(x=10))
+
+    def fake_run_verifyta(command, parser, trace_file_path=None):
+        parser.feed(" -- Formula is satisfied.\n")
+        return 0.5, 1024
+
+    with patch("Verifier.run_verifyta", side_effect=fake_run_verifyta) as run:
+        first = run_query(model, queries, verifyta, 1, cache=cache)
+        second = run_query(model, queries, verifyta, 1, cache=cache)
+        other = verify_query(model, queries, verifyta, 0, cache=cache)
+
+    assert first.output == second.output == other == "Query was satisfied \n"
+    assert run.call_count == 2
+    assert not first.cached and second.cached
+    assert second.cpu_time == 0.5 and second.peak_rss_kb == 1024 # The record is cached along with the result
+
+@pytest.mark.unit
+def test_eviction(cache_setup):
+    _, _, _, cache = cache_setup
+    cache.max_size = 300
+
+    for i in range(10):
+        cache.put(f"key{i}", "A[] not deadlock", "x" * 50)
+        os.utime(cache.get_entry_path(f"key{i}"), ns=(i * 10**9, i * 10**9))
+
+    cache.evict()
+    remaining = sorted(os.listdir(cache.folder_path))
+    total_size = sum(os.path.getsize(os.path.join(cache.folder_path, name)) for name in remaining)
+
+    assert total_size <= 300
+    assert "key9.json" in remaining
+    assert "key0.json" not in remaining
+
+@pytest.mark.unit
+def test_writes_only_scan_over_the_limit(cache_setup):
+    _, _, _, cache = cache_setup
+    cache.put("key0", "A[] not deadlock", "x" * 50)
+    entry_size = os.path.getsize(cache.get_entry_path("key0"))
+    cache.max_size = 3 * entry_size
+
+    with patch.object(ResultCache, "scan_entries", wraps=cache.scan_entries) as scan:
+        cache.put("key1", "A[] not deadlock", "x" * 50)
+        cache.put("key1", "A[] not deadlock", "y" * 50) # Overwriting does not grow the cache
+        cache.put("key2", "A[] not deadlock", "x" * 50)
+        assert scan.call_count == 0 and cache.total_size == 3 * entry_size
+
+        os.utime(cache.get_entry_path("key0"), ns=(0, 0))
+        cache.put("key3", "A[] not deadlock", "x" * 50)
+        assert scan.call_count == 1
+
+    assert sorted(os.listdir(cache.folder_path)) == ["key1.json", "key2.json", "key3.json"]
+    assert cache.total_size == 3 * entry_size
+
+@pytest.mark.unit
+def test_memory_cache_falls_back_to_disk(tmp_path):
+    disk_cache = ResultCache(folder_path=str(tmp_path / "cache"))
+    disk_cache.put("a", "A[] true", "Query was satisfied \n")
+
+    memory_cache = MemoryResultCache(folder_path=str(tmp_path / "cache"), max_entries=1)
+    assert memory_cache.get("a") == "Query was satisfied \n"
+    assert memory_cache.entries == {"a": {"query": "A[] true", "result": "Query was satisfied \n"}}
+
+    memory_cache.put("b", "A[] false", "Query not satisfied \n")
+    assert list(memory_cache.entries.keys()) == ["b"]
+    assert memory_cache.get("missing") == None
+    assert (memory_cache.hits, memory_cache.misses) == (1, 1)
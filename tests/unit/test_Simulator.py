@@ -0,0 +1,44 @@
+import pytest
+import os
+
+from DataObjects.ModelSettings import DelayType, ModelSettings
+from JSONParser import parse_protocol_JSON_file
+from LogConformance import LogConformanceChecker
+from Simulator import OUTCOME_END, OUTCOME_OVERFLOW, simulate
+
+path_to_protocol = os.path.join(os.path.dirname(__file__), "TestCaseProjection", "SwarmProtocol.json")
+
+def create_model_settings(json_transfers, delay_type: DelayType, amount: int) -> ModelSettings:
+    return ModelSettings({json_transfer.name: amount for json_transfer in json_transfers},
+                         {json_transfer.name: delay_type for json_transfer in json_transfers},
+                         path_bound=2, log_size=20,
+                         delay_amount={json_transfer.name: 2 for json_transfer in json_transfers})
+
+@pytest.mark.unit
+def test_simulation_without_delay_follows_protocol():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(path_to_protocol)
+    model_settings = create_model_settings(json_transfers, DelayType.NOTHING, 1)
+    report = simulate(global_json_transfer, json_transfers, model_settings, 200, seed=1)
+
+    assert report.outcomes == {OUTCOME_END: 200}
+    assert [sorted(end_state) for end_state in report.end_states] == [["Door(0).l4", "Forklift(0).l4", "Transport(0).l4"]]
+    # Without delays every log is seen by everyone so the global log follows the protocol
+    checker = LogConformanceChecker(global_json_transfer, json_transfers, model_settings)
+    for log in report.global_logs:
+        assert checker.check(list(log), valid_only=True) == None
+    assert report.global_logs == report.true_global_logs
+
+@pytest.mark.unit
+def test_simulation_with_delay_is_repeatable():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(path_to_protocol)
+    model_settings = create_model_settings(json_transfers, DelayType.EVENTS_EMITTED, 2)
+    report = simulate(global_json_transfer, json_transfers, model_settings, 300, seed=7)
+
+    assert set(report.outcomes) <= {OUTCOME_END, OUTCOME_OVERFLOW}
+    checker = LogConformanceChecker(global_json_transfer, json_transfers, model_settings)
+    for log in report.true_global_logs:
+        assert checker.check(list(log), valid_only=True) == None
+    # Competing branches let roles emit events that are later discarded
+    assert any(checker.check(list(log), valid_only=True) != None for log in report.global_logs)
+
+    assert simulate(global_json_transfer, json_transfers, model_settings, 300, seed=7).global_logs == report.global_logs
@@ -0,0 +1,100 @@
+import pytest
+import os
+import time
+from unittest.mock import patch
+
+from CLI import verify_model_spool
+from DataObjects.VerificationResult import VERDICT_ERROR, VERDICT_SATISFIED, VerificationResult
+from Spool import Spool, run_worker
+
+@pytest.fixture
+def spool_setup(tmp_path):
+    model_path = tmp_path / "model.xml"
+    model_path.write_text('<nta><location x="1" y="2"/></nta>')
+    return Spool(str(tmp_path / "spool")), str(model_path)
+
+@pytest.mark.unit
+def test_submit_writes_model_and_jobs(spool_setup):
+    spool, model_path = spool_setup
+    job_ids = spool.submit(model_path, ["A[] true\n", "E<> false"])
+
+    assert len(os.listdir(spool.models_path)) == 1
+    assert sorted(os.listdir(spool.queue_path)) == sorted(f"{job_id}.json" for job_id in job_ids)
+    assert spool.submit(model_path, ["A[] true"]) == job_ids[:1] # Same model and query give the same job
+
+@pytest.mark.unit
+def test_job_is_claimed_once(spool_setup):
+    spool, model_path = spool_setup
+    spool.submit(model_path, ["A[] true"])
+
+    job = spool.claim()
+    assert job["query"] == "A[] true"
+    assert spool.claim() == None
+    assert os.listdir(spool.claimed_path) == [f"{job['id']}.json"]
+
+    assert spool.requeue_stale(-1) == 1
+    assert spool.claim()["id"] == job["id"]
+
+@pytest.mark.unit
+def test_worker_writes_results(spool_setup):
+    spool, model_path = spool_setup
+    job_ids = spool.submit(model_path, ["A[] true", "A[] false"])
+
+    def fake_run_query(model_path, query_path, verifyta_path, index, cache=None):
+        with open(query_path, 'r') as file:
+            query = file.read()
+        if "true" in query:
+            return VerificationResult(query, VERDICT_SATISFIED, output="Query was satisfied \n")
+        return VerificationResult(query, VERDICT_ERROR)
+
+    with patch("Spool.run_query", side_effect=fake_run_query):
+        assert run_worker(spool, "verifyta", exit_when_empty=True) == 2
+
+    results = spool.wait(job_ids, timeout=0)
+    assert [result["result"] for result in results] == ["Query was satisfied \n", ""]
+    assert [result["record"]["verdict"] for result in results] == [VERDICT_SATISFIED, VERDICT_ERROR]
+    assert os.listdir(spool.claimed_path) == []
+
+    # Only the failed job is queued again
+    spool.submit(model_path, ["A[] true", "A[] false"])
+    assert os.listdir(spool.queue_path) == [f"{job_ids[1]}.json"]
+
+@pytest.mark.unit
+def test_failing_job_does_not_stop_the_worker(spool_setup):
+    spool, model_path = spool_setup
+    job_ids = spool.submit(model_path, ["A[] true", "A[] false"])
+
+    def fake_run_query(model_path, query_path, verifyta_path, index, cache=None):
+        with open(query_path, 'r') as file:
+            query = file.read()
+        if "false" in query:
+            raise OSError("verifyta not found")
+        return VerificationResult(query, VERDICT_SATISFIED, output="Query was satisfied \n")
+
+    with patch("Spool.run_query", side_effect=fake_run_query):
+        assert run_worker(spool, None, exit_when_empty=True) == 2
+
+    results = spool.wait(job_ids, timeout=0)
+    assert [result["record"]["verdict"] for result in results] == [VERDICT_SATISFIED, VERDICT_ERROR]
+    assert "verifyta not found" in results[1]["output"]
+    assert os.listdir(spool.claimed_path) == []
+
+@pytest.mark.unit
+def test_claims_of_dead_workers_are_requeued(spool_setup, capsys):
+    spool, model_path = spool_setup
+    spool.submit(model_path, ["A[] true"])
+    job = spool.claim()
+    claimed_file = os.path.join(spool.claimed_path, f"{job['id']}.json")
+
+    # A running worker keeps its claim fresh
+    os.utime(claimed_file, (0, 0))
+    with spool.keep_claimed(job, interval=0.01):
+        time.sleep(0.2)
+    assert time.time() - os.path.getmtime(claimed_file) < 5
+
+    # The worker died long ago, the coordinator queues the job again and reports it when nobody verifies it in time
+    os.utime(claimed_file, (0, 0))
+    records = verify_model_spool(model_path, ["A[] true"], "verifyta", spool.folder_path, 0, True, timeout=0.2)
+    assert [record.verdict for record in records] == [VERDICT_ERROR]
+    assert "No result within 0.2 seconds" in capsys.readouterr().out
+    assert os.listdir(spool.queue_path) == [f"{job['id']}.json"]
@@ -0,0 +1,54 @@
+import pytest
+import csv
+
+from DataObjects.VerificationResult import VERDICT_NOT_SATISFIED, VERDICT_SATISFIED, VerificationResult
+from Sweep import SweepVariant, apply_overrides, format_variant, get_combinations, write_table
+
+state_data = {"role_amount": {"Door": 1, "Forklift": 1}, "delay_type": {"Door": "N", "Forklift": "N"},
+              "delay_amount": {"Door": 0, "Forklift": 0}, "log_size": 20, "path_bound": 2, "branch_tracking": True}
+
+@pytest.mark.unit
+def test_combinations():
+    combinations = get_combinations({"role_amount": [1, {"Door": 3}], "log_size": [10, 20, 30]})
+
+    assert len(combinations) == 6
+    assert combinations[0] == {"role_amount": 1, "log_size": 10}
+    assert get_combinations([{"log_size": 5}]) == [{"log_size": 5}]
+    with pytest.raises(ValueError):
+        get_combinations({"verifyta_path": ["a"]})
+    with pytest.raises(ValueError):
+        get_combinations({"log_size": []})
+
+@pytest.mark.unit
+def test_apply_overrides():
+    variant_state = apply_overrides(state_data, {"role_amount": {"Door": 3}, "delay_type": "E", "delay_amount": 2, "log_size": 10})
+
+    assert variant_state["role_amount"] == {"Door": 3, "Forklift": 1}
+    assert variant_state["delay_type"] == {"Door": "E", "Forklift": "E"}
+    assert variant_state["delay_amount"] == {"Door": 2, "Forklift": 2}
+    assert variant_state["log_size"] == 10
+    assert state_data["role_amount"]["Door"] == 1
+    with pytest.raises(ValueError):
+        apply_overrides(state_data, {"role_amount": {"Transport": 2}})
+    with pytest.raises(ValueError):
+        apply_overrides(state_data, {"delay_type": "X"})
+    with pytest.raises(ValueError):
+        apply_overrides(state_data, {"log_size": 0})
+
+@pytest.mark.unit
+def test_results_table(tmp_path):
+    queries = ["A[] not deadlock", "E<> Door(0).l1"]
+    built = SweepVariant(0, {"log_size": 10}, results=[
+        VerificationResult(queries[0], VERDICT_SATISFIED, wall_time=1.5, states_stored=100, peak_rss_kb=2048),
+        VerificationResult(queries[1], VERDICT_NOT_SATISFIED, wall_time=0.5, states_stored=50, peak_rss_kb=2048)])
+    failed = SweepVariant(1, {"log_size": 20}, error="graphviz is missing")
+    table_path = tmp_path / "results.csv"
+    write_table([built, failed], queries, str(table_path))
+
+    with open(table_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 4
+    assert rows[0]["settings"] == "log_size=10" and rows[0]["verdict"] == VERDICT_SATISFIED and rows[0]["states_stored"] == "100"
+    assert rows[3]["variant"] == "1" and rows[3]["verdict"] == "error"
+    assert format_variant(built) == "Variant 0 (log_size=10): 1 satisfied, 1 not satisfied, 0 errors, 2.00s, 150 states stored, 2 MB"
+    assert format_variant(failed) == "Variant 1 (log_size=20): not built, graphviz is missing"
@@ -0,0 +1,53 @@
+import pytest
+import os
+import pstats
+import tracemalloc
+
+from Timing import StageTimer, format_timings, timed
+
+@pytest.mark.unit
+def test_timer_adds_up_repeated_and_nested_stages():
+    timer = StageTimer()
+    tracemalloc.start()
+    try:
+        with timer.stage("outer"):
+            for _ in range(3):
+                with timer.stage("inner"):
+                    data = [0] * 100000
+                    del data
+    finally:
+        tracemalloc.stop()
+
+    stages = timer.to_dict()["stages"]
+    assert list(stages) == ["outer", "inner"]
+    assert stages["inner"]["calls"] == 3 and stages["inner"]["parent"] == "outer"
+    assert stages["outer"]["seconds"] >= stages["inner"]["seconds"]
+    # The list was freed before the outer stage ended, its memory still counts for it
+    assert stages["outer"]["peak_memory_kb"] >= stages["inner"]["peak_memory_kb"] > 700
+
+    with pytest.raises(ValueError):
+        with timer.stage("failing"):
+            raise ValueError()
+    assert timer.to_dict()["stages"]["failing"]["failed"]
+
+@pytest.mark.unit
+def test_profiles_and_snapshots_per_stage(tmp_path):
+    timer = StageTimer(str(tmp_path), snapshots=True)
+    timer.start()
+    with timed(timer, "parse"):
+        sorted(range(1000))
+    with timed(timer, "build"):
+        with timed(timer, "role"):
+            sum(range(1000))
+    timer.stop()
+
+    assert not tracemalloc.is_tracing()
+    assert timer.to_dict()["total_seconds"] >= timer.seconds["parse"] + timer.seconds["build"]
+    # Nested stages are part of the profile of the outermost stage
+    assert sorted(os.listdir(tmp_path)) == ["build_1.snapshot", "parse_1.snapshot", "role_1.snapshot"]
+    assert sorted(os.path.basename(file_path) for file_path in timer.write_profiles()) == ["build.prof", "parse.prof"]
+    assert pstats.Stats(str(tmp_path / "build.prof")).total_calls > 0
+
+    lines = format_timings(timer).splitlines()
+    assert [line.split()[0] for line in lines[1:]] == ["parse", "build", "role", "total"]
+    assert lines[3].startswith("  role")
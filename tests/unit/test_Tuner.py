@@ -0,0 +1,80 @@
+import pytest
+import json
+import stat
+import sys
+
+import Verifier
+from Tuner import TuneResult, get_best_result, get_option_combinations, run_candidate, save_profile, tune
+
+# Depth first search answers quickly, any other search order is slow and an unknown option is an error
+fake_verifyta = f"""#!{sys.executable}
+import sys, time
+args = sys.argv[1:]
+if "-X" in args:
+    print("Unknown option -X"); print("[error] usage"); sys.exit(1)
+if args[args.index("-o") + 1] != "1":
+    time.sleep(2)
+print("Verifying formula 1 at query.txt:1")
+print(" -- Formula is satisfied.")
+print("Verifying formula 2 at query.txt:2")
+print(" -- Formula is NOT satisfied.", flush=True)
+"""
+
+@pytest.fixture
+def tune_setup(tmp_path):
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(fake_verifyta)
+    verifyta_path.chmod(verifyta_path.stat().st_mode | stat.S_IEXEC)
+    query_path = tmp_path / "query.txt"
+    query_path.write_text("A[] true\nA[] false\n")
+    model_path = tmp_path / "model.xml"
+    model_path.write_text("<nta></nta>")
+    return str(model_path), str(query_path), str(verifyta_path)
+
+@pytest.mark.unit
+def test_option_combinations():
+    grid = {"order": [["-o", "0"], ["-o", "1"]], "representation": [[], ["-C"]]}
+    assert get_option_combinations(grid) == [["-o", "0"], ["-o", "0", "-C"], ["-o", "1"], ["-o", "1", "-C"]]
+
+@pytest.mark.unit
+def test_best_result_prefers_time_then_memory():
+    results = [TuneResult(["a"], 2.0, 10), TuneResult(["b"], 1.0, 50), TuneResult(["c"], 1.0, 20), TuneResult(["d"], 0.1, 1, "error")]
+    assert get_best_result(results).options == ["c"]
+    assert get_best_result([TuneResult(["a"], status="killed")]) == None
+
+@pytest.mark.unit
+def test_run_candidate(tune_setup):
+    model_path, query_path, verifyta_path = tune_setup
+
+    result = run_candidate(model_path, query_path, verifyta_path, ["-o", "1"], 2)
+    assert result.status == "ok"
+    assert result.verdicts == [True, False]
+    assert result.wall_time > 0
+    if sys.platform != "win32":
+        assert result.peak_memory_kb > 0
+
+    assert run_candidate(model_path, query_path, verifyta_path, ["-o", "1", "-X"], 2).status == "error"
+    assert run_candidate(model_path, query_path, verifyta_path, ["-o", "0"], 2, time_limit=0.2).status == "killed"
+
+@pytest.mark.unit
+def test_tune_saves_profile_used_by_verifier(tune_setup, tmp_path, monkeypatch, capsys):
+    model_path, query_path, verifyta_path = tune_setup
+    grid = {"order": [["-o", "1"], ["-o", "0"]]}
+
+    results = tune(model_path, query_path, verifyta_path, grid)
+    assert [result.status for result in results] == ["ok", "killed"]
+
+    file_path = str(tmp_path / "profile.json")
+    save_profile(model_path, query_path, verifyta_path, get_best_result(results), results, file_path)
+    with open(file_path, 'r') as file:
+        profiles = json.load(file)["profiles"]
+    assert [profile["options"] for profile in profiles.values()] == [["-o", "1"]]
+
+    monkeypatch.setattr(Verifier, "profile_path", file_path)
+    assert Verifier.get_verifyta_options(model_path) == ["--diagnostic", "0", "-u", "-o", "1"]
+    assert "Using the verifyta options -o 1 tuned for" in capsys.readouterr().out
+
+    # Other models were not tuned so keep the default options
+    other_model_path = tmp_path / "other.xml"
+    other_model_path.write_text("<nta><declaration>int other;</declaration></nta>")
+    assert Verifier.get_verifyta_options(str(other_model_path)) == ["--diagnostic", "0", "-u"]
@@ -0,0 +1,230 @@
+import pytest
+import sys
+from io import StringIO
+from unittest.mock import patch
+
+from Verifier import BatchOutputParser, OutputParser, create_jobs, filter_output, has_trace, parse_output, run_queries_batch, run_query, stream_output, verify_jobs_parallel, verify_queries_parallel
+
+trace_output = """Options for the verification:
+  Generating shortest trace
+
+Verifying formula 1 at query_file.txt:1
+ -- Formula is satisfied.
+Showing example trace.
+
+State:
+( Transport(0).l0 Door(0).l0 Transport_log(0).initial Door_log(0).initial )
+globalTime=0
+
+Transition:
+  Transport(0).l0->Transport(0).l1 { 1, do_log_update_Transport[0]!, setLogEntryForUpdate(Request_ID, id, -2, false) }
+
+State:
+( Transport(0).l1 Door(0).l0 Transport_log(0).accepting_emitted_1 Door_log(0).initial )
+globalTime=0
+
+Delay: 4
+
+State:
+( Transport(0).l1 Door(0).l0 Transport_log(0).l_prop1 Door_log(0).initial )
+globalTime=4
+
+Transition:
+  Transport_log(0).l_prop1->Transport_log(0).initial { 1, propagate_log!, 1 }
+"""
+
+expected_trace_result = """Query was satisfied 
+State: ['Transport(0).l0', 'Door(0).l0']
+globalTime=0
+Transition:   Transport(0).l0->Transport(0).l1  Request
+State: ['Transport(0).l1', 'Door(0).l0']
+Delay: 4  globalTime=4
+Role   Transport(0) propagated to all other roles
+"""
+
+def parse(output: str) -> str:
+    parser = OutputParser()
+    for line in output.splitlines(keepends=True):
+        if parser.feed(line):
+            break
+    return parser.get_result()
+
+@pytest.mark.unit
+def test_trace_is_filtered():
+    assert parse(trace_output) == expected_trace_result
+
+@pytest.mark.unit
+def test_filter_output_matches_parser(tmp_path):
+    trace_file = tmp_path / "trace.txt"
+    trace_file.write_text(trace_output)
+    assert filter_output(str(trace_file)) == expected_trace_result
+
+@pytest.mark.unit
+def test_not_satisfied():
+    assert parse("Verifying formula 1 at q:1\n -- Formula is NOT satisfied.\n") == "Query not satisfied \n"
+
+@pytest.mark.unit
+def test_stops_after_result():
+    parser = OutputParser()
+    assert not parser.feed(" -- Formula is satisfied.\n")
+    assert parser.feed(" -- Result: 12\n")
+    assert parser.get_result() == "Query was satisfied \n-- Result: 12"
+
+@pytest.mark.unit
+def test_error_is_printed():
+    output = "Verifying formula 1 at query_file.txt:1\nquery_file.txt:1: [error] has no member named Nope.\n"
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        assert parse_output(output.splitlines(keepends=True)) == ""
+        assert "Error during verification" in mock_stdout.getvalue()
+        assert "[error] has no member named Nope." in mock_stdout.getvalue()
+
+@pytest.mark.unit
+def test_stream_output_kills_verifyta_after_result():
+    # A process that would keep printing forever once the result is printed
+    script = "import itertools\nprint(' -- Formula is satisfied.')\nprint(' -- Result: 7', flush=True)\nfor i in itertools.count(): print('State:')"
+    assert stream_output([sys.executable, "-c", script]) == "Query was satisfied \n-- Result: 7"
+
+@pytest.mark.unit
+def test_batch_output_is_split_by_formula():
+    output = """Options for the verification:
+  Generating no trace
+
+Verifying formula 1 at queries.txt:1
+ -- Formula is satisfied.
+Verifying formula 2 at queries.txt:2
+ -- Formula is NOT satisfied.
+Verifying formula 3 at queries.txt:3
+ -- Formula is satisfied.
+ -- Result: 11
+"""
+    parser = BatchOutputParser(3)
+    for line in output.splitlines(keepends=True):
+        parser.feed(line)
+
+    assert not parser.has_error()
+    assert [query_parser.get_result() for query_parser in parser.parsers] == ["Query was satisfied \n", "Query not satisfied \n", "Query was satisfied \n-- Result: 11"]
+
+@pytest.mark.unit
+def test_batch_output_missing_verdict_is_error():
+    parser = BatchOutputParser(2)
+    for line in ["Verifying formula 1 at queries.txt:1\n", " -- Formula is satisfied.\n"]:
+        parser.feed(line)
+    assert parser.has_error()
+
+statistics_output = """Verifying formula 1 at queries.txt:1
+ -- Formula is satisfied.
+ -- Result: 5
+ -- States stored : 120 states
+ -- States explored : 340 states
+ -- CPU user time used : 250 ms
+ -- Virtual memory used : 40960 KB
+ -- Resident memory used : 8192 KB
+"""
+
+@pytest.mark.unit
+def test_statistics_are_read_before_stopping():
+    parser = OutputParser(expect_statistics=True)
+    lines = statistics_output.splitlines(keepends=True)
+    assert not any(parser.feed(line) for line in lines[:-1])
+    assert parser.feed(lines[-1])
+
+    result = parser.create_result("sup: x")
+    assert (result.states_stored, result.states_explored) == (120, 340)
+    assert (result.verifyta_cpu_time, result.verifyta_memory_kb, result.verifyta_virtual_memory_kb) == (0.25, 8192, 40960)
+    assert result.cpu_time == 0.25 # verifyta's own time when the operating system could not tell
+
+@pytest.mark.unit
+def test_process_usage_is_attached(tmp_path):
+    query_path = tmp_path / "queries.txt"
+    query_path.write_text("sup: x\n")
+    # Burns some CPU time before printing the statistics verifyta prints when started with -u
+    script = tmp_path / "verifyta.py"
+    script.write_text(f"import sys\nassert '-u' in sys.argv\nsum(range(3000000))\nprint({statistics_output!r})")
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    verifyta_path.chmod(0o755)
+
+    result = run_query("model.xml", str(query_path), str(verifyta_path), 0)
+    assert result.result_value == 5 and result.states_explored == 340 and result.verifyta_memory_kb == 8192
+    if sys.platform != "win32":
+        assert result.peak_rss_kb > 0 and result.user_time > 0 and result.system_time != None
+        assert result.cpu_time == pytest.approx(result.user_time + result.system_time)
+
+@pytest.mark.unit
+def test_batch_usage_is_kept_apart_from_the_queries(tmp_path):
+    second_formula = statistics_output.replace("formula 1 at queries.txt:1", "formula 2 at queries.txt:2").replace("250 ms", "750 ms")
+    script = tmp_path / "verifyta.py"
+    script.write_text(f"sum(range(3000000))\nprint({statistics_output + second_formula!r})")
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    verifyta_path.chmod(0o755)
+
+    results = run_queries_batch("model.xml", ["sup: x", "sup: y"], str(verifyta_path), show_traces=False)
+    # The process ran both queries, only what verifyta reports per formula belongs to a single query
+    assert [result.cpu_time for result in results] == [0.25, 0.75]
+    assert all(result.batch_size == 2 and result.peak_rss_kb == None and result.user_time == None for result in results)
+    if sys.platform != "win32":
+        assert results[0].batch_peak_rss_kb > 0 and results[0].batch_cpu_time > 0
+        assert results[0].batch_cpu_time == results[1].batch_cpu_time
+
+# Reads the query verifyta is given, so "sup: N" answers N, and the first queries are made to finish last
+parallel_verifyta = """import sys, time
+query_path = sys.argv[2]
+index = int(sys.argv[sys.argv.index("--query-index") + 1])
+with open(query_path) as file:
+    value = int(file.read().splitlines()[index].split(":")[1])
+with open(sys.argv[1], "a") as file:
+    file.write(query_path + "\\n")
+time.sleep(0.1 * (3 - value))
+print(f"Verifying formula 1 at {query_path}:1\\n -- Formula is satisfied.\\n -- Result: {value}")
+print(" -- CPU user time used : 1 ms\\n -- Virtual memory used : 1 KB\\n -- Resident memory used : 1 KB")
+"""
+
+def create_parallel_verifyta(tmp_path) -> str:
+    script = tmp_path / "verifyta.py"
+    script.write_text(parallel_verifyta)
+    verifyta_path = tmp_path / "verifyta"
+    verifyta_path.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    verifyta_path.chmod(0o755)
+    return str(verifyta_path)
+
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_results_keep_query_order(tmp_path, workers):
+    verifyta_path = create_parallel_verifyta(tmp_path)
+    # The model path is where the stub logs the query files it was given
+    model_path = tmp_path / "model.log"
+    query_path = tmp_path / "queries.txt"
+    query_path.write_text("sup: 0\nsup: 1\nsup: 2\n")
+
+    results = list(verify_queries_parallel(str(model_path), str(query_path), verifyta_path, [0, 1, 2], workers))
+    assert [result.result_value for _, result in results] == [0, 1, 2]
+    assert [result.query for _, result in results] == ["sup: 0", "sup: 1", "sup: 2"]
+    assert all(output == "" for output, _ in results)
+
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_jobs_write_their_own_query_file(tmp_path, workers):
+    verifyta_path = create_parallel_verifyta(tmp_path)
+    model_path = tmp_path / "model.log"
+    work_folder = tmp_path / "work"
+    work_folder.mkdir()
+    queries = ["sup: 0", "sup: 1", "sup: 2"]
+
+    jobs = create_jobs(str(model_path), None, verifyta_path, str(work_folder), queries=queries)
+    assert len({job.query_path for job in jobs}) == len(queries)
+    results = list(verify_jobs_parallel(jobs, workers))
+    assert [result.result_value for _, result in results] == [0, 1, 2]
+    assert [result.query for _, result in results] == queries
+    for job, query in zip(jobs, queries):
+        with open(job.query_path) as file:
+            assert file.read() == query
+    assert sorted(model_path.read_text().splitlines()) == sorted(job.query_path for job in jobs)
+
+@pytest.mark.unit
+def test_has_trace():
+    assert has_trace("E<> R(0).l1", True)
+    assert not has_trace("E<> R(0).l1", False)
+    assert has_trace("A[] not R_log(0).overflow", False)
+    assert not has_trace("A[] not R_log(0).overflow", True)
+    assert not has_trace("sup: globalLogIndex", True)
@@ -0,0 +1,42 @@
+import pytest
+import os
+
+from DataObjects.JSONTransfer import EventData
+from JSONParser import parse_projection_JSON_file, parse_protocol_JSON_file
+from WellFormedness import WellFormednessAnalyser
+
+path_to_folder = os.path.join(os.path.dirname(__file__), "TestCaseProjection")
+
+def load_protocol():
+    global_json_transfer, json_transfers = parse_protocol_JSON_file(os.path.join(path_to_folder, "SwarmProtocol.json"))
+    json_transfers = [json_transfer for json_transfer in json_transfers if json_transfer.name != "Forklift"]
+    json_transfers.append(parse_projection_JSON_file(os.path.join(path_to_folder, "Forklift.json")))
+    return global_json_transfer, {json_transfer.name: json_transfer for json_transfer in json_transfers}
+
+@pytest.mark.unit
+def test_well_formed_protocol():
+    global_json_transfer, json_transfers = load_protocol()
+    assert WellFormednessAnalyser(global_json_transfer, list(json_transfers.values())).analyse() == []
+
+@pytest.mark.unit
+def test_missing_subscriptions():
+    global_json_transfer, json_transfers = load_protocol()
+    # Forklift no longer sees Request which enables Get nor Close which decides the branch at l1
+    json_transfers["Forklift"].subscriptions = ["Get"]
+    violations = WellFormednessAnalyser(global_json_transfer, list(json_transfers.values())).analyse()
+
+    assert "Causal consistency: Forklift emits Get at l2 but does not subscribe to Request which leads to l2" in violations
+    assert "Determinacy: Forklift takes part after the branch at l1 but does not subscribe to Close which decides it" in violations
+    assert "Subscription completeness: Forklift has Request from l1 to l2 but does not subscribe to it" in violations
+
+@pytest.mark.unit
+def test_conflicting_events():
+    global_json_transfer, json_transfers = load_protocol()
+    json_transfers["Door"].own_events.append(EventData("Get", "l2", "l3"))
+    json_transfers["Door"].subscriptions.append("Nope")
+    global_json_transfer.other_events.append(EventData("Close", "l1", "l0"))
+    violations = WellFormednessAnalyser(global_json_transfer, list(json_transfers.values())).analyse()
+
+    assert "Subscription completeness: Get is emitted by several roles Door, Forklift" in violations
+    assert "Subscription completeness: Door subscribes to Nope which is not part of the protocol" in violations
+    assert "Determinacy: l1 has several transitions with Close" in violations